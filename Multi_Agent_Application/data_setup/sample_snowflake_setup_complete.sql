@@ -11,6 +11,17 @@ create warehouse if not exists admin_wh_xsmall
     scaling_policy = 'standard'
     initially_suspended = true;
 
+-- Larger warehouse used by Agent 3 for heavy validation queries (see get_warehouse_routing_settings)
+create warehouse if not exists admin_wh_medium
+  with
+    warehouse_size = 'medium'
+    warehouse_type = 'standard'
+    auto_suspend = 60
+    auto_resume = true
+    min_cluster_count = 1
+    max_cluster_count = 1
+    scaling_policy = 'standard'
+    initially_suspended = true;
 
 use warehouse admin_wh_xsmall;
 
@@ -1,13 +1,22 @@
 import json
 from snowflake.snowpark import Session
-import ast
 from configuration import ConfigurationExecutor
+from llm_providers import create_llm_provider
+from model_router import get_model_router
+from sql_dedupe import dedupe_use_cases
 
 class Agent1RequirementsAnalyzer:
-    def __init__(self):
+    def __init__(self, session=None, provider_name=None):
         self.session = None
         self.config = ConfigurationExecutor()
-        self.session = Session.builder.configs(self.config.get_connection_params()).create()
+        provider_name = provider_name or self.config.get_llm_settings()["provider"]
+        if provider_name == "cortex":
+            self.session = session or Session.builder.configs(self.config.get_connection_params()).create()
+        else:
+            self.session = session
+        self.llm = create_llm_provider(provider_name, session=self.session)
+        self.dedupe_settings = self.config.get_dedupe_settings()
+        self.model_router = get_model_router()
             
 
     def _construct_llm_prompt(self, requirements_document_text):
@@ -44,18 +53,19 @@ Requirements Document:
 JSON List of Use Cases:"""
         return prompt
 
-    def _call_snowflake_cortex_llm(self, prompt):
+    def _call_llm(self, prompt, model):
 
-        print("\n--- Simulating Snowflake Cortex LLM Call (Agent 1) ---")
+        print(f"\n--- LLM Call via {self.llm.name} (Agent 1) ---")
 
-        simulated_response_content = self.session.sql("SELECT SNOWFLAKE.CORTEX.COMPLETE('mistral-large2', %s) AS response_array " % repr(prompt)).collect()
-        response_array = simulated_response_content[0]['RESPONSE_ARRAY']
-        
-        simulated_json_response = json.dumps(response_array)
+        try:
+            response = self.llm.complete(prompt, model)
+        except Exception as e:
+            print(f"Error calling {self.llm.name} model {model}: {e}")
+            return None
 
-        print(f"Simulated LLM JSON Response:\n{simulated_json_response}")
-        print("--- End of Simulated LLM Call ---\n")
-        return simulated_json_response
+        print(f"LLM Response:\n{response}")
+        print("--- End of LLM Call ---\n")
+        return response
 
     def analyze_requirements(self, requirements_document_text):
         if not requirements_document_text:
@@ -63,10 +73,29 @@ JSON List of Use Cases:"""
             return None
 
         prompt = self._construct_llm_prompt(requirements_document_text)
+        model = self.model_router.route(self.llm.name, requirements_document_text)["model"]
+        use_cases = self._parse_use_cases(self._call_llm(prompt, model))
+        if use_cases is None:
+            strong_model = self.model_router.escalate(self.llm.name, model)
+            if strong_model:
+                use_cases = self._parse_use_cases(self._call_llm(prompt, strong_model))
+        if use_cases is None:
+            return None
 
-        llm_response_json = self._call_snowflake_cortex_llm(prompt).strip()
-        llm_response_json_cleaned = ast.literal_eval(llm_response_json)
+        if self.dedupe_settings["enabled"]:
+            use_cases = dedupe_use_cases(
+                use_cases,
+                threshold=self.dedupe_settings["use_case_similarity"],
+                num_perm=self.dedupe_settings["num_perm"],
+                bands=self.dedupe_settings["bands"]
+            )
+        return use_cases
 
+    def _parse_use_cases(self, llm_response_json):
+        """
+        Parses the LLM response into a list of use case strings, or None if it is not one.
+        """
+        llm_response_json_cleaned = (llm_response_json or "").strip().replace("```json", "").replace("```", "").strip()
 
         if not llm_response_json_cleaned:
             print("Error: No response from LLM.")
@@ -1,13 +1,41 @@
+import json
 from snowflake.snowpark import Session
-from snowflake.snowpark.exceptions import SnowparkSQLException
 from configuration import ConfigurationExecutor
+from llm_providers import create_llm_provider
+from sql_cost_guard import SQLCostGuard, enforce_cost_guard
+from sql_dedupe import SQLDeduper
+from example_index import ExampleIndex, few_shot_context, validated_pairs
+from model_router import get_model_router
+from sql_analysis import is_select_statement
+from table_stats import TableStatsCache
 
 
 class Agent2SQLGenerator:
-    def __init__(self):
+    """
+    Agent 2: Converts high-level use cases into executable Snowflake SQL for the
+    P&C Insurance schema through the configured LLM provider (Cortex, Anthropic or mock).
+    """
+
+    def __init__(self, session=None, provider_name=None):
         self.session = None
         self.config = ConfigurationExecutor()
-        self.session = Session.builder.configs(self.config.get_connection_params()).create()
+        provider_name = provider_name or self.config.get_llm_settings()["provider"]
+        if provider_name == "cortex":
+            self.session = session or Session.builder.configs(self.config.get_connection_params()).create()
+        else:
+            self.session = session
+        self.llm = create_llm_provider(provider_name, session=self.session)
+        table_stats_settings = self.config.get_table_stats_settings()
+        self.table_stats = (
+            TableStatsCache(table_stats_settings["path"], table_stats_settings) if table_stats_settings["enabled"] else None
+        )
+        self.cost_guard_settings = self.config.get_cost_guard_settings()
+        self.cost_guard = (
+            SQLCostGuard(self.cost_guard_settings, table_stats=self.table_stats) if self.cost_guard_settings["enabled"] else None
+        )
+        self.example_settings = self.config.get_example_index_settings()
+        self.example_index = ExampleIndex(self.example_settings["path"]) if self.example_settings["enabled"] else None
+        self.model_router = get_model_router()
 
     def _construct_cortex_prompt(self, use_case_text):
         return (
@@ -154,35 +182,124 @@ class Agent2SQLGenerator:
             "        - {{name: CreatedDate, data_type: TIMESTAMP_NTZ}}"
         )
 
-    def _call_cortex_complete(self, prompt):
+    def refresh_table_stats(self, session):
+        """
+        Re-profiles the tables that changed since the cached statistics were
+        collected; `session` can be any warehouse session (Agent 2 itself has
+        none unless it generates through Cortex).
+        """
+        if self.table_stats and session is not None:
+            self.table_stats.refresh(session)
+
+    def _retrieve_examples(self, use_case):
+        """
+        Looks the use case up in the example index. Returns (reusable_sql, few_shot_examples);
+        reusable_sql is set when a validated query matches above the reuse threshold.
+        """
+        if not self.example_index:
+            return None, []
+        examples = self.example_index.search(
+            use_case, k=self.example_settings["top_k"], min_similarity=self.example_settings["min_similarity"]
+        )
+        if examples and examples[0]["score"] >= self.example_settings["reuse_threshold"]:
+            print(f"Reusing validated SQL (similarity {examples[0]['score']:.2f}) for use case: {use_case}")
+            return examples[0]["sql"], []
+        return None, examples
+
+    def record_validated_examples(self, use_case_by_sql, execution_results):
+        """
+        Adds the use case/SQL pairs that executed successfully to the example index.
+        """
+        if self.example_index:
+            self.example_index.add_examples(validated_pairs(use_case_by_sql, execution_results))
+
+    def _clean_sql_response(self, response):
+        sql_query = response.strip()
+        if sql_query.startswith('"') and sql_query.endswith('"'):
+            try:
+                sql_query = json.loads(sql_query)
+            except json.JSONDecodeError:
+                sql_query = sql_query.strip('"')
+        return sql_query.replace("```sql", "").replace("```", "").replace("`", "").strip()
+
+    def _call_llm(self, prompt, model):
         try:
-            cortex_query = f"""
-                SELECT AI_COMPLETE('snowflake-arctic','{prompt}') AS response
-            """
-            result = self.session.sql(cortex_query).collect()
-            response_array = result[0]['RESPONSE']
-            return response_array.strip().replace("```sql", "").replace("```", "").replace("`", "").replace('"', '').strip()
+            return self._clean_sql_response(self.llm.complete(prompt, model))
         except Exception as e:
-            print(f"Error using Snowflake Cortex: {e}")
+            print(f"Error calling {self.llm.name} model {model}: {e}")
+            return None
+
+    def _generate_with_model(self, prompt, model, sql_query=None):
+        """
+        Generates SQL with the given model (unless a first response is passed
+        in) and validates it: a SELECT statement the cost guard accepts.
+        Returns the accepted SQL or None.
+        """
+        if sql_query is None:
+            sql_query = self._call_llm(prompt, model)
+        if sql_query and self.cost_guard:
+            sql_query = enforce_cost_guard(
+                self.cost_guard,
+                sql_query,
+                lambda feedback: self._call_llm(
+                    f"{prompt}\n\nThe previous query was rejected for these reasons:\n{feedback}\nFix them in the new query.",
+                    model
+                ),
+                self.cost_guard_settings["regenerate_attempts"],
+            )
+        if not sql_query or "Placeholder: No specific P&C SQL generated" in sql_query or not is_select_statement(sql_query):
             return None
+        return sql_query
 
-    def generate_sql_queries(self, high_level_use_cases):
+    def generate_sql_queries(self, high_level_use_cases, use_case_by_sql=None):
+        """
+        Generates one SQL query per use case, reusing or learning from validated
+        examples when the example index has similar use cases.
+        The first LLM call for every use case is issued concurrently; validation,
+        regeneration and escalation to the strong model then run in order.
+        `use_case_by_sql`, if given, is filled with {sql: use_case}.
+        """
         if not high_level_use_cases or not isinstance(high_level_use_cases, list):
             print("Error: No high-level use cases provided or format is incorrect.")
             return None
 
-        sql_queries = []
+        stats_context = self.table_stats.prompt_context() if self.table_stats else ""
+        pending = []
         for use_case in high_level_use_cases:
             if not isinstance(use_case, str) or not use_case.strip():
                 print(f"Warning: Skipping invalid use case: {use_case}")
                 continue
 
-            prompt = self._construct_cortex_prompt(use_case)
-            sql_query = self._call_cortex_complete(prompt)
+            prompt = self._construct_cortex_prompt(use_case) + stats_context
+            reused_sql, examples = self._retrieve_examples(use_case)
+            if reused_sql is not None:
+                pending.append((use_case, prompt, None, reused_sql, None))
+                continue
+            prompt += few_shot_context(examples)
+            model = self.model_router.route(self.llm.name, use_case)["model"]
+            pending.append((use_case, prompt, model, None, self.llm.complete_async(prompt, model)))
+
+        sql_queries = []
+        seen_queries = SQLDeduper()
+        for use_case, prompt, model, sql_query, first_response in pending:
+            if sql_query is None:
+                try:
+                    first_sql = self._clean_sql_response(first_response.result())
+                except Exception as e:
+                    print(f"Error calling {self.llm.name} model {model}: {e}")
+                    first_sql = None
+                sql_query = self._generate_with_model(prompt, model, first_sql) if first_sql else None
+                strong_model = None if sql_query else self.model_router.escalate(self.llm.name, model)
+                if strong_model:
+                    sql_query = self._generate_with_model(prompt, strong_model)
 
-            if sql_query and "Placeholder: No specific P&C SQL generated" not in sql_query:
-                if sql_query not in sql_queries:
+            if sql_query:
+                if seen_queries.add(sql_query):
                     sql_queries.append(sql_query)
+                    if use_case_by_sql is not None:
+                        use_case_by_sql[sql_query] = use_case
+                else:
+                    print(f"Skipping SQL equivalent to an earlier query for use case: {use_case}")
             else:
                 print(f"Warning: Could not generate a specific SQL query for use case: {use_case}")
 
@@ -1,6 +1,29 @@
+import re
+import time
 from snowflake.snowpark import Session
 from snowflake.snowpark.exceptions import SnowparkSQLException
+from cancellation import QueryCancelled
 from configuration import ConfigurationExecutor
+from fair_scheduler import get_scheduler
+from query_fusion import plan_fusion
+from result_fingerprint import ResultFingerprinter, diff_fingerprints, result_scan
+from result_spill import ResultSpillWriter
+from run_store import RunStore
+from sql_analysis import has_unordered_limit, strip_statement_terminators
+from sql_sampler import apply_sampling
+from warehouse_router import WarehouseRouter
+
+SIMPLE_COLUMN_NAME = re.compile(r"^[A-Z_][A-Z0-9_$]*$")
+
+
+def _snowpark_column_name(name):
+    """
+    Result column names as Snowpark reports them in a schema: quoted unless
+    they are plain upper-case identifiers, so batched and single-query runs
+    of a query produce the same headers and fingerprints.
+    """
+    return name if SIMPLE_COLUMN_NAME.match(name) else '"' + name.replace('"', '""') + '"'
+
 
 class Agent3SQLExecutor:
     """
@@ -8,52 +31,411 @@ class Agent3SQLExecutor:
     and formats the results
     """
 
-    def __init__(self):
+    def __init__(self, spill_mode=None, session=None):
         self.session = None
         self.config = ConfigurationExecutor()
-        self.session = Session.builder.configs(self.config.get_connection_params()).create()
-                
+        self.session = session or Session.builder.configs(self.config.get_connection_params()).create()
+        self.spill_settings = self.config.get_spill_settings()
+        self.spill_mode = self.spill_settings["enabled"] if spill_mode is None else spill_mode
+        self.guard_settings = self.config.get_query_guard_settings()
+        routing_settings = self.config.get_warehouse_routing_settings()
+        self.routing_enabled = routing_settings["enabled"]
+        self.warehouse_router = WarehouseRouter(self.session, self.config.get_connection_params(), routing_settings)
+        self.fusion_settings = self.config.get_query_fusion_settings()
+        self.batch_settings = self.config.get_multi_statement_settings()
+        fingerprint_settings = self.config.get_fingerprint_settings()
+        self.fingerprinter = ResultFingerprinter(fingerprint_settings["max_columns"])
+        run_store_path = self.config.get_run_store_settings()["path"]
+        self.run_store = RunStore(run_store_path) if fingerprint_settings["enabled"] else None
+
+
+    def _wait_for_query(self, df, cancel_token=None):
+        """
+        Submits the query asynchronously and polls until it finishes.
+        Cancels the in-flight query when the statement timeout passes or the
+        cancel token fires. Returns the finished AsyncJob.
+        """
+        timeout = self.guard_settings["statement_timeout_seconds"]
+        async_job = df.collect_nowait(statement_params={"STATEMENT_TIMEOUT_IN_SECONDS": timeout})
+        deadline = time.time() + timeout
+        while not async_job.is_done():
+            if cancel_token is not None and cancel_token.is_cancelled:
+                async_job.cancel()
+                raise QueryCancelled(cancel_token.reason)
+            if time.time() > deadline:
+                async_job.cancel()
+                raise QueryCancelled(f"Timed out after {timeout}s", "TIMEOUT")
+            time.sleep(self.guard_settings["poll_interval_seconds"])
+        return async_job
 
-    def _execute_single_query_on_snowflake(self, sql_query):
+    def _execute_single_query_on_snowflake(self, sql_query, session=None, cancel_token=None, full_result=False):
         """
         Executes a single SQL query using Snowpark and fetches results.
-        Returns results in tabular format: (headers, data_rows).
-        Limits results to 10 records.
+        Returns results in tabular format: (headers, data_rows, query_id).
+        Limits results to 10 records. With `full_result` the whole query runs
+        (so its persisted result can be fingerprinted) and the 10 rows are
+        read back through RESULT_SCAN.
         """
         print(f"\n--- Executing SQL Query via Snowpark (Agent 3) ---")
         print(f"Executing SQL Query:\n{sql_query}")
 
-        if not self.session:
+        session = session or self.session
+        if not session:
             print("Error: Snowpark session not initialized.")
-            return ["Error"], [["Session not available"]]
+            return ["Error"], [["Session not available"]], None
 
         try:
-            df = self.session.sql(sql_query)
+            df = session.sql(sql_query)
             headers = [field.name for field in df.schema.fields]  # Ensure headers are strings
 
-            # Collect up to 11 rows to check for overflow
-            result_rows = df.collect()[:11]
+            # Fetch at most 11 rows server-side to check for overflow
+            with get_scheduler().slot("snowflake"):
+                if full_result:
+                    query_id = self._wait_for_query(df, cancel_token).query_id
+                    result_rows = session.sql(f"SELECT * FROM {result_scan(query_id)} LIMIT 11").collect()
+                else:
+                    async_job = self._wait_for_query(df.limit(11), cancel_token)
+                    query_id = async_job.query_id
+                    result_rows = async_job.result()
             data_rows = [list(row) for row in result_rows[:10]]  # Convert Row objects to lists
 
             print(f"Fetched {len(data_rows)} records (limited to 10).")
-            return headers, data_rows
+            return headers, data_rows, query_id
 
+        except QueryCancelled:
+            raise
         except SnowparkSQLException as e:
             print(f"Snowpark SQL execution error: {e}")
-            return ["Error"], [[f"SQL Error: {str(e)}"]]
+            return ["Error"], [[f"SQL Error: {str(e)}"]], None
         except Exception as e:
             print(f"General error during Snowpark execution: {e}")
-            return ["Error"], [[f"General Error: {str(e)}"]]
+            return ["Error"], [[f"General Error: {str(e)}"]], None
 
 
-    def execute_sql_queries(self, sql_queries_list):
+    def _spill_single_query_on_snowflake(self, sql_query, spill_writer, session=None, cancel_token=None):
+        """
+        Executes a single SQL query and streams the full result to disk.
+        Returns (headers, preview_rows, spill_handle_dict, query_id).
+        """
+        print(f"\n--- Executing SQL Query via Snowpark with spill (Agent 3) ---")
+        print(f"Executing SQL Query:\n{sql_query}")
+
+        session = session or self.session
+        if not session:
+            print("Error: Snowpark session not initialized.")
+            return ["Error"], [["Session not available"]], None, None
+
+        try:
+            df = session.sql(sql_query)
+            fields = df.schema.fields
+            headers = [field.name for field in fields]
+            with get_scheduler().slot("snowflake"):
+                async_job = self._wait_for_query(df, cancel_token)
+                handle, preview = spill_writer.spill(
+                    async_job.result(result_type="pandas_batches"),
+                    headers,
+                    self.spill_settings["preview_rows"],
+                    max_rows=self.guard_settings["max_result_rows"],
+                    cancel_token=cancel_token,
+                    column_types=[field.datatype for field in fields],
+                )
+            return headers, preview, handle.to_dict(), async_job.query_id
+
+        except QueryCancelled:
+            raise
+        except SnowparkSQLException as e:
+            print(f"Snowpark SQL execution error: {e}")
+            return ["Error"], [[f"SQL Error: {str(e)}"]], None, None
+        except Exception as e:
+            print(f"General error during Snowpark execution: {e}")
+            return ["Error"], [[f"General Error: {str(e)}"]], None, None
+
+    def _cancelled_result(self, reason, status="CANCELLED"):
+        print(f"Query not completed ({status}): {reason}")
+        return {"headers": ["Error"], "data": [[f"{status.title().replace('_', ' ')}: {reason}"]], "status": status}
+
+    def _check_bytes_guard(self, cost_report):
+        max_bytes = self.guard_settings["max_bytes_scanned"]
+        if max_bytes and cost_report and cost_report.get("bytes_assigned", 0) > max_bytes:
+            raise QueryCancelled(
+                f"Estimated scan of {cost_report['bytes_assigned'] / 1024 ** 3:.1f} GB exceeds the "
+                f"{max_bytes / 1024 ** 3:.1f} GB guard",
+                "REJECTED",
+            )
+
+    def _should_fingerprint(self, executed_sql, sampled_tables):
+        """
+        Sampled results and row caps without an ORDER BY are not repeatable,
+        so their fingerprints would flip between PASS and CHANGED.
+        """
+        if self.run_store is None or sampled_tables:
+            return False
+        if has_unordered_limit(executed_sql):
+            print("Skipping result fingerprint: LIMIT without ORDER BY returns arbitrary rows")
+            return False
+        return True
+
+    def _check_regression(self, run_id, sql_query, result_entry, session, query_id, positions=None):
+        """
+        Fingerprints a finished query, records it in the run store and diffs it
+        against the previous run of the same SQL. `positions` selects the
+        query's columns when `query_id` is a fused query.
+        Returns (fingerprint, regression); a failed query is a FAIL regression.
+        """
+        previous = self.run_store.latest_fingerprint(sql_query, exclude_run_id=run_id)
+        if result_entry["headers"] == ["Error"] or query_id is None:
+            return None, {
+                "status": "FAIL",
+                "previous_run_id": previous["run_id"] if previous else None,
+                "changes": [str(result_entry["data"][0][0])],
+            }
+
+        try:
+            with get_scheduler().slot("snowflake"):
+                fingerprint = self.fingerprinter.compute(session, query_id, result_entry["headers"], positions)
+        except Exception as e:
+            print(f"Could not fingerprint query result: {e}")
+            return None, None
+
+        self.run_store.record_fingerprint(run_id, sql_query, fingerprint)
+        regression = diff_fingerprints(previous, fingerprint)
+        print(f"Regression check: {regression['status']} ({fingerprint['row_count']} rows)")
+        return fingerprint, regression
+
+    def _sampled_note(self, sample_settings, sampled_tables, executed_sql):
+        return {
+            "mode": sample_settings["mode"],
+            "value": sample_settings["value"],
+            "tables": sampled_tables,
+            "executed_sql": executed_sql,
+        }
+
+    def _prepare_query(self, sql_query, sample_settings=None):
+        """
+        Applies sampling and routes the query.
+        Returns (executed_sql, sampled_tables, session, cost_report).
+        """
+        executed_sql = sql_query
+        sampled_tables = []
+        if sample_settings:
+            executed_sql, sampled_tables = apply_sampling(sql_query, sample_settings)
+
+        session, cost_report = self.warehouse_router.route(executed_sql, adaptive=self.routing_enabled)
+        print(f"Routing query to warehouse {cost_report['warehouse']}")
+        return executed_sql, sampled_tables, session, cost_report
+
+    def _run_statement_batch(self, statements):
+        """
+        Sends the statements as one multi-statement request on the default
+        session's connection and reads each result set in turn. Returns
+        (headers, data_rows, query_id) for every statement read. A failing
+        statement fails the whole request, so nothing is returned and the
+        statements that had already run are executed again singly; keep
+        `max_statements` small so such a retry stays cheap.
+        """
+        outcomes = []
+        cursor = None
+        try:
+            cursor = self.session.connection.cursor()
+            with get_scheduler().slot("snowflake"):
+                cursor.execute(
+                    ";\n".join(statements),
+                    num_statements=len(statements),
+                    timeout=self.guard_settings["statement_timeout_seconds"],
+                )
+                while True:
+                    headers = [_snowpark_column_name(column[0]) for column in cursor.description]
+                    data_rows = [list(row) for row in cursor.fetchmany(11)[:10]]
+                    outcomes.append((headers, data_rows, cursor.sfqid))
+                    if len(outcomes) == len(statements) or not cursor.nextset():
+                        break
+        except Exception as e:
+            print(f"Multi-statement request stopped after reading {len(outcomes)} of {len(statements)} results: {e}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+        return outcomes
+
+    def _execute_batched(self, sql_queries, prepared, run_id, cancel_token=None, sample_settings=None):
+        """
+        Runs cheap queries (estimated scan up to `max_bytes_per_statement`,
+        routed to the default warehouse) in multi-statement requests of up to
+        `max_statements`, which saves the per-query describe, submit, poll and
+        fetch round-trips. Every query is routed once here; `prepared` keeps
+        the routing of the queries left for single execution. Queries of a
+        failed request whose results were not read are not in the returned
+        results and run singly, which reports their errors as usual.
+        """
+        candidates = []
+        for sql_query in dict.fromkeys(sql_queries):
+            if not isinstance(sql_query, str) or not sql_query.strip():
+                continue
+            executed_sql, sampled_tables, session, cost_report = self._prepare_query(sql_query, sample_settings)
+            max_bytes = min(self.batch_settings["max_bytes_per_statement"], self.guard_settings["max_bytes_scanned"] or float("inf"))
+            is_cheap = (
+                "bytes_assigned" in cost_report
+                and cost_report["bytes_assigned"] <= max_bytes
+                and session is self.session
+            )
+            if not is_cheap:
+                prepared[sql_query] = (executed_sql, sampled_tables, session, cost_report)
+                continue
+            fingerprint_result = self._should_fingerprint(executed_sql, sampled_tables)
+            # A trailing comment would swallow the statement separator or the closing parenthesis
+            statement = strip_statement_terminators(executed_sql).strip()
+            candidates.append({
+                "sql": sql_query,
+                "executed_sql": executed_sql,
+                "sampled_tables": sampled_tables,
+                "cost": cost_report,
+                "fingerprint": fingerprint_result,
+                # Single execution limits unfingerprinted queries to 11 rows server-side too
+                "statement": statement if fingerprint_result else f"SELECT * FROM ({statement}) LIMIT 11",
+            })
+
+        results = {}
+        max_statements = self.batch_settings["max_statements"]
+        for start in range(0, len(candidates), max_statements):
+            if cancel_token is not None and cancel_token.is_cancelled:
+                break
+            batch = candidates[start:start + max_statements]
+            if len(batch) < 2:
+                for candidate in batch:
+                    prepared[candidate["sql"]] = (
+                        candidate["executed_sql"], candidate["sampled_tables"], self.session, candidate["cost"]
+                    )
+                continue
+
+            print(f"Submitting {len(batch)} queries as one multi-statement request")
+            start_time = time.time()
+            outcomes = self._run_statement_batch([candidate["statement"] for candidate in batch])
+            elapsed_seconds = time.time() - start_time
+            for candidate, (headers, data, query_id) in zip(batch, outcomes):
+                entry = {"headers": headers, "data": data}
+                entry["cost"] = dict(candidate["cost"], elapsed_seconds=round(elapsed_seconds / len(outcomes), 3))
+                entry["batched"] = {"statements": len(batch)}
+                if candidate["fingerprint"]:
+                    fingerprint, regression = self._check_regression(run_id, candidate["sql"], entry, self.session, query_id)
+                    if regression:
+                        entry["fingerprint"] = fingerprint
+                        entry["regression"] = regression
+                if candidate["sampled_tables"]:
+                    entry["sampled"] = self._sampled_note(sample_settings, candidate["sampled_tables"], candidate["executed_sql"])
+                results[candidate["sql"]] = entry
+            for candidate in batch[len(outcomes):]:
+                prepared[candidate["sql"]] = (
+                    candidate["executed_sql"], candidate["sampled_tables"], self.session, candidate["cost"]
+                )
+        return results
+
+    def _execute_fused_group(self, fusion_group, run_id, cancel_token=None, sample_settings=None):
+        """
+        Runs one fused query (see query_fusion) and splits its single result
+        row back into an entry per original query, each with the headers the
+        original query would return. The scan cost and elapsed time are shared
+        evenly between the members. Returns None when the group should run
+        unfused instead (the fused query failed, timed out or was rejected).
+        """
+        executed_sql = fusion_group["sql"]
+        sampled_tables = []
+        if sample_settings:
+            executed_sql, sampled_tables = apply_sampling(executed_sql, sample_settings)
+
+        session, cost_report = self.warehouse_router.route(executed_sql, adaptive=self.routing_enabled)
+        print(f"Routing fused query of {len(fusion_group['members'])} checks to warehouse {cost_report['warehouse']}")
+        fingerprint_result = self._should_fingerprint(executed_sql, sampled_tables)
+        start_time = time.time()
+        try:
+            self._check_bytes_guard(cost_report)
+            # Describing the originals compiles them without scanning anything
+            member_headers = [
+                [field.name for field in session.sql(member["sql"]).schema.fields]
+                for member in fusion_group["members"]
+            ]
+            headers, data, query_id = self._execute_single_query_on_snowflake(
+                executed_sql, session, cancel_token, full_result=fingerprint_result
+            )
+        except QueryCancelled as e:
+            print(f"Fused query not completed ({e.status}); running its queries separately")
+            return None
+        except Exception as e:
+            print(f"Could not fuse queries: {e}; running them separately")
+            return None
+        fused_columns = sum(len(member["positions"]) for member in fusion_group["members"])
+        if headers == ["Error"] or len(data) != 1 or len(data[0]) != fused_columns or any(
+            len(names) != len(member["positions"]) for names, member in zip(member_headers, fusion_group["members"])
+        ):
+            print("Fused query did not return one row matching its queries; running them separately")
+            return None
+
+        member_count = len(fusion_group["members"])
+        elapsed_seconds = time.time() - start_time
+        results = {}
+        for member, names in zip(fusion_group["members"], member_headers):
+            entry = {"headers": names, "data": [[data[0][position - 1] for position in member["positions"]]]}
+            entry["cost"] = dict(cost_report, elapsed_seconds=round(elapsed_seconds / member_count, 3))
+            if "bytes_assigned" in cost_report:
+                entry["cost"]["bytes_assigned"] = cost_report["bytes_assigned"] / member_count
+            entry["fused"] = {"queries": member_count, "fused_sql": fusion_group["sql"]}
+            if fingerprint_result:
+                fingerprint, regression = self._check_regression(
+                    run_id, member["sql"], entry, session, query_id, member["positions"]
+                )
+                if regression:
+                    entry["fingerprint"] = fingerprint
+                    entry["regression"] = regression
+            if sampled_tables:
+                entry["sampled"] = self._sampled_note(sample_settings, sampled_tables, executed_sql)
+            results[member["sql"]] = entry
+        return results
+
+    def execute_sql_queries(self, sql_queries_list, run_id=None, spill_mode=None, cancel_token=None, sample_settings=None):
         """
         Executes a list of SQL queries and returns their results.
+        In spill mode every result is written to the run directory and the
+        entry carries a `spill` handle next to the usual preview rows.
+        `spill_mode` overrides the executor default for this call only.
+        Each entry also carries a `cost` report (EXPLAIN estimate, chosen
+        warehouse and elapsed seconds). Queries that time out, trip a guard or
+        are cancelled through `cancel_token` get a `status` and the reason.
+        With `sample_settings` ({"mode": "rows" | "percent", "value", "seed"})
+        base tables are read through SAMPLE and the entry is labelled `sampled`;
+        results stay keyed by the original query so it can be promoted to a full run.
+        Full (unsampled) runs are fingerprinted and carry a `regression` verdict
+        (NEW, PASS, CHANGED or FAIL) against the previous run of the same query.
+        Unless spilling, scalar aggregate checks over the same tables are fused
+        into one scan first; their entries carry a `fused` note. In batch mode
+        cheap queries then go out in multi-statement requests (`batched` note).
         """
         if not sql_queries_list or not isinstance(sql_queries_list, list):
             print("Error: No SQL queries provided or format is incorrect.")
             return None
 
+        spill_mode = self.spill_mode if spill_mode is None else spill_mode
+        spill_writer = None
+        if spill_mode:
+            spill_writer = ResultSpillWriter(
+                base_dir=self.spill_settings["base_dir"],
+                run_id=run_id,
+                file_format=self.spill_settings["format"],
+                batch_rows=self.spill_settings["batch_rows"],
+            )
+
+        # Results of queries answered by a fused query or a multi-statement request
+        combined_results = {}
+        if self.fusion_settings["enabled"] and not spill_mode:
+            for fusion_group in plan_fusion(sql_queries_list, self.fusion_settings["max_group_size"]):
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    break
+                combined_results.update(self._execute_fused_group(fusion_group, run_id, cancel_token, sample_settings) or {})
+
+        prepared = {}
+        if self.batch_settings["enabled"] and not spill_mode:
+            combined_results.update(self._execute_batched(
+                [sql_query for sql_query in sql_queries_list if sql_query not in combined_results],
+                prepared, run_id, cancel_token, sample_settings
+            ))
+
         all_results = {}
         for i, sql_query in enumerate(sql_queries_list):
             if not isinstance(sql_query, str) or not sql_query.strip():
@@ -61,7 +443,45 @@ class Agent3SQLExecutor:
                 all_results[f"Skipped_Invalid_Query_{i}"] = {"headers": ["Error"], "data": [["Invalid SQL query string"]]}
                 continue
 
-            headers, data = self._execute_single_query_on_snowflake(sql_query)
-            all_results[sql_query] = {"headers": headers, "data": data}
+            if sql_query in combined_results:
+                all_results[sql_query] = combined_results[sql_query]
+                continue
+
+            if cancel_token is not None and cancel_token.is_cancelled:
+                all_results[sql_query] = self._cancelled_result(cancel_token.reason)
+                continue
+
+            if sql_query in prepared:
+                executed_sql, sampled_tables, session, cost_report = prepared.pop(sql_query)
+            else:
+                executed_sql, sampled_tables, session, cost_report = self._prepare_query(sql_query, sample_settings)
+
+            fingerprint_result = self._should_fingerprint(executed_sql, sampled_tables)
+            query_id = None
+            start_time = time.time()
+            try:
+                self._check_bytes_guard(cost_report)
+                if spill_mode:
+                    headers, data, spill_handle, query_id = self._spill_single_query_on_snowflake(executed_sql, spill_writer, session, cancel_token)
+                    all_results[sql_query] = {"headers": headers, "data": data, "spill": spill_handle}
+                else:
+                    headers, data, query_id = self._execute_single_query_on_snowflake(
+                        executed_sql, session, cancel_token, full_result=fingerprint_result
+                    )
+                    all_results[sql_query] = {"headers": headers, "data": data}
+            except QueryCancelled as e:
+                all_results[sql_query] = self._cancelled_result(e.reason, e.status)
+                if e.status == "CANCELLED":
+                    fingerprint_result = False
+
+            cost_report["elapsed_seconds"] = round(time.time() - start_time, 3)
+            all_results[sql_query]["cost"] = cost_report
+            if fingerprint_result:
+                fingerprint, regression = self._check_regression(run_id, sql_query, all_results[sql_query], session, query_id)
+                if regression:
+                    all_results[sql_query]["fingerprint"] = fingerprint
+                    all_results[sql_query]["regression"] = regression
+            if sampled_tables:
+                all_results[sql_query]["sampled"] = self._sampled_note(sample_settings, sampled_tables, executed_sql)
 
         return all_results
@@ -1,8 +1,22 @@
+import time
+import uuid
 import streamlit as st
 import pandas as pd
 from agent1_requirements_analyzer import Agent1RequirementsAnalyzer
 from agent2_sql_generator import Agent2SQLGenerator
 from agent3_sql_executor import Agent3SQLExecutor
+from configuration import ConfigurationExecutor
+from fair_scheduler import get_scheduler
+from llm_providers import provider_stats
+from model_router import get_model_router
+from job_runner import JobRunner, ACTIVE_JOB_STATUSES
+from pipeline_orchestrator import PipelineOrchestrator
+from result_spill import SpilledResult
+from run_store import RunStore, document_hash
+from scheduled_regression import ScheduledRegressionStore, schedule_suite
+from server_pipeline import ServerRunStore, cancel_server_run, submit_server_run
+from suite_bundle import export_test_suite
+from warehouse_warmer import WarehouseWarmer
 from PIL import Image
 
 # Correct image path
@@ -261,6 +275,48 @@ def flatten_cell(cell):
     else:
         return cell
 
+@st.cache_resource(show_spinner=False)
+def get_agents():
+    """Builds the three agents once per server process around one shared Snowpark session"""
+    agent1 = Agent1RequirementsAnalyzer()
+    agent2 = Agent2SQLGenerator(session=agent1.session)
+    agent3 = Agent3SQLExecutor(session=agent1.session)
+    return agent1, agent2, agent3
+
+@st.cache_resource(show_spinner=False)
+def get_run_store():
+    """Opens the run history store once per server process and applies retention"""
+    run_store_settings = ConfigurationExecutor().get_run_store_settings()
+    run_store = RunStore(run_store_settings["path"])
+    run_store.compact(run_store_settings["retention_days"], run_store_settings["keep_runs_per_document"])
+    return run_store
+
+@st.cache_resource(show_spinner=False)
+def get_warehouse_warmer():
+    """Process-wide warmer around Agent 3's warehouse router"""
+    return WarehouseWarmer(get_agents()[2].warehouse_router, ConfigurationExecutor().get_warehouse_warming_settings())
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    """Process-wide background runner shared by every browser session"""
+    job_settings = ConfigurationExecutor().get_job_settings()
+    orchestrator = PipelineOrchestrator(*get_agents(), run_store=get_run_store())
+    return JobRunner(
+        orchestrator,
+        jobs_dir=job_settings["jobs_dir"],
+        max_workers=job_settings["max_workers"],
+        abandon_after_seconds=job_settings["abandon_after_seconds"]
+    )
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def build_result_dataframe(run_id, query, variant, _result_data):
+    """Flattens one query result into a display DataFrame, memoized per run, query and variant (sampled/full)"""
+    flattened_data = [
+        [flatten_cell(cell) for cell in row]
+        for row in _result_data["data"]
+    ]
+    return pd.DataFrame(flattened_data, columns=_result_data["headers"])
+
 def get_agent_info():
     """Returns information about each agent for display"""
     return {
@@ -331,15 +387,118 @@ def display_agent_progress(agent_num, status, result=None):
                     if result_data["headers"][0] == "Error":
                         st.error(f"Error executing query: {result_data['data'][0][0]}")
                     else:
-                        flattened_data = [
-                            [flatten_cell(cell) for cell in row]
-                            for row in result_data["data"]
-                        ]
-                        df = pd.DataFrame(flattened_data, columns=result_data["headers"])
+                        if result_data.get("sampled"):
+                            sampled = result_data["sampled"]
+                            st.warning(
+                                f"🧪 SAMPLED result ({sampled['mode']}: {sampled['value']}) over "
+                                f"{', '.join(sampled['tables'])} — not a full-table evaluation"
+                            )
+                        variant = "sampled" if result_data.get("sampled") else "full"
+                        df = build_result_dataframe(result.get("run_id"), query, variant, result_data)
                         st.dataframe(df, use_container_width=True)
+                        if result_data.get("spill"):
+                            display_spilled_result(query, result_data["spill"])
                 else:
                     st.info("No data returned for this query.")
 
+                if result_data.get("cost"):
+                    cost = result_data["cost"]
+                    st.caption(
+                        f"🏭 Warehouse `{cost['warehouse']}` · "
+                        f"{cost.get('bytes_assigned', 0) / 1024 / 1024:.1f} MB estimated scan · "
+                        f"{cost.get('join_count', 0)} joins · {cost['elapsed_seconds']:.2f}s"
+                    )
+                if result_data.get("fused"):
+                    st.caption(f"🔗 Computed in one scan with {result_data['fused']['queries'] - 1} other check(s); cost shared evenly")
+                if result_data.get("batched"):
+                    st.caption(f"📨 Sent in one multi-statement request of {result_data['batched']['statements']} queries")
+
+                if result_data.get("regression"):
+                    display_regression(result_data["regression"], result_data.get("fingerprint"))
+
+def display_spilled_result(query, spill_handle):
+    """Pages through a spilled result via its memory-mapped file"""
+    handle = SpilledResult.from_dict(spill_handle)
+    st.caption(f"💾 {handle.row_count:,} rows spilled to disk ({handle.size_bytes / 1024 / 1024:.1f} MB) — `{handle.path}`")
+    if handle.row_count <= 10:
+        return
+    with st.expander("📄 Browse full result", expanded=False):
+        page_size = 100
+        page_count = (handle.row_count + page_size - 1) // page_size
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, key=f"spill_page_{handle.path}")
+        rows = handle.read_rows(offset=(page - 1) * page_size, limit=page_size)
+        page_df = pd.DataFrame(
+            [[flatten_cell(cell) for cell in row] for row in rows],
+            columns=handle.headers
+        )
+        st.dataframe(page_df, use_container_width=True)
+
+REGRESSION_BADGES = {
+    "NEW": "🆕 NEW",
+    "PASS": "✅ PASS",
+    "CHANGED": "🔄 CHANGED",
+    "FAIL": "❌ FAIL"
+}
+
+def display_regression(regression, fingerprint=None):
+    """Shows a query's fingerprint verdict against its previous run"""
+    badge = REGRESSION_BADGES.get(regression["status"], regression["status"])
+    details = f"**Regression:** {badge}"
+    if fingerprint:
+        details += f" · {fingerprint['row_count']:,} rows · fingerprint `{fingerprint['digest'][:12]}`"
+    if regression.get("previous_run_id"):
+        details += f" · compared with run `{regression['previous_run_id']}`"
+    st.markdown(details)
+    for change in regression.get("changes", []):
+        st.markdown(f"- {change}")
+
+def display_regression_summary(results):
+    """Counts regression verdicts across a run"""
+    statuses = [
+        result_data["regression"]["status"]
+        for result_data in (results.get("sql_execution_results") or {}).values()
+        if result_data.get("regression")
+    ]
+    if not statuses:
+        return
+    st.markdown(
+        "**🧬 Regression Check:** " +
+        " · ".join(f"{REGRESSION_BADGES[status]}: {statuses.count(status)}" for status in REGRESSION_BADGES if status in statuses)
+    )
+
+def display_cost_report(results):
+    """Summarizes per-warehouse query cost for a run"""
+    costs = [
+        result_data["cost"]
+        for result_data in (results.get("sql_execution_results") or {}).values()
+        if result_data.get("cost")
+    ]
+    if not costs:
+        return
+    cost_df = pd.DataFrame(costs)
+    if "bytes_assigned" not in cost_df:
+        cost_df["bytes_assigned"] = 0
+    summary = cost_df.groupby("warehouse").agg(
+        queries=("warehouse", "size"),
+        estimated_mb_scanned=("bytes_assigned", lambda b: b.fillna(0).sum() / 1024 / 1024),
+        total_seconds=("elapsed_seconds", "sum")
+    ).reset_index()
+    st.markdown("**🏭 Warehouse Cost Report:**")
+    st.dataframe(summary, use_container_width=True)
+
+def display_profile(results):
+    """Shows the hot functions and allocations captured for a profiled run"""
+    profile = results.get("profile")
+    if not profile:
+        return
+    with st.expander(f"🔬 Run Profile ({profile['wall_seconds']:.1f}s wall, peak traced {profile['peak_traced_mb']} MB)"):
+        st.markdown("**Hot functions:**")
+        st.dataframe(pd.DataFrame(profile["top_functions"]), use_container_width=True)
+        if profile["top_allocations"]:
+            st.markdown("**Largest allocations still held at the end of the run:**")
+            st.dataframe(pd.DataFrame(profile["top_allocations"]), use_container_width=True)
+        st.caption(f"Full profile: `{profile['pstats_path']}` (open with `python -m pstats` or snakeviz)")
+
 def display_progress_bar(current_step, total_steps):
     """Display overall progress bar"""
     progress = (current_step / total_steps) * 100
@@ -435,7 +594,7 @@ uploaded_file = st.file_uploader(
 requirements_text = ""
 if uploaded_file is not None:
     try:
-        requirements_text = uploaded_file.read().decode("utf-8")
+        requirements_text = uploaded_file.getvalue().decode("utf-8")
         st.success(f"✅ File uploaded successfully! ({len(requirements_text)} characters)")
         
         with st.expander("📋 Preview Requirements Document", expanded=False):
@@ -446,160 +605,239 @@ if uploaded_file is not None:
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+warming_settings = ConfigurationExecutor().get_warehouse_warming_settings()
+if requirements_text.strip() and warming_settings["enabled"]:
+    # Resume the warehouse while the LLM agents work, once per uploaded document
+    uploaded_hash = document_hash(requirements_text)
+    if st.session_state.get("warmed_document") != uploaded_hash:
+        warmer = get_warehouse_warmer()
+        warmer.warm(warmer.expected_duration(get_run_store(), requirements_text))
+        st.session_state.warmed_document = uploaded_hash
+
+if requirements_text.strip():
+    previous_runs = get_run_store().find_runs(requirements_text=requirements_text, limit=10)
+    if previous_runs:
+        with st.expander(f"📚 Previous runs of this document ({len(previous_runs)})", expanded=False):
+            selected_run = st.selectbox(
+                "Stored run",
+                previous_runs,
+                format_func=lambda run: (
+                    f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(run['created_at']))} · "
+                    f"{run['status']} · {run['query_count']} queries · `{run['run_id'][:8]}`"
+                )
+            )
+            if st.button("📂 Load Stored Results"):
+                stored_run = get_run_store().get_run(selected_run["run_id"])
+                if stored_run:
+                    st.session_state.results = stored_run["results"]
+                    st.success("✅ Loaded stored results; no agents were re-run.")
+
+# Sidebar Settings
+with st.sidebar:
+    st.markdown("## ⚙️ Execution Settings")
+    spill_results = st.checkbox(
+        "💾 Spill large results to disk",
+        value=ConfigurationExecutor().get_spill_settings()["enabled"],
+        help="Stream full query results to Arrow/Parquet files instead of keeping them in memory"
+    )
+
+    sampling_defaults = ConfigurationExecutor().get_sampling_settings()
+    sampled_preview = st.checkbox(
+        "🧪 Sampled preview mode",
+        value=sampling_defaults["enabled"],
+        help="Run every query against a SAMPLE of each table for second-scale feedback"
+    )
+    sample_settings = None
+    if sampled_preview:
+        sample_mode = st.radio(
+            "Sample by", ["rows", "percent"],
+            index=0 if sampling_defaults["mode"] == "rows" else 1,
+            horizontal=True
+        )
+        sample_value = st.number_input(
+            "Rows per table" if sample_mode == "rows" else "Percent of each table",
+            min_value=1 if sample_mode == "rows" else 0.001,
+            value=sampling_defaults["rows"] if sample_mode == "rows" else sampling_defaults["percent"]
+        )
+        sample_settings = {"mode": sample_mode, "value": sample_value, "seed": sampling_defaults["seed"]}
+
+    server_settings = ConfigurationExecutor().get_server_pipeline_settings()
+    server_side = st.checkbox(
+        "☁️ Run server-side in Snowflake",
+        value=server_settings["enabled"],
+        help=f"Run all three agents inside the {server_settings['procedure_name']} stored procedure; the app only polls its result tables"
+    )
+
+    profile_run = st.checkbox(
+        "🔬 Profile this run",
+        value=ConfigurationExecutor().get_profiling_settings()["enabled"],
+        help="Record a CPU profile and allocation snapshot of the next run; no overhead when off"
+    )
+
+    st.markdown("## 🚦 Shared Capacity")
+    for resource, resource_stats in get_scheduler().stats().items():
+        label = "Snowflake queries" if resource == "snowflake" else "LLM calls"
+        st.markdown(
+            f"**{label}:** {resource_stats['in_use']}/{resource_stats['limit']} in use · "
+            f"{resource_stats['queue_depth']} queued · avg wait {resource_stats['avg_wait_seconds']:.1f}s"
+        )
+
+    if warming_settings["enabled"]:
+        warming_stats = get_warehouse_warmer().stats()
+        if warming_stats["warehouses"]:
+            st.markdown("## 🔥 Warehouse Warm-up")
+            for warehouse, warehouse_stats in warming_stats["warehouses"].items():
+                if warehouse_stats["error"]:
+                    st.markdown(f"**{warehouse}:** warm-up failed ({warehouse_stats['error']})")
+                elif warehouse_stats["warmed_at"] is None:
+                    st.markdown(f"**{warehouse}:** resuming...")
+                elif warehouse_stats["resume_seconds"]:
+                    st.markdown(
+                        f"**{warehouse}:** resumed in {warehouse_stats['resume_seconds']:.1f}s on upload · "
+                        f"{warehouse_stats['heartbeats']} heartbeats"
+                    )
+                else:
+                    st.markdown(f"**{warehouse}:** already running · {warehouse_stats['heartbeats']} heartbeats")
+            if warming_stats["keep_alive_until"] > time.time():
+                st.caption(f"Kept warm until {time.strftime('%H:%M:%S', time.localtime(warming_stats['keep_alive_until']))}")
+            if warming_stats["resume_seconds_avoided"]:
+                st.caption(f"Cold resume avoided by Agent 3: ~{warming_stats['resume_seconds_avoided']:.1f}s")
+
+    model_stats = get_model_router().stats()
+    if model_stats:
+        st.markdown("## 🧠 Model Usage")
+        for model, stats in model_stats.items():
+            st.markdown(
+                f"**{model}:** {stats['calls']} calls · avg {stats['avg_seconds']:.1f}s · "
+                f"{stats['escalations']} escalated · ~{stats['tokens']:,} tokens · est. cost {stats['estimated_cost']:.4f}"
+            )
+        for provider, stats in provider_stats().items():
+            st.caption(f"{provider}: {stats['cache_hits']} cache hits · {stats['retries']} retries · {stats['failures']} failures")
+
+# Scheduled regression verdicts, read incrementally from Snowflake
+regression_settings = ConfigurationExecutor().get_scheduled_regression_settings()
+if "scheduled_regression" not in st.session_state:
+    st.session_state.scheduled_regression = {"results": [], "after": None}
+with st.expander("🗓️ Scheduled Regression Results", expanded=False):
+    regression_feed = st.session_state.scheduled_regression
+    if st.button("🔄 Fetch New Results"):
+        try:
+            new_results = ScheduledRegressionStore(get_agents()[2].session, regression_settings).fetch_results(
+                after=regression_feed["after"], limit=regression_settings["fetch_limit"]
+            )
+            regression_feed["results"].extend(new_results)
+            if new_results:
+                regression_feed["after"] = new_results[-1]["cursor"]
+            st.success(f"✅ {len(new_results)} new results")
+            if len(new_results) == regression_settings["fetch_limit"]:
+                st.info("More results are waiting; fetch again to continue.")
+        except Exception as e:
+            st.error(f"❌ Could not read scheduled results: {e}")
+
+    if regression_feed["results"]:
+        latest_runs = {}
+        for result in regression_feed["results"]:
+            latest_runs[result["suite_name"]] = result["run_id"]
+        for suite, run_id in latest_runs.items():
+            statuses = [result["status"] for result in regression_feed["results"] if result["run_id"] == run_id]
+            st.markdown(
+                f"**{suite}** (latest run): " +
+                " · ".join(f"{REGRESSION_BADGES[status]}: {statuses.count(status)}" for status in REGRESSION_BADGES if status in statuses)
+            )
+        st.dataframe(
+            pd.DataFrame([
+                {**result, "changes": "; ".join(result["changes"])}
+                for result in reversed(regression_feed["results"])
+            ]).drop(columns=["run_id", "digest"]),
+            use_container_width=True
+        )
+    else:
+        st.caption("Export a suite below and schedule it to replay the accepted queries on a warehouse with no LLM calls.")
+
 # Processing Section
 st.markdown("## 🚀 Process and Generate Results")
 
+job_runner = get_job_runner()
+job_settings = ConfigurationExecutor().get_job_settings()
+
+if "user_session_id" not in st.session_state:
+    st.session_state.user_session_id = uuid.uuid4().hex
+if "active_job_id" not in st.session_state:
+    # A job ID in the URL lets users leave and come back to a running job
+    st.session_state.active_job_id = st.query_params.get("job_id")
+    # Server-side runs live in Snowflake tables, not in the JobRunner
+    st.session_state.server_query_id = st.query_params.get("server_query_id")
+
 if st.button("🔥 Start Processing", type="primary", use_container_width=True):
     if not requirements_text or len(requirements_text.strip()) == 0:
         st.warning("⚠️ Please upload a requirements document first.")
     elif len(requirements_text.strip()) < 10:
         st.warning("⚠️ Requirements document seems too short. Please provide more detailed requirements.")
     else:
-        # Initialize session state for real-time updates
-        if "processing_status" not in st.session_state:
-            st.session_state.processing_status = {}
-        
-        # Create placeholders for real-time updates
-        progress_placeholder = st.empty()
-        agent1_placeholder = st.empty()
-        agent2_placeholder = st.empty()
-        agent3_placeholder = st.empty()
-        
         try:
-            with st.spinner("🔄 Initializing agents..."):
-                # Validate requirements text before processing
-                requirements_text_clean = requirements_text.strip()
-                if not requirements_text_clean:
-                    st.error("❌ Requirements text is empty after cleaning.")
-                    st.stop()
-                
-                st.success("✅ Agents initialized successfully!")
-                
-                # Initialize agent statuses
-                for i in range(1, 4):
-                    st.session_state.processing_status[f"agent_{i}"] = "PENDING"
-                
-                # Display initial progress
-                with progress_placeholder.container():
-                    display_progress_bar(0, 3)
-                
-                with agent1_placeholder.container():
-                    display_agent_progress(1, "PENDING")
-                with agent2_placeholder.container():
-                    display_agent_progress(2, "PENDING")
-                with agent3_placeholder.container():
-                    display_agent_progress(3, "PENDING")
-                
-                # Process each agent with real-time updates
-                results = {"errors": []}
-                
-                # Agent 1: Requirements Analysis
-                with agent1_placeholder.container():
-                    display_agent_progress(1, "RUNNING")
-                with progress_placeholder.container():
-                    display_progress_bar(0, 3)
-                
-                try:
-                    # Step 1: Generate high-level use cases
-                    st.info("🔍 Agent 1: Analyzing requirements...")
-                    agent1 = Agent1RequirementsAnalyzer()
-                    use_cases = agent1.analyze_requirements(requirements_text_clean)
-                    results["high_level_use_cases"] = use_cases
-                    
-                    if use_cases:
-                        with agent1_placeholder.container():
-                            display_agent_progress(1, "COMPLETE", {"high_level_use_cases": use_cases})
-                        
-                        with progress_placeholder.container():
-                            display_progress_bar(1, 3)
-                        
-                        # Agent 2: SQL Generation
-                        with agent2_placeholder.container():
-                            display_agent_progress(2, "RUNNING")
-                        
-                        st.info("⚡ Agent 2: Generating SQL queries...")
-                        
-                        # If we already have the full result, use it; otherwise generate SQL
-                        agent2 = Agent2SQLGenerator()
-                        sql_queries = agent2.generate_sql_queries(use_cases)
-                        results["generated_sql_queries"] = sql_queries 
-                        
-                        if sql_queries:
-                            with agent2_placeholder.container():
-                                display_agent_progress(2, "COMPLETE", {"generated_sql_queries": sql_queries})
-                            
-                            with progress_placeholder.container():
-                                display_progress_bar(2, 3)
-                            
-                            # Agent 3: Execution
-                            with agent3_placeholder.container():
-                                display_agent_progress(3, "RUNNING")
-                            
-                            st.info("🚀 Agent 3: Executing SQL queries...")
-                            agent3 = Agent3SQLExecutor()
-                            execution_results = agent3.execute_sql_queries(sql_queries)
-                            results["sql_execution_results"] = execution_results
-                            
-                            if execution_results:
-                                with agent3_placeholder.container():
-                                    display_agent_progress(3, "COMPLETE", {"sql_execution_results": execution_results})
-                                
-                                with progress_placeholder.container():
-                                    display_progress_bar(3, 3)
-                            else:
-                                with agent3_placeholder.container():
-                                    display_agent_progress(3, "ERROR")
-                                st.warning("⚠️ Agent 3: No execution results generated")
-                        else:
-                            with agent2_placeholder.container():
-                                display_agent_progress(2, "ERROR")
-                            st.warning("⚠️ Agent 2: No SQL queries generated")
-                    else:
-                        with agent1_placeholder.container():
-                            display_agent_progress(1, "ERROR")
-                        st.warning("⚠️ Agent 1: No use cases generated")
-                        
-                except Exception as agent_error:
-                    st.error(f"❌ Error in agent processing: {str(agent_error)}")
-                    # Try fallback approach
-                    st.info("🔄 Attempting fallback processing...")
-                    try: 
-                        # Update displays based on what we got
-                        if results.get("high_level_use_cases"):
-                            with agent1_placeholder.container():
-                                display_agent_progress(1, "COMPLETE", results)
-                        
-                        if results.get("generated_sql_queries"):
-                            with agent2_placeholder.container():
-                                display_agent_progress(2, "COMPLETE", results)
-                        
-                        if results.get("sql_execution_results"):
-                            with agent3_placeholder.container():
-                                display_agent_progress(3, "COMPLETE", results)
-                            with progress_placeholder.container():
-                                display_progress_bar(3, 3)
-                    except Exception as fallback_error:
-                        st.error(f"❌ Fallback processing also failed: {str(fallback_error)}")
-                        results = {"errors": [f"Processing Error: {str(fallback_error)}"]}
-                        
-                        # Show error status for all agents
-                        with agent1_placeholder.container():
-                            display_agent_progress(1, "ERROR")
-                        with agent2_placeholder.container():
-                            display_agent_progress(2, "ERROR")
-                        with agent3_placeholder.container():
-                            display_agent_progress(3, "ERROR")
-                
-                st.session_state.results = results
-                
-                # Show completion message
-                st.balloons()
-                st.success("🎉 Processing completed successfully!")
-                
+            if server_side:
+                job_id, server_query_id = submit_server_run(get_agents()[2].session, requirements_text.strip())
+                st.session_state.server_query_id = server_query_id
+            else:
+                job_id = job_runner.submit(
+                    requirements_text.strip(),
+                    owner=st.session_state.user_session_id,
+                    spill_mode=spill_results,
+                    sample_settings=sample_settings,
+                    profile=profile_run
+                )
+                st.session_state.server_query_id = None
+            st.session_state.active_job_id = job_id
+            st.session_state.results = None
+            st.query_params["job_id"] = job_id
+            if st.session_state.server_query_id:
+                st.query_params["server_query_id"] = st.session_state.server_query_id
+            elif "server_query_id" in st.query_params:
+                del st.query_params["server_query_id"]
         except Exception as e:
-            st.error(f"❌ An error occurred during processing: {e}")
+            st.error(f"❌ An error occurred while submitting the job: {e}")
             st.session_state.results = {"errors": [f"Orchestration Error: {str(e)}"]}
 
+poll_active_job = False
+active_job_id = st.session_state.get("active_job_id")
+server_query_id = st.session_state.get("server_query_id")
+if active_job_id:
+    if server_query_id:
+        job = ServerRunStore(get_agents()[2].session, server_settings).get_job(active_job_id)
+    else:
+        job = job_runner.get_job(active_job_id)
+    if job is None:
+        st.warning(f"⚠️ Job `{active_job_id}` was not found.")
+        st.session_state.active_job_id = None
+    elif job["status"] in ACTIVE_JOB_STATUSES:
+        poll_active_job = True
+        if server_query_id:
+            st.info(f"☁️ Server-side run `{active_job_id}` is {job['status'].lower()} in Snowflake. You can leave this page and return to it with this URL.")
+        else:
+            job_runner.touch(active_job_id)
+            st.info(f"🔄 Job `{active_job_id}` is {job['status'].lower()}. You can leave this page and return to it with `?job_id={active_job_id}`.")
+        if st.button("⛔ Cancel Run", key=f"cancel_{active_job_id}"):
+            if server_query_id:
+                cancel_server_run(get_agents()[2].session, active_job_id, server_query_id)
+            else:
+                job_runner.cancel(active_job_id, "Cancelled by user")
+            st.warning("⚠️ Cancellation requested; in-flight queries are being stopped.")
+        completed_agents = sum(1 for status in job["agent_status"].values() if status == "COMPLETE")
+        display_progress_bar(completed_agents, 3)
+        for agent_num in range(1, 4):
+            display_agent_progress(agent_num, job["agent_status"][str(agent_num)], job["results"])
+    else:
+        if st.session_state.get("results_job_id") != active_job_id:
+            st.session_state.results = job["results"]
+            st.session_state.results_job_id = active_job_id
+            if job["status"] == "COMPLETE":
+                st.balloons()
+                st.success("🎉 Processing completed successfully!")
+            elif job["status"] == "CANCELLED":
+                st.warning(f"⛔ Run cancelled: {job['cancel_reason']}")
+            elif job["status"] == "INTERRUPTED":
+                st.warning("⚠️ This job was interrupted by a server restart; showing the last saved progress.")
+
 # Display final results if available
 if "results" in st.session_state and st.session_state.results:
     st.markdown("## 📊 Final Results Summary")
@@ -610,6 +848,62 @@ if "results" in st.session_state and st.session_state.results:
         for error in st.session_state.results["errors"]:
             st.write(f"• {error}")
 
+    display_regression_summary(st.session_state.results)
+    display_cost_report(st.session_state.results)
+    display_profile(st.session_state.results)
+
+    sampled_queries = [
+        query for query, result_data in (st.session_state.results.get("sql_execution_results") or {}).items()
+        if result_data.get("sampled")
+    ]
+    if sampled_queries:
+        st.markdown("### 🧪 Promote Sampled Queries")
+        queries_to_promote = st.multiselect(
+            "Re-run selected queries against the full tables",
+            sampled_queries,
+            format_func=lambda query: query if len(query) <= 120 else f"{query[:117]}..."
+        )
+        if st.button("🚀 Promote to Full Run", disabled=not queries_to_promote):
+            # A background job like any run: cancellable, fairly scheduled and persisted
+            job_id = job_runner.submit_promotion(
+                st.session_state.results,
+                queries_to_promote,
+                owner=st.session_state.user_session_id,
+                spill_mode=spill_results
+            )
+            st.session_state.server_query_id = None
+            st.session_state.active_job_id = job_id
+            st.query_params["job_id"] = job_id
+            if "server_query_id" in st.query_params:
+                del st.query_params["server_query_id"]
+            st.rerun()
+
+    if st.session_state.results.get("sql_execution_results"):
+        st.markdown("### 📦 Export Test Suite")
+        suite_name = st.text_input(
+            "Suite name",
+            value=uploaded_file.name.rsplit(".", 1)[0] if uploaded_file is not None else "sql_test_suite"
+        )
+        if st.button("📦 Export Suite Bundle"):
+            st.session_state.exported_suite_dir = export_test_suite(
+                st.session_state.results,
+                ConfigurationExecutor().get_test_suite_settings()["suites_dir"],
+                suite_name
+            )
+        suite_dir = st.session_state.get("exported_suite_dir")
+        if suite_dir:
+            st.success(f"✅ Suite exported to `{suite_dir}`")
+            st.code(f"python streamlit_app/suite_bundle.py {suite_dir}", language="bash")
+            regression_schedule = st.text_input("Regression schedule", value=regression_settings["schedule"])
+            if st.button("🗓️ Schedule Regression in Snowflake"):
+                with st.spinner("Materializing the suite and creating its task..."):
+                    scheduled_task = schedule_suite(get_agents()[2].session, suite_dir, regression_schedule)
+                st.success(f"✅ Task `{scheduled_task}` replays this suite {regression_schedule}; no LLM calls are made")
+
+    for agent_num, result_key in ((1, "high_level_use_cases"), (2, "generated_sql_queries"), (3, "sql_execution_results")):
+        if st.session_state.results.get(result_key):
+            display_agent_progress(agent_num, "COMPLETE", st.session_state.results)
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -618,3 +912,8 @@ st.markdown("""
     <p>Powered by  AI • Built with ❤️ using Streamlit</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Poll the background job until it finishes
+if poll_active_job:
+    time.sleep(job_settings["poll_interval_seconds"])
+    st.rerun()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import threading
+
+
+class QueryCancelled(Exception):
+    """
+    Raised when a query is cancelled, times out or is rejected by a guard.
+    `status` is one of CANCELLED, TIMEOUT, REJECTED or ROW_LIMIT.
+    """
+
+    def __init__(self, reason, status="CANCELLED"):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+
+
+class CancellationToken:
+    """
+    Thread-safe flag shared between a job and the agents working on it.
+    The first reason given wins.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self.reason = None
+
+    def cancel(self, reason="Cancelled by user"):
+        with self._lock:
+            if not self._event.is_set():
+                self.reason = reason
+                self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
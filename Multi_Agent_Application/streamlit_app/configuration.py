@@ -1,9 +1,25 @@
+# Holds the secrets; never staged with the stored procedure code
+CREDENTIALS_MODULE = "credentials.py"
+
+
+def _secret(getter_name):
+    """
+    Reads a secret from credentials.py. Inside a stored procedure the module
+    is not staged and the secret is not needed, so it reads as "".
+    """
+    try:
+        import credentials
+    except ImportError:
+        return ""
+    return getattr(credentials, getter_name)()
+
+
 class ConfigurationExecutor:    
     def get_connection_params(self):
         return {
                     "user": "",
                     "account": "",
-                    "password": "",
+                    "password": _secret("get_snowflake_password"),
                     "role": "sysadmin",
                     "warehouse": "admin_wh_xsmall",
                     "database": "streamlit_apps",
@@ -11,4 +27,218 @@ class ConfigurationExecutor:
         }
     
     def get_api_key(self):
-        return ""
\ No newline at end of file
+        return _secret("get_api_key")
+
+    def get_spill_settings(self):
+        return {
+                    "enabled": False,
+                    "base_dir": "runs",
+                    "format": "arrow",
+                    "batch_rows": 50000,
+                    "preview_rows": 10
+        }
+
+    def get_job_settings(self):
+        return {
+                    "jobs_dir": "jobs",
+                    "max_workers": 4,
+                    "poll_interval_seconds": 2,
+                    "abandon_after_seconds": 900
+        }
+
+    def get_scheduler_settings(self):
+        return {
+                    "max_concurrent_queries": 4,
+                    "max_concurrent_llm_calls": 3
+        }
+
+    def get_warehouse_routing_settings(self):
+        return {
+                    "enabled": True,
+                    "tiers": [
+                        {"warehouse": "admin_wh_xsmall", "max_bytes_scanned": 1024 * 1024 * 1024, "max_joins": 2},
+                        {"warehouse": "admin_wh_medium", "max_bytes_scanned": None, "max_joins": None}
+                    ]
+        }
+
+    def get_warehouse_warming_settings(self):
+        return {
+                    "enabled": True,
+                    "warm_routing_tiers": False,
+                    "heartbeat_interval_seconds": 45,
+                    "heartbeat_sql": "SELECT SUM(SEQ4()) FROM TABLE(GENERATOR(ROWCOUNT => 1000))",
+                    "default_keep_alive_seconds": 300,
+                    "keep_alive_margin_seconds": 60,
+                    "max_keep_alive_seconds": 1800
+        }
+
+    def get_query_guard_settings(self):
+        return {
+                    "statement_timeout_seconds": 120,
+                    "max_bytes_scanned": 50 * 1024 * 1024 * 1024,
+                    "max_result_rows": 5000000,
+                    "poll_interval_seconds": 0.5
+        }
+
+    def get_cost_guard_settings(self):
+        return {
+                    "enabled": True,
+                    "inject_limit_rows": 1000,
+                    "wide_table_columns": 10,
+                    "large_table_rows": 10000000,
+                    "regenerate_attempts": 1
+        }
+
+    def get_sampling_settings(self):
+        return {
+                    "enabled": False,
+                    "mode": "rows",
+                    "rows": 1000,
+                    "percent": 1.0,
+                    "seed": None
+        }
+
+    def get_query_fusion_settings(self):
+        return {
+                    "enabled": True,
+                    "max_group_size": 20
+        }
+
+    def get_multi_statement_settings(self):
+        return {
+                    "enabled": False,
+                    "max_statements": 5,
+                    "max_bytes_per_statement": 1024 * 1024 * 1024
+        }
+
+    def get_table_stats_settings(self):
+        return {
+                    "enabled": True,
+                    "path": "runs/table_stats.json",
+                    "ttl_seconds": 24 * 60 * 60,
+                    "profile_sample_rows": 1000000,
+                    "top_k": 5,
+                    "top_values_max_distinct": 20
+        }
+
+    def get_fingerprint_settings(self):
+        return {
+                    "enabled": True,
+                    "max_columns": 50
+        }
+
+    def get_run_store_settings(self):
+        return {
+                    "path": "runs/run_store.sqlite3",
+                    "retention_days": 30,
+                    "keep_runs_per_document": 5
+        }
+
+    def get_test_suite_settings(self):
+        return {
+                    "suites_dir": "suites",
+                    "max_workers": 4
+        }
+
+    def get_server_pipeline_settings(self):
+        return {
+                    "enabled": False,
+                    "procedure_name": "RUN_TEST_PIPELINE",
+                    "stage": "PIPELINE_CODE_STAGE",
+                    "provider": "cortex",
+                    "runs_table": "PIPELINE_RUNS",
+                    "queries_table": "PIPELINE_RUN_QUERIES",
+                    "events_table": "PIPELINE_RUN_EVENTS",
+                    "packages": ["snowflake-snowpark-python", "pyyaml", "requests"]
+        }
+
+    def get_scheduled_regression_settings(self):
+        return {
+                    "procedure_name": "RUN_REGRESSION_SUITE",
+                    "task_prefix": "REGRESSION_SUITE_TASK",
+                    "schedule": "USING CRON 0 6 * * * UTC",
+                    "warehouse": None,
+                    "stage": "PIPELINE_CODE_STAGE",
+                    "tests_table": "REGRESSION_TESTS",
+                    "results_table": "REGRESSION_RESULTS",
+                    "statement_timeout_seconds": 600,
+                    "fetch_limit": 500,
+                    "packages": ["snowflake-snowpark-python"]
+        }
+
+    def get_profiling_settings(self):
+        return {
+                    "enabled": False,
+                    "base_dir": "runs",
+                    "top_n": 25,
+                    "sort_by": "cumulative",
+                    "tracemalloc_frames": 10
+        }
+
+    def get_load_test_settings(self):
+        return {
+                    "user_levels": [1, 5, 10, 25],
+                    "flows_per_user": 2,
+                    "think_time_seconds": 1.0,
+                    "llm_latency_seconds": 0.5,
+                    "warehouse_latency_seconds": 0.3,
+                    "warehouse_jitter": 0.5,
+                    "reports_dir": "runs/load_tests"
+        }
+
+    def get_synthetic_data_settings(self):
+        return {
+                    "output_dir": "synthetic_data",
+                    "seed": 42,
+                    "scale_factor": 1,
+                    "format": "parquet",
+                    "chunk_rows": 100000,
+                    "workers": 4
+        }
+
+    def get_dedupe_settings(self):
+        return {
+                    "enabled": True,
+                    "use_case_similarity": 0.8,
+                    "num_perm": 64,
+                    "bands": 16
+        }
+
+    def get_example_index_settings(self):
+        return {
+                    "enabled": True,
+                    "path": "runs/example_index.json",
+                    "reuse_threshold": 0.9,
+                    "top_k": 3,
+                    "min_similarity": 0.2
+        }
+
+    def get_model_routing_settings(self):
+        return {
+                    "enabled": True,
+                    "complex_threshold": 3,
+                    "providers": {
+                        "cortex": {"cheap": "snowflake-arctic", "strong": "mistral-large2"},
+                        "anthropic": {"cheap": "claude-3-5-haiku-20241022", "strong": "claude-opus-4-20250514"},
+                        "mock": {"cheap": "mock-small", "strong": "mock-large"}
+                    },
+                    # Cortex models in credits, Anthropic models in USD (blended input/output price)
+                    "cost_per_million_tokens": {
+                        "snowflake-arctic": 0.84,
+                        "mistral-large2": 1.95,
+                        "claude-3-5-haiku-20241022": 2.4,
+                        "claude-opus-4-20250514": 45.0
+                    }
+        }
+
+    def get_llm_settings(self):
+        return {
+                    "provider": "cortex",
+                    "cortex_function": "SNOWFLAKE.CORTEX.COMPLETE",
+                    "max_retries": 2,
+                    "retry_backoff_seconds": 1.0,
+                    "request_timeout_seconds": 120,
+                    "cache_entries": 256,
+                    "async_workers": 4,
+                    "mock_latency_seconds": 0.2
+        }
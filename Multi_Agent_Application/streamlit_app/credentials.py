@@ -0,0 +1,14 @@
+"""
+Secrets, kept out of configuration.py so that no module uploaded to a
+Snowflake stage for the stored procedures carries them. The procedures run
+on the caller's or owner's session and never need these values; keep this
+file out of every stage and out of version control once filled in.
+"""
+
+
+def get_snowflake_password():
+    return ""
+
+
+def get_api_key():
+    return ""
@@ -0,0 +1,142 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+
+from sql_dedupe import STOP_WORDS
+
+
+def _stem(word):
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _terms(text):
+    words = [_stem(word) for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOP_WORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _normalize_use_case(use_case):
+    return " ".join(re.findall(r"[a-z0-9]+", use_case.lower()))
+
+
+class ExampleIndex:
+    """
+    On-disk TF-IDF index of validated use case -> SQL pairs. Agent 2 asks it
+    for the closest past use cases: a near-exact match is reused as-is and
+    weaker matches become few-shot examples. Scoring walks an inverted index,
+    so only examples sharing a term with the query are touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.examples = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.examples = json.load(f)["examples"]
+        self._rebuild()
+
+    def _rebuild(self):
+        self._postings = {}
+        self._term_counts = []
+        for position, example in enumerate(self.examples):
+            counts = {}
+            for term in _terms(example["use_case"]):
+                counts[term] = counts.get(term, 0) + 1
+            self._term_counts.append(counts)
+            for term in counts:
+                self._postings.setdefault(term, []).append(position)
+        self._norms = [self._norm(counts) for counts in self._term_counts]
+
+    def _idf(self, term):
+        return math.log((1 + len(self.examples)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _norm(self, counts):
+        return math.sqrt(sum((count * self._idf(term)) ** 2 for term, count in counts.items())) or 1.0
+
+    def search(self, use_case, k=3, min_similarity=0.0):
+        """
+        Returns up to k {"use_case", "sql", "score"} dicts ranked by cosine similarity.
+        """
+        query_counts = {}
+        for term in _terms(use_case):
+            query_counts[term] = query_counts.get(term, 0) + 1
+
+        with self._lock:
+            query_norm = self._norm(query_counts)
+            scores = {}
+            for term, count in query_counts.items():
+                weight = count * self._idf(term) ** 2
+                for position in self._postings.get(term, ()):
+                    scores[position] = scores.get(position, 0.0) + weight * self._term_counts[position][term]
+            ranked = sorted(
+                ((score / (query_norm * self._norms[position]), position) for position, score in scores.items()),
+                reverse=True,
+            )
+            return [
+                {"use_case": self.examples[position]["use_case"], "sql": self.examples[position]["sql"], "score": round(score, 4)}
+                for score, position in ranked[:k]
+                if score >= min_similarity
+            ]
+
+    def add_examples(self, pairs):
+        """
+        Adds (use_case, sql) pairs whose SQL executed successfully and saves the
+        index. A use case already in the index keeps only its latest SQL.
+        """
+        if not pairs:
+            return
+        with self._lock:
+            positions = {_normalize_use_case(example["use_case"]): i for i, example in enumerate(self.examples)}
+            for use_case, sql_query in pairs:
+                example = {"use_case": use_case, "sql": sql_query, "validated_at": time.time()}
+                key = _normalize_use_case(use_case)
+                if key in positions:
+                    self.examples[positions[key]] = example
+                else:
+                    positions[key] = len(self.examples)
+                    self.examples.append(example)
+            self._rebuild()
+            self._save()
+        print(f"Example index now holds {len(self.examples)} validated use case/SQL pairs")
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"examples": self.examples}, f)
+        os.replace(temp_path, self.path)
+
+
+def few_shot_context(examples):
+    """
+    Formats retrieved examples as a few-shot block to append to a generation prompt.
+    """
+    if not examples:
+        return ""
+    blocks = [f"Use case: {example['use_case']}\nSQL:\n{example['sql']}" for example in examples]
+    return (
+        "\n\nHere are validated queries written for similar use cases against this schema. "
+        "Follow their table and join patterns where they apply:\n\n" + "\n\n".join(blocks)
+    )
+
+
+def validated_pairs(use_case_by_sql, execution_results):
+    """
+    Returns (use_case, sql) pairs for queries that ran on the full tables without error.
+    """
+    pairs = []
+    for sql_query, use_case in (use_case_by_sql or {}).items():
+        result_data = (execution_results or {}).get(sql_query)
+        if not result_data or result_data.get("sampled") or result_data.get("status"):
+            continue
+        if result_data.get("headers") == ["Error"]:
+            continue
+        pairs.append((use_case, sql_query))
+    return pairs
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from configuration import ConfigurationExecutor
+
+
+_owner_local = threading.local()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class FairScheduler:
+    """
+    Process-wide gate that caps concurrent work per resource (e.g. "snowflake", "llm").
+    Waiting requests are queued per owner (a user session) and slots are granted
+    round-robin across owners, so one user's burst cannot starve everybody else.
+    """
+
+    def __init__(self, limits, wait_history=200):
+        self._condition = threading.Condition()
+        self._resources = {}
+        for resource, limit in limits.items():
+            self._resources[resource] = {
+                "limit": limit,
+                "in_use": 0,
+                "owners": OrderedDict(),
+                "granted": 0,
+                "wait_times": deque(maxlen=wait_history),
+            }
+
+    def _next_ticket(self, state):
+        for queue in state["owners"].values():
+            if queue:
+                return queue[0]
+        return None
+
+    @contextmanager
+    def slot(self, resource, owner=None):
+        """
+        Blocks until a slot for `resource` is free and it is this owner's turn.
+        Resources without a configured limit pass straight through.
+        """
+        state = self._resources.get(resource)
+        if state is None:
+            yield
+            return
+
+        owner = owner or current_owner()
+        ticket = object()
+        enqueued_at = time.time()
+        with self._condition:
+            state["owners"].setdefault(owner, deque()).append(ticket)
+            while state["in_use"] >= state["limit"] or self._next_ticket(state) is not ticket:
+                self._condition.wait()
+
+            queue = state["owners"][owner]
+            queue.popleft()
+            # Rotate the owner to the back so other sessions get the next slot
+            if queue:
+                state["owners"].move_to_end(owner)
+            else:
+                del state["owners"][owner]
+            state["in_use"] += 1
+            state["granted"] += 1
+            state["wait_times"].append(time.time() - enqueued_at)
+            self._condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                state["in_use"] -= 1
+                self._condition.notify_all()
+
+    def stats(self):
+        """
+        Returns per-resource limits, usage, queue depth and recent wait times.
+        """
+        with self._condition:
+            stats = {}
+            for resource, state in self._resources.items():
+                wait_times = list(state["wait_times"])
+                stats[resource] = {
+                    "limit": state["limit"],
+                    "in_use": state["in_use"],
+                    "queue_depth": sum(len(queue) for queue in state["owners"].values()),
+                    "waiting_owners": len(state["owners"]),
+                    "granted": state["granted"],
+                    "avg_wait_seconds": sum(wait_times) / len(wait_times) if wait_times else 0.0,
+                    "max_wait_seconds": max(wait_times) if wait_times else 0.0,
+                }
+            return stats
+
+
+@contextmanager
+def bind_owner(owner):
+    """
+    Attributes all scheduled work on the current thread to `owner`.
+    """
+    previous = getattr(_owner_local, "owner", None)
+    _owner_local.owner = owner
+    try:
+        yield
+    finally:
+        _owner_local.owner = previous
+
+
+def current_owner():
+    return getattr(_owner_local, "owner", None) or "anonymous"
+
+
+def get_scheduler():
+    """
+    Returns the process-wide scheduler, created from configuration on first use.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            settings = ConfigurationExecutor().get_scheduler_settings()
+            _scheduler = FairScheduler({
+                "snowflake": settings["max_concurrent_queries"],
+                "llm": settings["max_concurrent_llm_calls"],
+            })
+        return _scheduler
@@ -0,0 +1,220 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import CancellationToken
+from fair_scheduler import bind_owner
+
+
+ACTIVE_JOB_STATUSES = ("QUEUED", "RUNNING")
+# Job IDs are uuid4 hex strings; anything else never reaches the filesystem
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class JobRunner:
+    """
+    Runs pipeline jobs on a background thread pool so the Streamlit script thread
+    is never blocked. Every status change is persisted as JSON under `jobs_dir`,
+    which lets a browser reconnect to a job by ID after a refresh. Finished
+    jobs are dropped from memory once persisted and served from their file.
+    Jobs that nobody has polled for `abandon_after_seconds` are cancelled.
+    """
+
+    def __init__(self, orchestrator, jobs_dir="jobs", max_workers=4, abandon_after_seconds=None):
+        self.orchestrator = orchestrator
+        self.jobs_dir = jobs_dir
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self.abandon_after_seconds = abandon_after_seconds
+        self._jobs = {}
+        self._cancel_tokens = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        if abandon_after_seconds:
+            threading.Thread(target=self._watch_abandoned_jobs, name="pipeline-job-watchdog", daemon=True).start()
+
+    def submit(self, requirements_text, owner=None, spill_mode=None, sample_settings=None, profile=False):
+        """
+        Queues a pipeline run and returns its job ID immediately.
+        With `profile` the run is captured by the run profiler.
+        """
+        job_id = self._create_job(owner)
+
+        def run_pipeline(on_progress, cancel_token):
+            return self.orchestrator.run(
+                requirements_text, run_id=job_id, spill_mode=spill_mode,
+                on_progress=on_progress, cancel_token=cancel_token, sample_settings=sample_settings,
+                profile=profile
+            )
+
+        self.executor.submit(self._run_job, job_id, run_pipeline)
+        print(f"Submitted pipeline job {job_id} for owner {owner}")
+        return job_id
+
+    def submit_promotion(self, results, sql_queries, owner=None, spill_mode=None):
+        """
+        Queues re-running sampled queries of a finished run on the full tables
+        and returns the job ID. The job's results are the run's results with
+        the promoted queries replaced.
+        """
+        job_id = self._create_job(owner, agent_status={"1": "COMPLETE", "2": "COMPLETE", "3": "PENDING"}, results=results)
+
+        def run_promotion(on_progress, cancel_token):
+            return self.orchestrator.promote(
+                results, sql_queries, spill_mode=spill_mode, on_progress=on_progress, cancel_token=cancel_token
+            )
+
+        self.executor.submit(self._run_job, job_id, run_promotion)
+        print(f"Submitted promotion of {len(sql_queries)} queries of run {results.get('run_id')} as job {job_id}")
+        return job_id
+
+    def _create_job(self, owner, agent_status=None, results=None):
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "owner": owner,
+            "status": "QUEUED",
+            "submitted_at": time.time(),
+            "last_polled_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "agent_status": agent_status or {"1": "PENDING", "2": "PENDING", "3": "PENDING"},
+            "events": [],
+            "results": copy.deepcopy(results),
+            "cancel_reason": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._cancel_tokens[job_id] = CancellationToken()
+            self._persist(job)
+        return job_id
+
+    def _run_job(self, job_id, work):
+        """
+        Runs `work(on_progress, cancel_token)` for the job under its owner and
+        persists its results and final status.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "RUNNING"
+            job["started_at"] = time.time()
+            self._persist(job)
+
+        def on_progress(agent_num, status, results):
+            self._record_progress(job_id, agent_num, status, results)
+
+        cancel_token = self._cancel_tokens[job_id]
+        try:
+            with bind_owner(job["owner"]):
+                results = work(on_progress, cancel_token)
+            if cancel_token.is_cancelled:
+                final_status = "CANCELLED"
+            elif results.get("errors") and not results.get("sql_execution_results"):
+                final_status = "FAILED"
+            else:
+                final_status = "COMPLETE"
+        except Exception as e:
+            print(f"Pipeline job {job_id} failed: {e}")
+            # Keep what the job had produced so far (for a promotion, the run being promoted)
+            results = dict(job["results"] or {"run_id": job_id})
+            results["errors"] = list(results.get("errors") or []) + [f"Orchestration Error: {str(e)}"]
+            final_status = "FAILED"
+
+        with self._lock:
+            job["results"] = results
+            job["status"] = final_status
+            job["cancel_reason"] = cancel_token.reason
+            job["finished_at"] = time.time()
+            self._cancel_tokens.pop(job_id, None)
+            self._persist(job)
+            self._jobs.pop(job_id, None)
+
+    def cancel(self, job_id, reason="Cancelled by user"):
+        """
+        Requests cancellation of a queued or running job. Returns False if the job is not active.
+        """
+        with self._lock:
+            token = self._cancel_tokens.get(job_id)
+        if token is None:
+            return False
+        print(f"Cancelling pipeline job {job_id}: {reason}")
+        token.cancel(reason)
+        return True
+
+    def touch(self, job_id):
+        """
+        Records that a client is still polling the job.
+        """
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id]["last_polled_at"] = time.time()
+
+    def _watch_abandoned_jobs(self):
+        while True:
+            time.sleep(min(30, self.abandon_after_seconds))
+            now = time.time()
+            with self._lock:
+                abandoned = [
+                    job_id for job_id, job in self._jobs.items()
+                    if job["status"] in ACTIVE_JOB_STATUSES and now - job["last_polled_at"] > self.abandon_after_seconds
+                ]
+            for job_id in abandoned:
+                self.cancel(job_id, f"Abandoned: no client polled for {self.abandon_after_seconds}s")
+
+    def _record_progress(self, job_id, agent_num, status, results):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["agent_status"][str(agent_num)] = status
+            job["events"].append({"time": time.time(), "agent": agent_num, "status": status})
+            job["results"] = dict(results)
+            self._persist(job)
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        # Write-then-rename so a reader never sees a half-written file
+        path = self._job_path(job["job_id"])
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, default=str)
+        os.replace(temp_path, path)
+
+    def get_job(self, job_id):
+        """
+        Returns a snapshot of the job, loading it from disk if it is not held in memory.
+        Jobs found on disk in an active state were lost with a previous process.
+        """
+        if not job_id or not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        with self._lock:
+            if job_id in self._jobs:
+                return copy.deepcopy(self._jobs[job_id])
+
+        path = self._job_path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                job = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read job file {path}: {e}")
+            return None
+        if not isinstance(job, dict) or "status" not in job:
+            print(f"Ignoring malformed job file {path}")
+            return None
+        if job["status"] in ACTIVE_JOB_STATUSES:
+            job["status"] = "INTERRUPTED"
+        return job
+
+    def list_jobs(self, owner=None):
+        """
+        Returns the queued and running jobs, newest first, optionally filtered by owner.
+        """
+        with self._lock:
+            jobs = [copy.deepcopy(job) for job in self._jobs.values() if owner is None or job["owner"] == owner]
+        return sorted(jobs, key=lambda job: job["submitted_at"], reverse=True)
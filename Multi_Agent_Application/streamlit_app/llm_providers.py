@@ -0,0 +1,226 @@
+"""
+One interface for every LLM backend the agents use: Snowflake Cortex
+COMPLETE, the Anthropic Messages API and a deterministic local mock for
+offline runs and benchmarks. Providers share retries with backoff, an
+in-process response cache, the fair scheduler's "llm" slots, per-model
+stats through the model router, and a thread pool for async and batch calls.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from configuration import ConfigurationExecutor
+from fair_scheduler import bind_owner, current_owner, get_scheduler
+from model_router import get_model_router
+
+
+_async_executor = None
+_shared_lock = threading.Lock()
+_response_cache = OrderedDict()
+_provider_stats = {}
+
+
+def _get_async_executor(max_workers):
+    global _async_executor
+    with _shared_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        return _async_executor
+
+
+class LLMProvider:
+    """
+    Base provider. Subclasses implement `_send(model, prompt)` and set `name`
+    and `default_model`; everything else is shared.
+    """
+
+    name = None
+    default_model = None
+
+    def __init__(self, llm_settings, model_router=None):
+        self.settings = llm_settings
+        self.model_router = model_router or get_model_router()
+
+    def _send(self, model, prompt):
+        raise NotImplementedError
+
+    def complete(self, prompt, model=None):
+        """
+        Returns the model's response text. Identical (provider, model, prompt)
+        requests are served from the cache; failures are retried with
+        exponential backoff and re-raised after the last attempt.
+        """
+        model = model or self.default_model
+        cache_key = hashlib.sha256(f"{self.name}\0{model}\0{prompt}".encode("utf-8")).hexdigest()
+        with _shared_lock:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                _response_cache.move_to_end(cache_key)
+        if cached is not None:
+            self._count("cache_hits")
+            return cached
+
+        attempts = self.settings["max_retries"] + 1
+        for attempt in range(attempts):
+            try:
+                with get_scheduler().slot("llm"):
+                    response = self.model_router.call(model, prompt, lambda: self._send(model, prompt))
+                break
+            except Exception as e:
+                if attempt == attempts - 1:
+                    self._count("failures")
+                    raise
+                delay = self.settings["retry_backoff_seconds"] * 2 ** attempt
+                print(f"{self.name} call to {model} failed ({e}); retrying in {delay:.1f}s")
+                self._count("retries")
+                time.sleep(delay)
+
+        self._count("calls")
+        with _shared_lock:
+            _response_cache[cache_key] = response
+            while len(_response_cache) > self.settings["cache_entries"]:
+                _response_cache.popitem(last=False)
+        return response
+
+    def complete_async(self, prompt, model=None):
+        """
+        Submits `complete` to the shared LLM thread pool and returns a Future.
+        The caller's scheduler owner is carried over to the worker thread.
+        """
+        owner = current_owner()
+
+        def run():
+            with bind_owner(owner):
+                return self.complete(prompt, model)
+
+        return _get_async_executor(self.settings["async_workers"]).submit(run)
+
+    def complete_batch(self, prompts, model=None):
+        """
+        Runs the prompts concurrently and returns their responses in order.
+        """
+        futures = [self.complete_async(prompt, model) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    def _count(self, counter):
+        with _shared_lock:
+            stats = _provider_stats.setdefault(self.name, {"calls": 0, "cache_hits": 0, "retries": 0, "failures": 0})
+            stats[counter] += 1
+
+
+def cortex_complete(session, model, prompt, function="SNOWFLAKE.CORTEX.COMPLETE"):
+    """
+    Runs Cortex COMPLETE with the model and prompt as bind parameters. The
+    statement text never changes, so Snowflake can reuse its compilation, and
+    prompts are sent as-is with no quoting or escaping.
+    """
+    result = session.sql(f"SELECT {function}(?, ?) AS response", params=[model, prompt]).collect()
+    return result[0]["RESPONSE"]
+
+
+class CortexProvider(LLMProvider):
+    """
+    Snowflake Cortex COMPLETE through a Snowpark session.
+    """
+
+    name = "cortex"
+    default_model = "mistral-large2"
+
+    def __init__(self, llm_settings, session, model_router=None):
+        super().__init__(llm_settings, model_router)
+        self.session = session
+
+    def _send(self, model, prompt):
+        return cortex_complete(self.session, model, prompt, self.settings["cortex_function"])
+
+
+class AnthropicProvider(LLMProvider):
+    """
+    Anthropic Messages API over HTTPS.
+    """
+
+    name = "anthropic"
+    default_model = "claude-opus-4-20250514"
+    url = "https://api.anthropic.com/v1/messages"
+
+    def __init__(self, llm_settings, api_key, model_router=None):
+        super().__init__(llm_settings, model_router)
+        self.api_key = api_key
+
+    def _send(self, model, prompt):
+        response = requests.post(
+            self.url,
+            headers={
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json"
+            },
+            json={
+                "model": model,
+                "max_tokens": 1024,
+                "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
+            },
+            timeout=self.settings["request_timeout_seconds"],
+        )
+        response.raise_for_status()
+        return response.json()["content"][0]["text"]
+
+
+class MockProvider(LLMProvider):
+    """
+    Deterministic offline stand-in. Use case prompts (asking for a JSON array)
+    get a fixed list of use cases; SQL prompts get a valid aggregate query
+    over a semantic-model table named in the use case. The same prompt always
+    yields the same response, after `mock_latency_seconds`.
+    """
+
+    name = "mock"
+    default_model = "mock-large"
+
+    def _send(self, model, prompt):
+        from semantic_model import load_semantic_model
+
+        time.sleep(self.settings["mock_latency_seconds"])
+        table_names = load_semantic_model().table_names()
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+
+        if "JSON array" in prompt:
+            return json.dumps([
+                f"Verify that every record in {table_names[(seed + i) % len(table_names)]} has a populated primary key."
+                for i in range(5)
+            ])
+
+        use_case = prompt.split("Schema:", 1)[0]
+        mentioned = [name for name in table_names if re.search(rf"\b{name}\b", use_case, re.IGNORECASE)]
+        table_name = mentioned[0] if mentioned else table_names[seed % len(table_names)]
+        return f"SELECT COUNT(*) AS row_count FROM {table_name}"
+
+
+def create_llm_provider(name=None, session=None):
+    """
+    Builds the configured (or named) provider. Cortex needs a Snowpark session.
+    """
+    config = ConfigurationExecutor()
+    llm_settings = config.get_llm_settings()
+    name = name or llm_settings["provider"]
+    if name == "cortex":
+        return CortexProvider(llm_settings, session)
+    if name == "anthropic":
+        return AnthropicProvider(llm_settings, config.get_api_key())
+    if name == "mock":
+        return MockProvider(llm_settings)
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def provider_stats():
+    """
+    Returns calls, cache hits, retries and failures per provider.
+    """
+    with _shared_lock:
+        return {name: dict(stats) for name, stats in _provider_stats.items()}
@@ -0,0 +1,403 @@
+"""
+Concurrent-user load test for the app server.
+
+Each simulated user follows the app.py flow: upload a requirements document,
+press Start Processing (JobRunner.submit), poll the job every
+`poll_interval_seconds` like the page reruns do, then load the results. The
+real JobRunner, PipelineOrchestrator, agents, fair scheduler and run store are
+used; only the LLM (the `mock` provider) and the warehouse (FakeWarehouseSession)
+are replaced, each with a configurable latency. Concurrency is ramped through
+`--users` levels and every level reports throughput, latency percentiles,
+process memory and session counts.
+
+Run from the Multi_Agent_Application directory:
+    python streamlit_app/load_test.py --users 1 5 10 25 --flows-per-user 2
+
+All run artefacts (jobs, run store, example index) go to a scratch directory
+under `reports_dir`, so the real app state is never touched.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from configuration import ConfigurationExecutor
+from fair_scheduler import get_scheduler
+from job_runner import ACTIVE_JOB_STATUSES
+
+
+DEFAULT_REQUIREMENTS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data_setup", "sample_requirements_p_and_c_insurance.txt"
+)
+
+
+class _Field:
+    def __init__(self, name):
+        self.name = name
+
+
+class _Schema:
+    def __init__(self, names):
+        self.fields = [_Field(name) for name in names]
+
+
+class FakeAsyncJob:
+    """
+    Stand-in for a Snowpark AsyncJob that finishes after a fixed delay.
+    """
+
+    def __init__(self, rows, latency_seconds):
+        self.query_id = f"01{uuid.uuid4().hex[:16]}"
+        self._rows = rows
+        self._done_at = time.time() + latency_seconds
+        self._cancelled = False
+
+    def is_done(self):
+        return self._cancelled or time.time() >= self._done_at
+
+    def cancel(self):
+        self._cancelled = True
+
+    def result(self, result_type=None):
+        time.sleep(max(0.0, self._done_at - time.time()))
+        return list(self._rows)
+
+
+class FakeDataFrame:
+    def __init__(self, warehouse, sql_query):
+        self.warehouse = warehouse
+        self.sql_query = sql_query
+        select_list = sql_query.split("FROM", 1)[0]
+        aliases = [alias.upper() for alias in _aliases(select_list)]
+        self.schema = _Schema(aliases or ["RESULT"])
+
+    def limit(self, n):
+        return self
+
+    def collect_nowait(self, statement_params=None):
+        return FakeAsyncJob(self.warehouse.rows_for(self), self.warehouse.query_latency())
+
+    def collect(self):
+        time.sleep(self.warehouse.latency_seconds / 10)
+        text = self.sql_query.lstrip().upper()
+        if text.startswith("EXPLAIN"):
+            plan = {"GlobalStats": {"bytesAssigned": 1024 * 1024, "partitionsAssigned": 1, "partitionsTotal": 1}, "Operations": []}
+            return [(json.dumps(plan),)]
+        if "HASH_AGG(" in text:
+            # Fingerprint query: COUNT(*), HASH_AGG(*) then a COUNT/HASH_AGG pair per column
+            items = text.split(" FROM ", 1)[0].count("(")
+            return [tuple(1000 if position % 2 == 0 else 42 for position in range(items))]
+        return self.warehouse.rows_for(self)
+
+
+def _aliases(select_list):
+    aliases = []
+    for part in select_list.split(","):
+        words = part.strip().split()
+        if len(words) >= 2 and words[-2].upper() == "AS":
+            aliases.append(words[-1].strip('"'))
+    return aliases
+
+
+class FakeWarehouseSession:
+    """
+    Minimal Snowpark Session stand-in for Agent 3: every statement succeeds after
+    `latency_seconds` (plus up to `jitter` of that again) and returns one row of
+    small integers per selected column.
+    """
+
+    def __init__(self, latency_seconds, jitter=0.0, seed=0):
+        self.latency_seconds = latency_seconds
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.statements = 0
+
+    def sql(self, sql_query, params=None):
+        with self._lock:
+            self.statements += 1
+        return FakeDataFrame(self, sql_query)
+
+    def query_latency(self):
+        with self._lock:
+            return self.latency_seconds * (1 + self.jitter * self._random.random())
+
+    def rows_for(self, df):
+        return [tuple(1000 for _ in df.schema.fields)]
+
+
+def _rss_bytes():
+    """
+    Current resident set size of this process (peak RSS where /proc is unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile; 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values):
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+class SimulatedUser:
+    """
+    One browser session walking through upload -> Start Processing -> results.
+    `state` plays the role of st.session_state.
+    """
+
+    def __init__(self, harness, user_number):
+        self.harness = harness
+        self.user_session_id = uuid.uuid4().hex
+        self.user_number = user_number
+        self.state = {}
+
+    def run_flow(self, flow_number):
+        harness = self.harness
+        flow = {"user": self.user_number, "flow": flow_number, "status": None}
+        started = time.time()
+
+        # Upload: every user sends a slightly different document so LLM responses are not all cache hits
+        requirements_text = f"{harness.requirements_text}\n\nReviewer: analyst {self.user_number}, submission {flow_number}"
+        job_id = harness.job_runner.submit(requirements_text.strip(), owner=self.user_session_id, spill_mode=False)
+        self.state["active_job_id"] = job_id
+        flow["submit_seconds"] = time.time() - started
+
+        # Poll like the page reruns while the job is active
+        while True:
+            job = harness.job_runner.get_job(job_id)
+            if job["status"] not in ACTIVE_JOB_STATUSES:
+                break
+            harness.job_runner.touch(job_id)
+            time.sleep(harness.poll_interval_seconds)
+
+        # Results: load into session state and flatten result rows as the result tables do
+        render_start = time.time()
+        self.state["results"] = job["results"]
+        rendered_rows = 0
+        for result in ((job["results"] or {}).get("sql_execution_results") or {}).values():
+            rendered_rows += len([dict(zip(result["headers"], row)) for row in result["data"]])
+        flow["render_seconds"] = time.time() - render_start
+        flow["rendered_rows"] = rendered_rows
+        flow["queue_seconds"] = (job["started_at"] or job["finished_at"]) - job["submitted_at"]
+        flow["run_seconds"] = job["finished_at"] - (job["started_at"] or job["submitted_at"])
+        flow["end_to_end_seconds"] = time.time() - started
+        flow["status"] = job["status"]
+        return flow
+
+
+class LoadTestHarness:
+    """
+    Builds one app-server stack (agents, orchestrator, JobRunner) shared by all
+    simulated users, as the Streamlit server does with st.cache_resource.
+    """
+
+    def __init__(self, requirements_text, llm_latency_seconds, warehouse_latency_seconds, warehouse_jitter,
+                 poll_interval_seconds, job_workers):
+        from agent1_requirements_analyzer import Agent1RequirementsAnalyzer
+        from agent2_sql_generator import Agent2SQLGenerator
+        from agent3_sql_executor import Agent3SQLExecutor
+        from job_runner import JobRunner
+        from pipeline_orchestrator import PipelineOrchestrator
+        from run_store import RunStore
+
+        self.requirements_text = requirements_text
+        self.poll_interval_seconds = poll_interval_seconds
+        self.warehouse = FakeWarehouseSession(warehouse_latency_seconds, warehouse_jitter)
+
+        agent1 = Agent1RequirementsAnalyzer(provider_name="mock")
+        agent2 = Agent2SQLGenerator(provider_name="mock")
+        for agent in (agent1, agent2):
+            agent.llm.settings["mock_latency_seconds"] = llm_latency_seconds
+        agent3 = Agent3SQLExecutor(spill_mode=False, session=self.warehouse)
+        agent3.routing_enabled = False
+
+        run_store_path = ConfigurationExecutor().get_run_store_settings()["path"]
+        self.job_runner = JobRunner(
+            PipelineOrchestrator(agent1, agent2, agent3, run_store=RunStore(run_store_path)),
+            jobs_dir="jobs",
+            max_workers=job_workers,
+        )
+        self._active_sessions = 0
+        self._lock = threading.Lock()
+
+    def _sample(self, samples, stop_event):
+        while not stop_event.is_set():
+            with self._lock:
+                active_sessions = self._active_sessions
+            samples.append({
+                "rss_bytes": _rss_bytes(),
+                "active_sessions": active_sessions,
+                "threads": threading.active_count(),
+                "jobs_in_memory": len(self.job_runner.list_jobs()),
+            })
+            stop_event.wait(0.25)
+
+    def _user_thread(self, user, flows_per_user, think_time_seconds, flows, errors):
+        with self._lock:
+            self._active_sessions += 1
+        try:
+            for flow_number in range(flows_per_user):
+                try:
+                    flows.append(user.run_flow(flow_number))
+                except Exception as e:
+                    errors.append(f"user {user.user_number} flow {flow_number}: {e}")
+                time.sleep(think_time_seconds)
+        finally:
+            with self._lock:
+                self._active_sessions -= 1
+
+    def run_level(self, users, flows_per_user, think_time_seconds):
+        """
+        Runs `users` concurrent sessions to completion and returns the level report.
+        """
+        flows, errors, samples = [], [], []
+        stop_event = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(samples, stop_event), daemon=True)
+        rss_before = _rss_bytes()
+        statements_before = self.warehouse.statements
+        started = time.time()
+        sampler.start()
+
+        threads = [
+            threading.Thread(
+                target=self._user_thread,
+                args=(SimulatedUser(self, number), flows_per_user, think_time_seconds, flows, errors),
+                name=f"load-user-{number}",
+            )
+            for number in range(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.time() - started
+        stop_event.set()
+        sampler.join()
+        completed = [flow for flow in flows if flow["status"] == "COMPLETE"]
+        scheduler_stats = get_scheduler().stats()
+        return {
+            "users": users,
+            "flows": len(flows),
+            "completed": len(completed),
+            "failed": len(flows) - len(completed) + len(errors),
+            "errors": errors[:20],
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_flows_per_minute": round(len(completed) / elapsed * 60, 2) if elapsed else 0.0,
+            "end_to_end_seconds": summarize([flow["end_to_end_seconds"] for flow in completed]),
+            "queue_seconds": summarize([flow["queue_seconds"] for flow in completed]),
+            "run_seconds": summarize([flow["run_seconds"] for flow in completed]),
+            "submit_seconds": summarize([flow["submit_seconds"] for flow in flows]),
+            "rss_mb_before": round(rss_before / 1024 ** 2, 1),
+            "rss_mb_peak": round(max([s["rss_bytes"] for s in samples] + [rss_before]) / 1024 ** 2, 1),
+            "rss_mb_after": round(_rss_bytes() / 1024 ** 2, 1),
+            "peak_active_sessions": max([s["active_sessions"] for s in samples] + [0]),
+            "peak_threads": max([s["threads"] for s in samples] + [threading.active_count()]),
+            "jobs_in_memory": len(self.job_runner.list_jobs()),
+            "warehouse_statements": self.warehouse.statements - statements_before,
+            "scheduler_max_wait_seconds": {
+                resource: round(stats["max_wait_seconds"], 3) for resource, stats in scheduler_stats.items()
+            },
+        }
+
+    def shutdown(self):
+        self.job_runner.executor.shutdown(wait=True)
+
+
+def print_report(levels):
+    print(
+        f"\n{'users':>5} {'done':>5} {'fail':>5} {'flows/min':>10} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+        f"{'queue p95':>9} {'RSS peak MB':>11} {'sessions':>8} {'threads':>7}"
+    )
+    for level in levels:
+        print(
+            f"{level['users']:>5} {level['completed']:>5} {level['failed']:>5} "
+            f"{level['throughput_flows_per_minute']:>10.1f} {level['end_to_end_seconds']['p50']:>7.2f} "
+            f"{level['end_to_end_seconds']['p95']:>7.2f} {level['end_to_end_seconds']['p99']:>7.2f} "
+            f"{level['queue_seconds']['p95']:>9.2f} {level['rss_mb_peak']:>11.1f} "
+            f"{level['peak_active_sessions']:>8} {level['peak_threads']:>7}"
+        )
+
+
+def main(argv=None):
+    config = ConfigurationExecutor()
+    settings = config.get_load_test_settings()
+    job_settings = config.get_job_settings()
+    parser = argparse.ArgumentParser(description="Ramp concurrent simulated users through the app flow.")
+    parser.add_argument("--users", type=int, nargs="+", default=settings["user_levels"], help="Concurrency levels to ramp through")
+    parser.add_argument("--flows-per-user", type=int, default=settings["flows_per_user"])
+    parser.add_argument("--think-time", type=float, default=settings["think_time_seconds"], help="Seconds between a user's flows")
+    parser.add_argument("--llm-latency", type=float, default=settings["llm_latency_seconds"], help="Seconds per fake LLM call")
+    parser.add_argument("--warehouse-latency", type=float, default=settings["warehouse_latency_seconds"], help="Seconds per fake query")
+    parser.add_argument("--warehouse-jitter", type=float, default=settings["warehouse_jitter"])
+    parser.add_argument("--poll-interval", type=float, default=job_settings["poll_interval_seconds"])
+    parser.add_argument("--job-workers", type=int, default=job_settings["max_workers"], help="JobRunner pool size")
+    parser.add_argument("--requirements", default=DEFAULT_REQUIREMENTS_PATH, help="Requirements document to upload")
+    args = parser.parse_args(argv)
+
+    with open(args.requirements, encoding="utf-8") as f:
+        requirements_text = f.read()
+
+    test_id = time.strftime("%Y%m%d-%H%M%S")
+    reports_dir = os.path.abspath(settings["reports_dir"])
+    scratch_dir = os.path.join(reports_dir, test_id)
+    os.makedirs(scratch_dir, exist_ok=True)
+    # Relative run/job paths from the configuration now resolve inside the scratch directory
+    os.chdir(scratch_dir)
+
+    harness = LoadTestHarness(
+        requirements_text, args.llm_latency, args.warehouse_latency, args.warehouse_jitter,
+        args.poll_interval, args.job_workers
+    )
+    levels = []
+    try:
+        for users in args.users:
+            print(f"\n=== {users} concurrent users x {args.flows_per_user} flows ===")
+            levels.append(harness.run_level(users, args.flows_per_user, args.think_time))
+    finally:
+        harness.shutdown()
+    print_report(levels)
+
+    report = {
+        "test_id": test_id,
+        "settings": vars(args),
+        "document_sha256": hashlib.sha256(requirements_text.encode("utf-8")).hexdigest(),
+        "levels": levels,
+    }
+    report_path = os.path.join(reports_dir, f"{test_id}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {report_path}")
+    return 0 if all(level["failed"] == 0 for level in levels) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
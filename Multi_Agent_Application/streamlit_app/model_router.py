@@ -0,0 +1,153 @@
+import re
+import threading
+import time
+
+from configuration import ConfigurationExecutor
+from semantic_model import load_semantic_model
+
+
+AGGREGATION_TERMS = re.compile(
+    r"\b(total|totals|sum|average|avg|mean|count|number of|maximum|minimum|max|min|aggregate|ratio|"
+    r"percentage|percent|rate|distribution|per|grouped|rank|top)\b",
+    re.IGNORECASE,
+)
+TEMPORAL_TERMS = re.compile(
+    r"\b(date|dates|day|days|month|monthly|year|yearly|annual|quarter|quarterly|period|trend|over time|"
+    r"before|after|between|expire|expired|expiration|effective|overdue|renewal|history|historical|"
+    r"latest|recent|prior|previous|duration|aging)\b",
+    re.IGNORECASE,
+)
+
+_model_router = None
+_model_router_lock = threading.Lock()
+
+
+def _table_patterns(semantic_model):
+    """
+    Matches each table by its name split into words, singular or plural
+    (ClaimPayments -> "claim payment(s)").
+    """
+    patterns = {}
+    for table_name in semantic_model.table_names():
+        words = [word.lower() for word in re.findall(r"[A-Z][a-z]*", table_name)] or [table_name.lower()]
+        last = words[-1]
+        if last.endswith("ies"):
+            last = rf"{last[:-3]}(?:y|ies)"
+        else:
+            last = rf"{re.escape(last.rstrip('s'))}s?"
+        phrase = r"\s*".join([re.escape(word) for word in words[:-1]] + [last])
+        patterns[table_name] = re.compile(rf"\b{phrase}\b", re.IGNORECASE)
+    return patterns
+
+
+class ModelRouter:
+    """
+    Sends each LLM request to a cheap or a strong model of its provider based
+    on a keyword classification of the text (tables touched, aggregations,
+    temporal logic), escalates to the strong model when the cheap one's
+    output fails validation, and keeps per-model latency and cost stats.
+    """
+
+    def __init__(self, routing_settings, semantic_model=None):
+        self.settings = routing_settings
+        self.table_patterns = _table_patterns(semantic_model or load_semantic_model())
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def classify(self, text):
+        """
+        Returns {"level": "simple" | "complex", "score", "signals"} for a use case or document.
+        """
+        tables = sorted(name for name, pattern in self.table_patterns.items() if pattern.search(text))
+        aggregations = len(AGGREGATION_TERMS.findall(text))
+        temporal = len(TEMPORAL_TERMS.findall(text))
+        score = max(len(tables) - 1, 0) + min(aggregations, 2) + min(temporal, 2)
+        return {
+            "level": "complex" if score >= self.settings["complex_threshold"] else "simple",
+            "score": score,
+            "signals": {"tables": tables, "aggregations": aggregations, "temporal": temporal},
+        }
+
+    def route(self, provider, text):
+        """
+        Returns {"model", "level", "score", "signals"}. With routing disabled
+        every request goes to the provider's strong model.
+        """
+        models = self.settings["providers"][provider]
+        if not self.settings["enabled"]:
+            return {"model": models["strong"], "level": "complex", "score": None, "signals": {}}
+        classification = self.classify(text)
+        model = models["cheap"] if classification["level"] == "simple" else models["strong"]
+        print(f"Model router: {classification['level']} (score {classification['score']}) -> {model}")
+        return dict(classification, model=model)
+
+    def escalate(self, provider, model):
+        """
+        Returns the strong model to retry with, or None if `model` already is the strong one.
+        """
+        strong_model = self.settings["providers"][provider]["strong"]
+        if model == strong_model:
+            return None
+        with self._lock:
+            self._model_stats(model)["escalations"] += 1
+        print(f"Model router: escalating from {model} to {strong_model}")
+        return strong_model
+
+    def call(self, model, prompt, send):
+        """
+        Runs `send()` (the actual LLM request) and records its latency, rough
+        token count and estimated cost against `model`. Returns its response.
+        """
+        start_time = time.time()
+        response = None
+        try:
+            response = send()
+            return response
+        finally:
+            elapsed = time.time() - start_time
+            # ~4 characters per token is close enough for relative cost tracking
+            tokens = (len(prompt) + len(response or "")) / 4
+            with self._lock:
+                stats = self._model_stats(model)
+                stats["calls"] += 1
+                stats["failures"] += 0 if response else 1
+                stats["total_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+                stats["tokens"] += tokens
+                stats["estimated_cost"] += tokens / 1e6 * self.settings["cost_per_million_tokens"].get(model, 0.0)
+
+    def _model_stats(self, model):
+        return self._stats.setdefault(model, {
+            "calls": 0, "failures": 0, "escalations": 0, "total_seconds": 0.0,
+            "max_seconds": 0.0, "tokens": 0.0, "estimated_cost": 0.0,
+        })
+
+    def stats(self):
+        """
+        Returns per-model call counts, failures, escalations away from the
+        model, average/max latency, estimated tokens and estimated cost.
+        """
+        with self._lock:
+            return {
+                model: {
+                    "calls": stats["calls"],
+                    "failures": stats["failures"],
+                    "escalations": stats["escalations"],
+                    "avg_seconds": stats["total_seconds"] / stats["calls"] if stats["calls"] else 0.0,
+                    "max_seconds": stats["max_seconds"],
+                    "tokens": int(stats["tokens"]),
+                    "estimated_cost": stats["estimated_cost"],
+                }
+                for model, stats in self._stats.items()
+            }
+
+
+def get_model_router():
+    """
+    Returns the process-wide model router, created from configuration on first use.
+    """
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            _model_router = ModelRouter(ConfigurationExecutor().get_model_routing_settings())
+        return _model_router
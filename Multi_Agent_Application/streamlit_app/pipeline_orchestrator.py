@@ -0,0 +1,208 @@
+import argparse
+import copy
+import json
+import sys
+import time
+import uuid
+
+from configuration import ConfigurationExecutor
+from run_profiler import RunProfiler
+
+
+class PipelineOrchestrator:
+    """
+    Runs Agent 1 -> Agent 2 -> Agent 3 for a single requirements document.
+    Progress is reported through a callback instead of the Streamlit UI so the
+    pipeline can run on a background worker. With a `run_store` every finished
+    run is recorded there.
+    """
+
+    def __init__(self, agent1, agent2, agent3, run_store=None):
+        self.agent1 = agent1
+        self.agent2 = agent2
+        self.agent3 = agent3
+        self.run_store = run_store
+
+    def _check_cancelled(self, cancel_token, agent_num, results, notify):
+        if cancel_token is not None and cancel_token.is_cancelled:
+            results["errors"].append(f"Run cancelled before Agent {agent_num}: {cancel_token.reason}")
+            notify(agent_num, "ERROR", results)
+            return True
+        return False
+
+    def run(self, requirements_text, run_id, spill_mode=None, on_progress=None, cancel_token=None, sample_settings=None,
+            profile=False):
+        """
+        Runs the full pipeline and returns the results dictionary:
+            {
+                "run_id": str,
+                "high_level_use_cases": list | None,
+                "generated_sql_queries": list | None,
+                "sql_execution_results": dict | None,
+                "errors": list,
+                "timings": {"agent1_seconds", "agent2_seconds", "agent3_seconds", "total_seconds"},
+                "profile": dict (only with `profile`)
+            }
+        `on_progress(agent_num, status, results)` is called whenever an agent changes status.
+        `cancel_token` is checked between agents and passed to Agent 3, which
+        cancels its in-flight query. `sample_settings` runs Agent 3 in sampled mode.
+        With `profile` the agents run under a RunProfiler and its summary
+        (hot functions, allocations, saved file paths) is added to the results.
+        """
+        notify = on_progress or (lambda agent_num, status, results: None)
+        results = {"run_id": run_id, "errors": [], "timings": {}}
+        run_start = time.time()
+        if profile:
+            profiler = RunProfiler(ConfigurationExecutor().get_profiling_settings())
+            with profiler.capture(run_id) as profile_summary:
+                self._run_agents(requirements_text, run_id, results, notify, spill_mode, cancel_token, sample_settings)
+            results["profile"] = profile_summary
+        else:
+            self._run_agents(requirements_text, run_id, results, notify, spill_mode, cancel_token, sample_settings)
+        results["timings"]["total_seconds"] = round(time.time() - run_start, 3)
+
+        if self.run_store is not None:
+            if cancel_token is not None and cancel_token.is_cancelled:
+                status = "CANCELLED"
+            elif results["errors"] and not results.get("sql_execution_results"):
+                status = "FAILED"
+            else:
+                status = "COMPLETE"
+            try:
+                self.run_store.record_run(run_id, requirements_text, results, status)
+            except Exception as e:
+                print(f"Could not record run {run_id} in the run store: {e}")
+        return results
+
+    def promote(self, results, sql_queries, spill_mode=None, on_progress=None, cancel_token=None):
+        """
+        Re-runs `sql_queries` of a finished (sampled) run on the full tables and
+        returns a copy of `results` with their entries replaced. The run store
+        keeps the promoted results under the original run ID.
+        """
+        notify = on_progress or (lambda agent_num, status, results: None)
+        promoted = copy.deepcopy(results)
+        notify(3, "RUNNING", promoted)
+        execution_results = self.agent3.execute_sql_queries(
+            sql_queries, run_id=results.get("run_id"), spill_mode=spill_mode, cancel_token=cancel_token
+        ) or {}
+        promoted["sql_execution_results"].update(execution_results)
+        notify(3, "COMPLETE", promoted)
+
+        if self.run_store is not None and execution_results:
+            try:
+                self.run_store.update_query_results(results.get("run_id"), execution_results)
+            except Exception as e:
+                print(f"Could not record promoted queries of run {results.get('run_id')}: {e}")
+        return promoted
+
+    def _run_agents(self, requirements_text, run_id, results, notify, spill_mode, cancel_token, sample_settings):
+        current_agent = 1
+        timings = results["timings"]
+        try:
+            # Agent 1: Requirements Analysis
+            notify(1, "RUNNING", results)
+            agent_start = time.time()
+            use_cases = self.agent1.analyze_requirements(requirements_text)
+            timings["agent1_seconds"] = round(time.time() - agent_start, 3)
+            results["high_level_use_cases"] = use_cases
+            if not use_cases:
+                results["errors"].append("Agent 1: No use cases generated")
+                notify(1, "ERROR", results)
+                return results
+            notify(1, "COMPLETE", results)
+
+            # Agent 2: SQL Generation
+            current_agent = 2
+            if self._check_cancelled(cancel_token, 2, results, notify):
+                return results
+            notify(2, "RUNNING", results)
+            agent_start = time.time()
+            self.agent2.refresh_table_stats(self.agent3.session)
+            use_case_by_sql = {}
+            sql_queries = self.agent2.generate_sql_queries(use_cases, use_case_by_sql=use_case_by_sql)
+            timings["agent2_seconds"] = round(time.time() - agent_start, 3)
+            results["generated_sql_queries"] = sql_queries
+            if not sql_queries:
+                results["errors"].append("Agent 2: No SQL queries generated")
+                notify(2, "ERROR", results)
+                return results
+            notify(2, "COMPLETE", results)
+
+            # Agent 3: Execution
+            current_agent = 3
+            if self._check_cancelled(cancel_token, 3, results, notify):
+                return results
+            notify(3, "RUNNING", results)
+            agent_start = time.time()
+            execution_results = self.agent3.execute_sql_queries(
+                sql_queries, run_id=run_id, spill_mode=spill_mode,
+                cancel_token=cancel_token, sample_settings=sample_settings
+            )
+            timings["agent3_seconds"] = round(time.time() - agent_start, 3)
+            results["sql_execution_results"] = execution_results
+            if not execution_results:
+                results["errors"].append("Agent 3: No execution results generated")
+                notify(3, "ERROR", results)
+                return results
+            self.agent2.record_validated_examples(use_case_by_sql, execution_results)
+            notify(3, "COMPLETE", results)
+
+        except Exception as e:
+            print(f"Error in agent processing (Agent {current_agent}): {e}")
+            results["errors"].append(f"Processing Error: {str(e)}")
+            notify(current_agent, "ERROR", results)
+
+        return results
+
+
+def main(argv=None):
+    """
+    Headless pipeline run for one requirements document; prints a summary and
+    optionally writes the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Run the three-agent pipeline without the Streamlit UI.")
+    parser.add_argument("requirements_file", help="Requirements document (text)")
+    parser.add_argument("--provider", help="LLM provider (cortex, anthropic or mock); defaults to get_llm_settings()")
+    parser.add_argument("--spill", action="store_true", help="Spill full results to disk")
+    parser.add_argument(
+        "--profile", action="store_true", default=ConfigurationExecutor().get_profiling_settings()["enabled"],
+        help="Capture a CPU profile and allocation snapshot of the run"
+    )
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    args = parser.parse_args(argv)
+
+    from agent1_requirements_analyzer import Agent1RequirementsAnalyzer
+    from agent2_sql_generator import Agent2SQLGenerator
+    from agent3_sql_executor import Agent3SQLExecutor
+    from run_store import RunStore
+
+    with open(args.requirements_file, encoding="utf-8") as f:
+        requirements_text = f.read().strip()
+
+    agent1 = Agent1RequirementsAnalyzer(provider_name=args.provider)
+    agent2 = Agent2SQLGenerator(session=agent1.session, provider_name=args.provider)
+    agent3 = Agent3SQLExecutor(session=agent1.session)
+    run_store = RunStore(ConfigurationExecutor().get_run_store_settings()["path"])
+    orchestrator = PipelineOrchestrator(agent1, agent2, agent3, run_store=run_store)
+
+    def on_progress(agent_num, status, results):
+        print(f"Agent {agent_num}: {status}")
+
+    results = orchestrator.run(requirements_text, uuid.uuid4().hex, spill_mode=args.spill, on_progress=on_progress, profile=args.profile)
+    print(f"\nRun {results['run_id']}: {len(results.get('sql_execution_results') or {})} queries executed "
+          f"in {results['timings']['total_seconds']:.1f}s, {len(results['errors'])} errors")
+    if results.get("profile"):
+        profile = results["profile"]
+        print(f"Profile saved to {profile['pstats_path']} (peak traced {profile['peak_traced_mb']} MB)")
+        print(f"{'cumulative s':>12} {'total s':>9} {'calls':>8}  function")
+        for entry in profile["top_functions"]:
+            print(f"{entry['cumulative_seconds']:>12.3f} {entry['total_seconds']:>9.3f} {entry['calls']:>8}  {entry['function']} ({entry['location']})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+    return 0 if not results["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
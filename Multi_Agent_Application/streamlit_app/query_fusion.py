@@ -0,0 +1,230 @@
+"""
+Fuses generated scalar-aggregate checks that read the same tables into one
+query, so the base tables are scanned once per group instead of once per
+test. Each query's WHERE clause moves into its aggregates as a condition
+(COUNT(*) -> COUNT_IF(w), SUM(x) -> SUM(CASE WHEN w THEN x END), ...), the
+fused query filters on the OR of all conditions, and every original query
+maps to a slice of the fused result's columns.
+
+Only queries with a single SELECT over a plain FROM clause, no subqueries,
+GROUP BY, HAVING, ORDER BY, LIMIT, DISTINCT or window functions, and whose
+only function calls are aggregates that ignore NULLs or known scalar
+functions, are fused; everything else runs on its own.
+"""
+import re
+
+from sql_analysis import AGGREGATE_CALL, flatten_parentheses, is_aggregate_branch, mask_sql, split_scopes
+from sql_dedupe import normalize_sql
+
+
+# Aggregates that skip NULL inputs, so CASE WHEN <condition> THEN x END keeps their meaning
+NULL_SKIPPING_AGGREGATES = {
+    "COUNT", "COUNT_IF", "SUM", "AVG", "MIN", "MAX", "MEDIAN", "APPROX_COUNT_DISTINCT", "STDDEV", "VARIANCE",
+}
+UNFUSABLE_CLAUSE = re.compile(
+    r"\bGROUP\s+BY\b|\bHAVING\b|\bQUALIFY\b|\bORDER\s+BY\b|\bLIMIT\b|\bFETCH\b|\bOVER\b|\bWINDOW\b"
+    r"|\bUNION\b|\bINTERSECT\b|\bEXCEPT\b|\bMINUS\b|\bSELECT\s+(?:DISTINCT|TOP)\b",
+    re.IGNORECASE,
+)
+FUNCTION_CALL = re.compile(r"\b([A-Za-z_][\w$]*)\s*\(")
+# Keywords that can precede a parenthesis without being a function call
+PARENTHESIS_KEYWORDS = {
+    "AND", "OR", "NOT", "IN", "IS", "CASE", "WHEN", "THEN", "ELSE", "DISTINCT", "BETWEEN", "LIKE", "ILIKE",
+    # Type names in CAST(x AS NUMBER(10, 2)) and x::DECIMAL(10, 2)
+    "NUMBER", "DECIMAL", "NUMERIC", "VARCHAR", "CHAR",
+}
+# Deterministic row-level functions; they mean the same inside or around a conditional aggregate
+SCALAR_FUNCTIONS = {
+    "ABS", "CEIL", "FLOOR", "ROUND", "TRUNC", "TRUNCATE", "SIGN", "MOD", "SQRT", "POWER", "POW", "EXP", "LN", "LOG",
+    "DIV0", "DIV0NULL", "ZEROIFNULL", "NULLIFZERO", "COALESCE", "NVL", "NVL2", "IFNULL", "NULLIF", "IFF",
+    "GREATEST", "LEAST", "CAST", "TRY_CAST", "TO_NUMBER", "TO_DECIMAL", "TO_NUMERIC", "TO_DOUBLE", "TO_VARCHAR",
+    "TO_CHAR", "TO_DATE", "TO_TIMESTAMP", "DATEDIFF", "DATEADD", "DATE_TRUNC", "YEAR", "MONTH", "DAY",
+    "UPPER", "LOWER", "TRIM", "LTRIM", "RTRIM", "LENGTH", "LEN", "CONCAT", "SUBSTR", "SUBSTRING",
+}
+TRAILING_ALIAS = re.compile(r'\s+(?:AS\s+)?("(?:[^"]|"")+"|[A-Za-z_][\w$]*)\s*$', re.IGNORECASE)
+ALIAS_KEYWORDS = {"END", "NULL", "TRUE", "FALSE"}
+# A trailing word after one of these is an operand, not an alias
+OPERATOR_ENDINGS = ("+", "-", "*", "/", "%", "|", "=", "<", ">", ".", "(", ",")
+
+
+def _strip_comments(sql):
+    """
+    Blanks out comments but keeps string literals, so clause text can be
+    moved inside parentheses without a `--` swallowing the closing one.
+    """
+    return re.sub(
+        r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/",
+        lambda match: match.group(0) if match.group(0).startswith("'") else " ",
+        sql,
+        flags=re.DOTALL,
+    )
+
+
+def _split_top_level(text, flat):
+    """
+    Splits `text` on the commas that are outside parentheses in `flat`, its flattened twin.
+    """
+    parts = []
+    start = 0
+    for position, char in enumerate(flat):
+        if char == ",":
+            parts.append(text[start:position])
+            start = position + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _matching_paren(text, open_position):
+    depth = 0
+    for position in range(open_position, len(text)):
+        if text[position] == "(":
+            depth += 1
+        elif text[position] == ")":
+            depth -= 1
+            if depth == 0:
+                return position
+    return -1
+
+
+def _has_only_known_functions(item):
+    """
+    True when every function call in a select item is a rewritable aggregate
+    or a known scalar function. Any other aggregate (STDDEV_POP, BOOLAND_AGG,
+    MAX_BY, HASH_AGG, a UDF, ...) would be left unconditional and computed
+    over every member's rows in the fused scan.
+    """
+    for call in FUNCTION_CALL.finditer(mask_sql(item)):
+        name = call.group(1).upper()
+        if name not in NULL_SKIPPING_AGGREGATES and name not in SCALAR_FUNCTIONS and name not in PARENTHESIS_KEYWORDS:
+            return False
+    return True
+
+
+def _conditional_item(item, condition):
+    """
+    Rewrites every aggregate call in a select item to only see rows matching
+    `condition`. Returns None when an aggregate cannot be made conditional.
+    """
+    masked = mask_sql(item)
+    rewritten = []
+    position = 0
+    for call in AGGREGATE_CALL.finditer(masked):
+        if call.start() < position:
+            continue
+        name = call.group(1).upper()
+        close = _matching_paren(masked, call.end() - 1)
+        if name not in NULL_SKIPPING_AGGREGATES or close < 0:
+            return None
+        argument = item[call.end():close].strip()
+        masked_argument = mask_sql(argument)
+        if "," in flatten_parentheses(masked_argument):
+            return None
+
+        distinct = re.match(r"DISTINCT\s+", argument, re.IGNORECASE)
+        if distinct:
+            argument = argument[distinct.end():]
+        prefix = "DISTINCT " if distinct else ""
+        if name == "COUNT" and argument == "*":
+            replacement = f"COUNT_IF({condition})"
+        elif name == "COUNT_IF":
+            replacement = f"COUNT_IF({condition} AND ({argument}))"
+        else:
+            replacement = f"{name}({prefix}CASE WHEN {condition} THEN {argument} END)"
+
+        rewritten.append(item[position:call.start()])
+        rewritten.append(replacement)
+        position = close + 1
+    rewritten.append(item[position:])
+    return "".join(rewritten)
+
+
+def parse_scalar_aggregate(sql):
+    """
+    Splits a fusable query into {"sql", "items", "from", "where"}, where
+    `items` are the select expressions without their aliases; returns None
+    for any query that cannot be fused.
+    """
+    clean = _strip_comments(sql).strip().rstrip(";").strip()
+    masked = mask_sql(clean)
+    if len(split_scopes(masked)) != 1 or UNFUSABLE_CLAUSE.search(masked) or not is_aggregate_branch(masked):
+        return None
+
+    flat = flatten_parentheses(masked)
+    select = re.match(r"\s*SELECT\b", flat, re.IGNORECASE)
+    from_match = re.search(r"\bFROM\b", flat, re.IGNORECASE)
+    if not select or not from_match:
+        return None
+    where_match = re.search(r"\bWHERE\b", flat[from_match.end():], re.IGNORECASE)
+    from_end = from_match.end() + where_match.start() if where_match else len(clean)
+
+    items = []
+    select_text = clean[select.end():from_match.start()]
+    for item in _split_top_level(select_text, flat[select.end():from_match.start()]):
+        alias = TRAILING_ALIAS.search(mask_sql(item))
+        expression = item[:alias.start()].rstrip() if alias else item
+        if alias and alias.group(1).upper() not in ALIAS_KEYWORDS and not expression.endswith(OPERATOR_ENDINGS):
+            item = item[:alias.start()]
+        # Every aggregate must be expressible as a conditional one, whatever the group's WHERE clauses
+        if not item.strip() or not _has_only_known_functions(item) or _conditional_item(item, "TRUE") is None:
+            return None
+        items.append(item.strip())
+
+    where = clean[from_match.end() + where_match.end():].strip() if where_match else None
+    return {
+        "sql": sql,
+        "items": items,
+        "from": clean[from_match.end():from_end].strip(),
+        "where": where or None,
+    }
+
+
+def _fuse_group(members):
+    """
+    Builds the fused query of parsed members sharing a FROM clause and
+    records which (1-based) fused columns belong to each member.
+    """
+    wheres = {normalize_sql(member["where"]) if member["where"] else None for member in members}
+    shared_where = len(wheres) == 1
+    select_list = []
+    fused_members = []
+    for member_index, member in enumerate(members, start=1):
+        condition = f"({member['where']})" if member["where"] and not shared_where else None
+        positions = []
+        for item_index, item in enumerate(member["items"], start=1):
+            expression = _conditional_item(item, condition) if condition else item
+            select_list.append(f"{expression} AS Q{member_index}_C{item_index}")
+            positions.append(len(select_list))
+        fused_members.append({"sql": member["sql"], "positions": positions})
+
+    fused_sql = "SELECT\n    " + ",\n    ".join(select_list) + f"\nFROM {members[0]['from']}"
+    if shared_where and members[0]["where"]:
+        fused_sql += f"\nWHERE {members[0]['where']}"
+    elif None not in wheres:
+        fused_sql += "\nWHERE " + "\n   OR ".join(f"({member['where']})" for member in members)
+    return {"sql": fused_sql, "members": fused_members}
+
+
+def plan_fusion(sql_queries, max_group_size=20):
+    """
+    Groups fusable queries by their normalized FROM clause (same tables,
+    aliases and join conditions) and fuses every group of two or more.
+    Returns [{"sql": fused_sql, "members": [{"sql": original, "positions": [...]}]}];
+    queries in no group are left for normal execution.
+    """
+    groups = {}
+    for sql_query in dict.fromkeys(sql_queries):
+        if not isinstance(sql_query, str):
+            continue
+        parsed = parse_scalar_aggregate(sql_query)
+        if parsed is not None:
+            groups.setdefault(normalize_sql(parsed["from"]), []).append(parsed)
+
+    plan = []
+    for members in groups.values():
+        for start in range(0, len(members), max_group_size):
+            chunk = members[start:start + max_group_size]
+            if len(chunk) < 2:
+                continue
+            plan.append(_fuse_group(chunk))
+            print(f"Fused {len(chunk)} queries over {chunk[0]['from'][:80]} into one scan")
+    return plan
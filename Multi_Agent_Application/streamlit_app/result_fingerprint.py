@@ -0,0 +1,94 @@
+import hashlib
+import json
+import re
+
+
+QUERY_ID_PATTERN = re.compile(r"^[0-9A-Za-z-]+$")
+
+
+def result_scan(query_id):
+    """
+    Returns a TABLE(RESULT_SCAN(...)) reference to a finished query's persisted result.
+    """
+    if not query_id or not QUERY_ID_PATTERN.match(query_id):
+        raise ValueError(f"Invalid Snowflake query ID: {query_id!r}")
+    return f"TABLE(RESULT_SCAN('{query_id}'))"
+
+
+class ResultFingerprinter:
+    """
+    Computes a stable fingerprint of a finished query's full result without
+    fetching it: one aggregate over RESULT_SCAN returns the row count, an
+    order-independent HASH_AGG over all rows and, per column, the non-null
+    count and HASH_AGG. Only this summary leaves the warehouse.
+    """
+
+    def __init__(self, max_columns=50):
+        self.max_columns = max_columns
+
+    def compute(self, session, query_id, headers, positions=None):
+        """
+        Returns {"row_count", "row_hash", "columns": [{"name", "non_null", "hash"}], "digest"}.
+        With `positions` (1-based) only those columns of the result are
+        fingerprinted, as if they were the whole result; a fused query uses it
+        for each original query's share of the combined result.
+        """
+        source = result_scan(query_id)
+        if positions is not None:
+            source = f"(SELECT {', '.join(f'${position}' for position in positions)} FROM {source})"
+        columns = headers[:self.max_columns]
+        select_list = ["COUNT(*)", "HASH_AGG(*)"]
+        for position in range(1, len(columns) + 1):
+            select_list.append(f"COUNT(${position})")
+            select_list.append(f"HASH_AGG(${position})")
+        row = session.sql(f"SELECT {', '.join(select_list)} FROM {source}").collect()[0]
+
+        fingerprint = {
+            "row_count": int(row[0]),
+            "row_hash": str(row[1]),
+            "columns": [
+                {"name": name, "non_null": int(row[2 + 2 * i]), "hash": str(row[3 + 2 * i])}
+                for i, name in enumerate(columns)
+            ],
+        }
+        fingerprint["digest"] = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+        return fingerprint
+
+
+def diff_fingerprints(previous, current):
+    """
+    Compares the fingerprints of two runs of the same query.
+    Returns {"status": "NEW" | "PASS" | "CHANGED", "previous_run_id", "changes": list}.
+    `previous` is a run store record ({"run_id", "fingerprint"}) or None.
+    """
+    if previous is None:
+        return {"status": "NEW", "previous_run_id": None, "changes": []}
+
+    before = previous["fingerprint"]
+    regression = {"status": "PASS", "previous_run_id": previous["run_id"], "changes": []}
+    if before["digest"] == current["digest"]:
+        return regression
+
+    changes = regression["changes"]
+    if before["row_count"] != current["row_count"]:
+        changes.append(f"Row count {before['row_count']:,} -> {current['row_count']:,}")
+
+    before_columns = {column["name"]: column for column in before["columns"]}
+    current_columns = {column["name"]: column for column in current["columns"]}
+    for name in sorted(before_columns.keys() - current_columns.keys()):
+        changes.append(f"Column {name} removed")
+    for name in sorted(current_columns.keys() - before_columns.keys()):
+        changes.append(f"Column {name} added")
+    for name in sorted(before_columns.keys() & current_columns.keys()):
+        if before_columns[name]["non_null"] != current_columns[name]["non_null"]:
+            changes.append(
+                f"Column {name} non-null count {before_columns[name]['non_null']:,} -> "
+                f"{current_columns[name]['non_null']:,}"
+            )
+        elif before_columns[name]["hash"] != current_columns[name]["hash"]:
+            changes.append(f"Column {name} values changed")
+
+    if not changes and before["row_hash"] != current["row_hash"]:
+        changes.append("Row contents changed")
+    regression["status"] = "CHANGED"
+    return regression
@@ -0,0 +1,252 @@
+import os
+import uuid
+
+from cancellation import QueryCancelled
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed when spill mode is enabled
+    pa = None
+
+
+class SpilledResult:
+    """
+    Lightweight handle to a query result that was streamed to disk.
+    Only the location and a few counters live in memory; the rows are read
+    back through a memory map on demand.
+    """
+
+    def __init__(self, path, file_format, headers, row_count, size_bytes):
+        self.path = path
+        self.file_format = file_format
+        self.headers = headers
+        self.row_count = row_count
+        self.size_bytes = size_bytes
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "format": self.file_format,
+            "headers": self.headers,
+            "row_count": self.row_count,
+            "size_bytes": self.size_bytes,
+        }
+
+    @classmethod
+    def from_dict(cls, handle_dict):
+        return cls(
+            handle_dict["path"],
+            handle_dict["format"],
+            handle_dict["headers"],
+            handle_dict["row_count"],
+            handle_dict["size_bytes"],
+        )
+
+    def open(self):
+        """
+        Opens the spilled file as a pyarrow Table backed by a memory map.
+        Arrow IPC files are zero-copy; Parquet pages are decoded lazily per column chunk.
+        """
+        _require_pyarrow()
+        if self.file_format == "parquet":
+            return pq.read_table(self.path, memory_map=True)
+        source = pa.memory_map(self.path, "r")
+        return pa_ipc.open_file(source).read_all()
+
+    def iter_batches(self):
+        """
+        Yields record batches one at a time without materializing the whole file.
+        """
+        _require_pyarrow()
+        if self.file_format == "parquet":
+            parquet_file = pq.ParquetFile(self.path, memory_map=True)
+            for batch in parquet_file.iter_batches():
+                yield batch
+            return
+        source = pa.memory_map(self.path, "r")
+        reader = pa_ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+    def read_rows(self, offset=0, limit=10):
+        """
+        Returns rows [offset, offset + limit) as lists, matching the executor's `data` format.
+        Parquet files only decode the row groups that overlap the requested rows.
+        """
+        _require_pyarrow()
+        if self.file_format == "parquet":
+            parquet_file = pq.ParquetFile(self.path, memory_map=True)
+            row_groups = []
+            first_row = None
+            group_start = 0
+            for i in range(parquet_file.num_row_groups):
+                group_rows = parquet_file.metadata.row_group(i).num_rows
+                if group_start + group_rows > offset and group_start < offset + limit:
+                    if first_row is None:
+                        first_row = group_start
+                    row_groups.append(i)
+                group_start += group_rows
+            if not row_groups:
+                return []
+            table = parquet_file.read_row_groups(row_groups).slice(offset - first_row, limit)
+        else:
+            table = self.open().slice(offset, limit)
+        columns = [table.column(i).to_pylist() for i in range(table.num_columns)]
+        return [list(row) for row in zip(*columns)]
+
+    def write_csv(self, destination_path):
+        """
+        Streams the spilled result into a CSV file batch by batch.
+        """
+        _require_pyarrow()
+        import pyarrow.csv as pa_csv
+
+        writer = None
+        try:
+            for batch in self.iter_batches():
+                if writer is None:
+                    writer = pa_csv.CSVWriter(destination_path, batch.schema)
+                writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        return destination_path
+
+
+class ResultSpillWriter:
+    """
+    Streams Snowpark pandas batches one at a time into Arrow IPC or Parquet files
+    under a per-run directory, so large results never sit in the process heap.
+    """
+
+    def __init__(self, base_dir="runs", run_id=None, file_format="arrow", batch_rows=50000):
+        _require_pyarrow()
+        if file_format not in ("arrow", "parquet"):
+            raise ValueError(f"Unsupported spill format: {file_format}")
+        self.run_id = run_id or uuid.uuid4().hex
+        self.run_dir = os.path.join(base_dir, self.run_id)
+        self.file_format = file_format
+        self.batch_rows = batch_rows
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    def _new_path(self):
+        extension = "parquet" if self.file_format == "parquet" else "arrow"
+        return os.path.join(self.run_dir, f"result_{uuid.uuid4().hex[:12]}.{extension}")
+
+    def spill(self, pandas_batches, headers, preview_rows=10, max_rows=None, cancel_token=None, column_types=None):
+        """
+        Writes every batch to disk and returns (SpilledResult, preview_data).
+        Only the first `preview_rows` rows are kept in memory for immediate display.
+        `column_types` (the Snowpark result schema's data types) fix the file
+        schema up front, so a first batch with an all-null column or integers
+        that later turn into floats does not break the spill partway through.
+        Raises QueryCancelled (and removes the partial file) when the result grows
+        past `max_rows` or `cancel_token` is cancelled between batches.
+        """
+        path = self._new_path()
+        writer = None
+        schema = None
+        row_count = 0
+        preview = []
+
+        try:
+            for pandas_batch in pandas_batches:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    raise QueryCancelled(cancel_token.reason)
+                if schema is None:
+                    schema = _spill_schema(pa.Schema.from_pandas(pandas_batch, preserve_index=False), column_types)
+                table = pa.Table.from_pandas(pandas_batch, schema=schema, preserve_index=False)
+                if writer is None:
+                    if self.file_format == "parquet":
+                        writer = pq.ParquetWriter(path, schema)
+                    else:
+                        writer = pa_ipc.new_file(path, schema)
+
+                for batch in table.to_batches(max_chunksize=self.batch_rows):
+                    if self.file_format == "parquet":
+                        writer.write_table(pa.Table.from_batches([batch], schema=schema))
+                    else:
+                        writer.write_batch(batch)
+
+                    if len(preview) < preview_rows:
+                        head = batch.slice(0, preview_rows - len(preview))
+                        columns = [head.column(i).to_pylist() for i in range(head.num_columns)]
+                        preview.extend(list(row) for row in zip(*columns))
+                    row_count += batch.num_rows
+                del pandas_batch, table
+
+                if max_rows is not None and row_count > max_rows:
+                    raise QueryCancelled(f"Result exceeded the {max_rows:,} row guard", "ROW_LIMIT")
+        except QueryCancelled:
+            if writer is not None:
+                writer.close()
+                writer = None
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if writer is None:
+            # Empty result: still write a file so the handle is always openable
+            types = [_arrow_type(column_type) for column_type in column_types or []]
+            schema = pa.schema([
+                (name, types[i] if i < len(types) and types[i] is not None else pa.null())
+                for i, name in enumerate(headers)
+            ])
+            empty = pa.Table.from_batches([], schema=schema)
+            if self.file_format == "parquet":
+                pq.write_table(empty, path)
+            else:
+                with pa_ipc.new_file(path, schema) as empty_writer:
+                    empty_writer.write_table(empty)
+
+        handle = SpilledResult(path, self.file_format, headers, row_count, os.path.getsize(path))
+        print(f"Spilled {row_count} rows ({handle.size_bytes} bytes) to {path}")
+        return handle, preview
+
+
+def _arrow_type(column_type):
+    """
+    Arrow type of a Snowpark data type as Snowflake delivers it in pandas
+    batches (scaled NUMBERs arrive as floats), or None to infer it from data.
+    """
+    type_name = type(column_type).__name__
+    if type_name in ("LongType", "IntegerType", "ShortType", "ByteType"):
+        return pa.int64()
+    if type_name == "DecimalType":
+        return pa.int64() if column_type.scale == 0 else pa.float64()
+    if type_name in ("DoubleType", "FloatType"):
+        return pa.float64()
+    if type_name == "StringType":
+        return pa.string()
+    if type_name == "BooleanType":
+        return pa.bool_()
+    if type_name == "DateType":
+        return pa.date32()
+    if type_name == "BinaryType":
+        return pa.binary()
+    return None
+
+
+def _spill_schema(inferred_schema, column_types):
+    """
+    The first batch's inferred schema with every column the Snowpark schema
+    types pinned to that type; columns left to inference that are all null in
+    the first batch become strings instead of the null type.
+    """
+    fields = []
+    for i, field in enumerate(inferred_schema):
+        arrow_type = _arrow_type(column_types[i]) if column_types and i < len(column_types) else None
+        if arrow_type is None:
+            arrow_type = pa.string() if pa.types.is_null(field.type) else field.type
+        fields.append(pa.field(field.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for result spill mode. Install it with `pip install pyarrow`.")
@@ -0,0 +1,127 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# tracemalloc is process-wide, so only one run traces allocations at a time
+_tracemalloc_lock = threading.Lock()
+
+ALLOCATION_NOISE = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+class RunProfiler:
+    """
+    Captures a CPU profile (cProfile) and an allocation snapshot (tracemalloc)
+    around one pipeline run and saves both under `<base_dir>/<run_id>/`.
+    cProfile only sees the thread that runs the agents; work fanned out to
+    other pools (such as concurrent LLM calls) shows up as time spent waiting
+    on it. Allocations of runs executing concurrently land in the same snapshot.
+    """
+
+    def __init__(self, settings):
+        self.base_dir = settings["base_dir"]
+        self.top_n = settings["top_n"]
+        self.sort_by = settings["sort_by"]
+        self.tracemalloc_frames = settings["tracemalloc_frames"]
+
+    @contextmanager
+    def capture(self, run_id):
+        """
+        Profiles the block and yields a dict that holds the profile summary once it exits:
+            {"wall_seconds", "profiled_seconds", "pstats_path", "snapshot_path",
+             "peak_traced_mb", "top_functions", "top_allocations"}
+        """
+        summary = {}
+        trace_allocations = _tracemalloc_lock.acquire(blocking=False)
+        started_tracing = False
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+            started_tracing = True
+        elif not trace_allocations:
+            print(f"Another run is tracing allocations; profiling run {run_id} without an allocation snapshot")
+
+        profiler = cProfile.Profile()
+        started = time.time()
+        try:
+            # Inside the try: on Python 3.12+ enable() raises while another profiler is active,
+            # and the tracemalloc lock and tracing must still be released
+            profiler.enable()
+            yield summary
+        finally:
+            profiler.disable()
+            wall_seconds = time.time() - started
+            snapshot = None
+            peak_bytes = 0
+            if trace_allocations:
+                snapshot = tracemalloc.take_snapshot().filter_traces(ALLOCATION_NOISE)
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                _tracemalloc_lock.release()
+            try:
+                summary.update(self._save(run_id, profiler, snapshot, peak_bytes, wall_seconds))
+            except Exception as e:
+                print(f"Could not save the profile of run {run_id}: {e}")
+
+    def _save(self, run_id, profiler, snapshot, peak_bytes, wall_seconds):
+        run_dir = os.path.join(self.base_dir, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        pstats_path = os.path.join(run_dir, "profile.pstats")
+        profiler.dump_stats(pstats_path)
+        stats = pstats.Stats(profiler)
+
+        summary = {
+            "wall_seconds": round(wall_seconds, 3),
+            "profiled_seconds": round(stats.total_tt, 3),
+            "pstats_path": pstats_path,
+            "snapshot_path": None,
+            "peak_traced_mb": round(peak_bytes / 1024 ** 2, 2),
+            "top_functions": self.top_functions(stats),
+            "top_allocations": [],
+        }
+        if snapshot is not None:
+            summary["snapshot_path"] = os.path.join(run_dir, "allocations.tracemalloc")
+            snapshot.dump(summary["snapshot_path"])
+            summary["top_allocations"] = self.top_allocations(snapshot)
+        print(f"Profile of run {run_id} saved to {run_dir}")
+        return summary
+
+    def top_functions(self, stats):
+        """
+        The `top_n` hottest functions ordered by `sort_by` ("cumulative" or "tottime").
+        """
+        sort_index = 3 if self.sort_by == "cumulative" else 2
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][sort_index], reverse=True)
+        top = []
+        for (filename, line, function), (primitive_calls, calls, total, cumulative, _) in entries[:self.top_n]:
+            top.append({
+                "function": function,
+                "location": f"{os.path.basename(filename)}:{line}" if line else filename,
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "total_seconds": round(total, 4),
+                "cumulative_seconds": round(cumulative, 4),
+            })
+        return top
+
+    def top_allocations(self, snapshot):
+        """
+        The `top_n` source lines holding the most memory still allocated at the end of the run.
+        """
+        return [
+            {
+                "location": f"{os.path.basename(statistic.traceback[0].filename)}:{statistic.traceback[0].lineno}",
+                "size_kb": round(statistic.size / 1024, 1),
+                "count": statistic.count,
+            }
+            for statistic in snapshot.statistics("lineno")[:self.top_n]
+        ]
@@ -0,0 +1,325 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS query_fingerprints (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query_key TEXT NOT NULL,
+        run_id TEXT,
+        sql_text TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        fingerprint TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_query_fingerprints_key ON query_fingerprints (query_key, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_query_fingerprints_digest ON query_fingerprints (digest)",
+    "CREATE INDEX IF NOT EXISTS idx_query_fingerprints_run ON query_fingerprints (run_id)",
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        document_hash TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        use_cases TEXT,
+        generated_sql TEXT,
+        errors TEXT,
+        timings TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_runs_document ON runs (document_hash, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS run_queries (
+        run_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        query_key TEXT NOT NULL,
+        sql_text TEXT NOT NULL,
+        status TEXT,
+        digest TEXT,
+        warehouse TEXT,
+        elapsed_seconds REAL,
+        result TEXT NOT NULL,
+        PRIMARY KEY (run_id, position)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_run_queries_key ON run_queries (query_key)",
+    "CREATE INDEX IF NOT EXISTS idx_run_queries_digest ON run_queries (digest)",
+]
+
+# Columns added after the first release: (table, column, type)
+COLUMN_MIGRATIONS = [
+    ("runs", "profile", "TEXT"),
+]
+
+
+def query_key(sql_query):
+    """
+    Identifies a query across runs: SHA-256 of the SQL with whitespace
+    collapsed and any trailing semicolon removed.
+    """
+    normalized = re.sub(r"\s+", " ", sql_query).strip().rstrip(";").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def document_hash(requirements_text):
+    """
+    Identifies a requirements document across runs.
+    """
+    return hashlib.sha256(requirements_text.strip().encode("utf-8")).hexdigest()
+
+
+def _query_columns(result_data):
+    """
+    (status, digest, warehouse, elapsed_seconds, result) of a run_queries row.
+    """
+    regression = result_data.get("regression") or {}
+    fingerprint = result_data.get("fingerprint") or {}
+    cost = result_data.get("cost") or {}
+    return (
+        regression.get("status") or result_data.get("status"), fingerprint.get("digest"),
+        cost.get("warehouse"), cost.get("elapsed_seconds"), json.dumps(result_data, default=str),
+    )
+
+
+class RunStore:
+    """
+    Local SQLite store of pipeline runs: the document hash, use cases,
+    generated SQL, per-query execution metadata, timings, result handles and
+    result fingerprints. Runs are indexed by document, fingerprint and date,
+    so past results can be reloaded and compared without re-invoking the LLMs
+    or the warehouse. A connection is opened per call, so one store can be
+    shared across worker threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            for table, column, column_type in COLUMN_MIGRATIONS:
+                existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_fingerprint(self, run_id, sql_query, fingerprint):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO query_fingerprints (query_key, run_id, sql_text, digest, row_count, fingerprint, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query_key(sql_query), run_id, sql_query, fingerprint["digest"], fingerprint["row_count"],
+                 json.dumps(fingerprint), time.time()),
+            )
+
+    def latest_fingerprint(self, sql_query, exclude_run_id=None):
+        """
+        Returns the most recent {"run_id", "created_at", "fingerprint"} recorded
+        for the query outside `exclude_run_id`, or None.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT run_id, created_at, fingerprint FROM query_fingerprints "
+                "WHERE query_key = ? AND run_id IS NOT ? ORDER BY created_at DESC LIMIT 1",
+                (query_key(sql_query), exclude_run_id),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"run_id": row["run_id"], "created_at": row["created_at"], "fingerprint": json.loads(row["fingerprint"])}
+
+    def fingerprint_history(self, sql_query, limit=20):
+        """
+        Returns the query's recorded fingerprints, newest first, for trend reporting.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT run_id, created_at, fingerprint FROM query_fingerprints "
+                "WHERE query_key = ? ORDER BY created_at DESC LIMIT ?",
+                (query_key(sql_query), limit),
+            ).fetchall()
+        return [
+            {"run_id": row["run_id"], "created_at": row["created_at"], "fingerprint": json.loads(row["fingerprint"])}
+            for row in rows
+        ]
+
+    def record_run(self, run_id, requirements_text, results, status):
+        """
+        Stores (or replaces) a finished pipeline run and its per-query results.
+        """
+        execution_results = results.get("sql_execution_results") or {}
+        with self._connect() as conn:
+            conn.execute("DELETE FROM run_queries WHERE run_id = ?", (run_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, document_hash, status, created_at, use_cases, generated_sql, errors, timings, profile) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, document_hash(requirements_text), status, time.time(),
+                 json.dumps(results.get("high_level_use_cases")), json.dumps(results.get("generated_sql_queries")),
+                 json.dumps(results.get("errors", [])), json.dumps(results.get("timings", {})),
+                 json.dumps(results["profile"]) if results.get("profile") else None),
+            )
+            for position, (sql_query, result_data) in enumerate(execution_results.items()):
+                conn.execute(
+                    "INSERT INTO run_queries (run_id, position, query_key, sql_text, status, digest, warehouse, elapsed_seconds, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, position, query_key(sql_query), sql_query) + _query_columns(result_data),
+                )
+
+    def update_query_results(self, run_id, execution_results):
+        """
+        Replaces the stored results of queries of a recorded run that were
+        executed again (sampled queries promoted to full runs).
+        """
+        with self._connect() as conn:
+            for sql_query, result_data in execution_results.items():
+                conn.execute(
+                    "UPDATE run_queries SET status = ?, digest = ?, warehouse = ?, elapsed_seconds = ?, result = ? "
+                    "WHERE run_id = ? AND query_key = ?",
+                    _query_columns(result_data) + (run_id, query_key(sql_query)),
+                )
+
+    def get_run(self, run_id):
+        """
+        Returns {"run_id", "document_hash", "status", "created_at", "results"} with
+        `results` rebuilt in the pipeline's results format, or None.
+        """
+        with self._connect() as conn:
+            run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            queries = conn.execute(
+                "SELECT sql_text, result FROM run_queries WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+        run_result = {
+            "run_id": run["run_id"],
+            "document_hash": run["document_hash"],
+            "status": run["status"],
+            "created_at": run["created_at"],
+            "results": {
+                "run_id": run["run_id"],
+                "high_level_use_cases": json.loads(run["use_cases"]),
+                "generated_sql_queries": json.loads(run["generated_sql"]),
+                "sql_execution_results": {row["sql_text"]: json.loads(row["result"]) for row in queries} or None,
+                "errors": json.loads(run["errors"]),
+                "timings": json.loads(run["timings"]),
+            },
+        }
+        if run["profile"]:
+            run_result["results"]["profile"] = json.loads(run["profile"])
+        return run_result
+
+    def find_runs(self, requirements_text=None, fingerprint_digest=None, since=None, until=None, limit=50):
+        """
+        Returns run summaries, newest first:
+            {"run_id", "document_hash", "status", "created_at", "query_count", "total_seconds"}
+        filtered by document, by a result fingerprint any of the run's queries
+        produced, and/or by a [since, until) creation-time window.
+        """
+        conditions, params = [], []
+        if requirements_text is not None:
+            conditions.append("r.document_hash = ?")
+            params.append(document_hash(requirements_text))
+        if fingerprint_digest is not None:
+            conditions.append("r.run_id IN (SELECT run_id FROM run_queries WHERE digest = ?)")
+            params.append(fingerprint_digest)
+        if since is not None:
+            conditions.append("r.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("r.created_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT r.run_id, r.document_hash, r.status, r.created_at, r.timings, "
+                f"(SELECT COUNT(*) FROM run_queries q WHERE q.run_id = r.run_id) AS query_count "
+                f"FROM runs r {where} ORDER BY r.created_at DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [
+            {
+                "run_id": row["run_id"],
+                "document_hash": row["document_hash"],
+                "status": row["status"],
+                "created_at": row["created_at"],
+                "query_count": row["query_count"],
+                "total_seconds": json.loads(row["timings"] or "{}").get("total_seconds"),
+            }
+            for row in rows
+        ]
+
+    def compact(self, retention_days, keep_runs_per_document=0):
+        """
+        Deletes runs older than `retention_days` (keeping the newest
+        `keep_runs_per_document` of each document), their query rows,
+        fingerprints, spilled result files and saved profiles, then reclaims the space.
+        Returns the number of runs deleted.
+        """
+        cutoff = time.time() - retention_days * 86400
+        with self._connect() as conn:
+            expired = [
+                row["run_id"] for row in conn.execute(
+                    "SELECT run_id FROM ("
+                    "  SELECT run_id, created_at, ROW_NUMBER() OVER ("
+                    "    PARTITION BY document_hash ORDER BY created_at DESC) AS recency"
+                    "  FROM runs"
+                    ") WHERE created_at < ? AND recency > ?",
+                    (cutoff, keep_runs_per_document),
+                ).fetchall()
+            ]
+            file_paths = []
+            for run_id in expired:
+                profile_row = conn.execute("SELECT profile FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+                if profile_row and profile_row["profile"]:
+                    profile = json.loads(profile_row["profile"])
+                    file_paths.extend(path for path in (profile["pstats_path"], profile["snapshot_path"]) if path)
+                for row in conn.execute("SELECT result FROM run_queries WHERE run_id = ?", (run_id,)):
+                    spill = json.loads(row["result"]).get("spill")
+                    if spill:
+                        file_paths.append(spill["path"])
+                conn.execute("DELETE FROM run_queries WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM query_fingerprints WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            # Fingerprints from runs that were never recorded (e.g. direct executor calls)
+            conn.execute(
+                "DELETE FROM query_fingerprints WHERE created_at < ? "
+                "AND (run_id IS NULL OR run_id NOT IN (SELECT run_id FROM runs))",
+                (cutoff,),
+            )
+
+        for path in file_paths:
+            if os.path.exists(path):
+                os.remove(path)
+            run_dir = os.path.dirname(path)
+            if os.path.isdir(run_dir) and not os.listdir(run_dir):
+                os.rmdir(run_dir)
+
+        if expired:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+            print(f"Run store compacted: {len(expired)} runs older than {retention_days} days removed")
+        return len(expired)
@@ -0,0 +1,344 @@
+"""
+Replays an exported test suite inside Snowflake on a schedule, with no LLM
+calls and no client involvement. The suite's queries and expectations are
+materialized into a table, a Snowpark stored procedure runs and fingerprints
+them, and a TASK calls the procedure on a CRON schedule. Verdicts are appended
+to a results table that the app reads incrementally.
+
+From the Multi_Agent_Application directory:
+    python streamlit_app/scheduled_regression.py schedule suites/<suite_name>/v1
+    python streamlit_app/scheduled_regression.py run <suite_name> <version>
+    python streamlit_app/scheduled_regression.py results --suite <suite_name>
+    python streamlit_app/scheduled_regression.py unschedule <suite_name>
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+import time
+import uuid
+
+from snowflake.snowpark import Session
+from snowflake.snowpark.functions import col
+from snowflake.snowpark.types import DoubleType, IntegerType, StringType, StructField, StructType, TimestampType
+
+from configuration import CREDENTIALS_MODULE, ConfigurationExecutor
+from result_fingerprint import ResultFingerprinter
+from suite_bundle import compare_to_expected, load_test_suite
+
+
+TESTS_SCHEMA = StructType([
+    StructField("SUITE_NAME", StringType()),
+    StructField("SUITE_VERSION", IntegerType()),
+    StructField("TEST_ID", StringType()),
+    StructField("SQL_TEXT", StringType()),
+    StructField("EXPECTED_HEADERS", StringType()),
+    StructField("EXPECTED_FINGERPRINT", StringType()),
+    StructField("MATERIALIZED_AT", TimestampType()),
+])
+RESULTS_SCHEMA = StructType([
+    StructField("RUN_ID", StringType()),
+    StructField("FINISHED_AT", TimestampType()),
+    StructField("SUITE_NAME", StringType()),
+    StructField("SUITE_VERSION", IntegerType()),
+    StructField("TEST_ID", StringType()),
+    StructField("STATUS", StringType()),
+    StructField("ROW_COUNT", IntegerType()),
+    StructField("DIGEST", StringType()),
+    StructField("FINGERPRINT", StringType()),
+    StructField("CHANGES", StringType()),
+    StructField("ELAPSED_SECONDS", DoubleType()),
+    StructField("QUERY_ID", StringType()),
+])
+
+# The procedure only needs these modules besides this file, which is uploaded as the handler.
+# configuration.py holds settings only; the secrets stay in CREDENTIALS_MODULE, which is never staged.
+PROCEDURE_IMPORTS = ["configuration.py", "result_fingerprint.py", "suite_bundle.py"]
+
+
+def task_name(settings, suite_name):
+    return f"{settings['task_prefix']}_{re.sub(r'[^A-Za-z0-9_]+', '_', suite_name).strip('_')}".upper()
+
+
+def _sql_literal(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+class ScheduledRegressionStore:
+    """
+    The materialized suites and their scheduled verdicts in Snowflake tables.
+    Both tables are append-only; a suite version is materialized once and
+    never changes, like its bundle on disk.
+    """
+
+    def __init__(self, session, settings):
+        self.session = session
+        self.tests_table = settings["tests_table"]
+        self.results_table = settings["results_table"]
+
+    def _append(self, table, schema, rows):
+        self.session.create_dataframe(rows, schema=schema).write.save_as_table(table, mode="append")
+
+    def _suite_filter(self, suite_name, suite_version):
+        return (col("SUITE_NAME") == suite_name) & (col("SUITE_VERSION") == suite_version)
+
+    def load_tests(self, suite_name, suite_version):
+        try:
+            rows = self.session.table(self.tests_table).filter(
+                self._suite_filter(suite_name, suite_version)
+            ).sort(col("TEST_ID")).collect()
+        except Exception as e:
+            print(f"Could not read the tests of suite {suite_name} v{suite_version}: {e}")
+            return []
+        return [
+            {
+                "id": row["TEST_ID"],
+                "sql": row["SQL_TEXT"],
+                "expected": {
+                    "headers": json.loads(row["EXPECTED_HEADERS"]),
+                    "fingerprint": json.loads(row["EXPECTED_FINGERPRINT"]),
+                },
+            }
+            for row in rows
+        ]
+
+    def materialize(self, manifest):
+        """
+        Writes a loaded suite bundle's tests to the tests table unless this
+        version is already there. Returns the number of tests written.
+        """
+        if self.load_tests(manifest["suite_name"], manifest["version"]):
+            print(f"Suite {manifest['suite_name']} v{manifest['version']} is already materialized")
+            return 0
+        materialized_at = datetime.datetime.now()
+        self._append(self.tests_table, TESTS_SCHEMA, [
+            [manifest["suite_name"], manifest["version"], test["id"], test["sql"],
+             json.dumps(test["expected"].get("headers")), json.dumps(test["expected"].get("fingerprint")), materialized_at]
+            for test in manifest["tests"]
+        ])
+        print(f"Materialized {len(manifest['tests'])} tests of {manifest['suite_name']} v{manifest['version']}")
+        return len(manifest["tests"])
+
+    def record_results(self, run_id, suite_name, suite_version, outcomes):
+        finished_at = datetime.datetime.now()
+        self._append(self.results_table, RESULTS_SCHEMA, [
+            [run_id, finished_at, suite_name, suite_version, outcome["id"], outcome["status"],
+             outcome["fingerprint"]["row_count"] if outcome["fingerprint"] else None,
+             outcome["fingerprint"]["digest"] if outcome["fingerprint"] else None,
+             json.dumps(outcome["fingerprint"]), json.dumps(outcome["changes"]),
+             outcome["elapsed_seconds"], outcome["query_id"]]
+            for outcome in outcomes
+        ])
+
+    def fetch_results(self, suite_name=None, after=None, limit=500):
+        """
+        Returns up to `limit` verdicts that sort after `after`, oldest first,
+        so callers only ever read the rows they have not seen. `after` is the
+        `cursor` of the last result of an earlier fetch: every verdict of a run
+        shares one FINISHED_AT, so a page can end partway through a run and
+        the next one resumes on (FINISHED_AT, RUN_ID, TEST_ID). The full
+        fingerprints stay in Snowflake.
+        """
+        results = self.session.table(self.results_table)
+        if suite_name is not None:
+            results = results.filter(col("SUITE_NAME") == suite_name)
+        if after is not None:
+            finished_at, run_id, test_id = after
+            results = results.filter(
+                (col("FINISHED_AT") > finished_at)
+                | ((col("FINISHED_AT") == finished_at) & (col("RUN_ID") > run_id))
+                | ((col("FINISHED_AT") == finished_at) & (col("RUN_ID") == run_id) & (col("TEST_ID") > test_id))
+            )
+        rows = results.select(
+            "RUN_ID", "FINISHED_AT", "SUITE_NAME", "SUITE_VERSION", "TEST_ID", "STATUS",
+            "ROW_COUNT", "DIGEST", "CHANGES", "ELAPSED_SECONDS"
+        ).sort(col("FINISHED_AT"), col("RUN_ID"), col("TEST_ID")).limit(limit).collect()
+        return [
+            {
+                "run_id": row["RUN_ID"],
+                "finished_at": row["FINISHED_AT"],
+                "suite_name": row["SUITE_NAME"],
+                "suite_version": row["SUITE_VERSION"],
+                "test_id": row["TEST_ID"],
+                "status": row["STATUS"],
+                "row_count": row["ROW_COUNT"],
+                "digest": row["DIGEST"],
+                "changes": json.loads(row["CHANGES"]),
+                "elapsed_seconds": row["ELAPSED_SECONDS"],
+                "cursor": (row["FINISHED_AT"], row["RUN_ID"], row["TEST_ID"]),
+            }
+            for row in rows
+        ]
+
+
+def run_suite(session, suite_name, suite_version, settings):
+    """
+    Runs every materialized test of the suite version, fingerprints the full
+    results with HASH_AGG over RESULT_SCAN and records the verdicts. All
+    queries are submitted before any is awaited so the warehouse runs them
+    concurrently. Returns {"run_id", "passed", "changed", "failed", ...}.
+    """
+    store = ScheduledRegressionStore(session, settings)
+    fingerprinter = ResultFingerprinter(ConfigurationExecutor().get_fingerprint_settings()["max_columns"])
+    statement_params = {"STATEMENT_TIMEOUT_IN_SECONDS": settings["statement_timeout_seconds"]}
+    run_id = f"scheduled-{uuid.uuid4().hex}"
+    start_time = time.time()
+
+    tests = store.load_tests(suite_name, suite_version)
+    submitted = []
+    for test in tests:
+        try:
+            df = session.sql(test["sql"])
+            headers = [field.name for field in df.schema.fields]
+            submitted.append((test, headers, df.collect_nowait(statement_params=statement_params), None))
+        except Exception as e:
+            submitted.append((test, None, None, e))
+
+    outcomes = []
+    for test, headers, async_job, error in submitted:
+        outcome = {"id": test["id"], "fingerprint": None, "query_id": None}
+        if error is None:
+            try:
+                async_job.result(result_type="no_result")
+                outcome["query_id"] = async_job.query_id
+                outcome["fingerprint"] = fingerprinter.compute(session, async_job.query_id, headers)
+                result_data = {"headers": headers, "fingerprint": outcome["fingerprint"]}
+            except Exception as e:
+                error = e
+        if error is not None:
+            result_data = {"headers": ["Error"], "data": [[f"SQL Error: {str(error)}"]]}
+        outcome["status"], outcome["changes"] = compare_to_expected(test["expected"], result_data)
+        # Tests run concurrently, so this is the time from submission to the verdict
+        outcome["elapsed_seconds"] = round(time.time() - start_time, 3)
+        outcomes.append(outcome)
+
+    if outcomes:
+        store.record_results(run_id, suite_name, suite_version, outcomes)
+    statuses = [outcome["status"] for outcome in outcomes]
+    summary = {
+        "run_id": run_id,
+        "suite_name": suite_name,
+        "version": suite_version,
+        "tests": len(outcomes),
+        "passed": statuses.count("PASS"),
+        "changed": statuses.count("CHANGED"),
+        "failed": statuses.count("FAIL"),
+        "elapsed_seconds": round(time.time() - start_time, 3),
+    }
+    print(f"Scheduled regression {suite_name} v{suite_version}: {summary}")
+    return summary
+
+
+def run_regression_procedure(session, suite_name, suite_version):
+    """
+    Stored procedure handler; returns the run summary as JSON.
+    """
+    settings = ConfigurationExecutor().get_scheduled_regression_settings()
+    return json.dumps(run_suite(session, suite_name, int(suite_version), settings))
+
+
+def register_procedure(session, settings):
+    """
+    Uploads the handler and its few modules and (re)registers the permanent
+    procedure. Returns the procedure name.
+    """
+    if CREDENTIALS_MODULE in PROCEDURE_IMPORTS:
+        raise ValueError(f"{CREDENTIALS_MODULE} holds secrets and must not be uploaded to a stage")
+    session.sql(f"CREATE STAGE IF NOT EXISTS {settings['stage']}").collect()
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    session.sproc.register_from_file(
+        file_path=os.path.abspath(__file__),
+        func_name="run_regression_procedure",
+        name=settings["procedure_name"],
+        return_type=StringType(),
+        input_types=[StringType(), IntegerType()],
+        is_permanent=True,
+        stage_location=f"@{settings['stage']}",
+        imports=[os.path.join(module_dir, module) for module in PROCEDURE_IMPORTS],
+        packages=settings["packages"],
+        replace=True,
+        execute_as="owner",
+    )
+    return settings["procedure_name"]
+
+
+def schedule_suite(session, suite_dir, schedule=None, warehouse=None):
+    """
+    Materializes the bundle in `suite_dir`, registers the procedure and
+    creates (or replaces) the suite's TASK, which starts resumed. A suite has
+    one task; scheduling a newer version moves the task to that version.
+    Returns the task name.
+    """
+    settings = ConfigurationExecutor().get_scheduled_regression_settings()
+    manifest = load_test_suite(suite_dir)
+    ScheduledRegressionStore(session, settings).materialize(manifest)
+    procedure_name = register_procedure(session, settings)
+
+    name = task_name(settings, manifest["suite_name"])
+    warehouse = warehouse or settings["warehouse"] or ConfigurationExecutor().get_connection_params()["warehouse"]
+    session.sql(
+        f"CREATE OR REPLACE TASK {name} WAREHOUSE = {warehouse} "
+        f"SCHEDULE = {_sql_literal(schedule or settings['schedule'])} "
+        f"AS CALL {procedure_name}({_sql_literal(manifest['suite_name'])}, {int(manifest['version'])})"
+    ).collect()
+    session.sql(f"ALTER TASK {name} RESUME").collect()
+    print(f"Scheduled {manifest['suite_name']} v{manifest['version']} as task {name} ({schedule or settings['schedule']})")
+    return name
+
+
+def unschedule_suite(session, suite_name):
+    """
+    Drops the suite's task; its materialized tests and past verdicts stay.
+    """
+    name = task_name(ConfigurationExecutor().get_scheduled_regression_settings(), suite_name)
+    session.sql(f"DROP TASK IF EXISTS {name}").collect()
+    print(f"Dropped task {name}")
+    return name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schedule exported SQL test suites as Snowflake tasks and read their verdicts.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    schedule_parser = subcommands.add_parser("schedule", help="Materialize a suite bundle and create its task")
+    schedule_parser.add_argument("suite_dir", help="Bundle directory containing suite.json")
+    schedule_parser.add_argument("--schedule", help="Task SCHEDULE, e.g. 'USING CRON 0 6 * * * UTC' or '60 MINUTE'")
+    schedule_parser.add_argument("--warehouse", help="Warehouse the task runs on (default from settings)")
+    run_parser = subcommands.add_parser("run", help="CALL the procedure once now, outside the schedule")
+    run_parser.add_argument("suite_name")
+    run_parser.add_argument("version", type=int)
+    results_parser = subcommands.add_parser("results", help="Print recorded verdicts")
+    results_parser.add_argument("--suite", help="Only this suite")
+    unschedule_parser = subcommands.add_parser("unschedule", help="Drop a suite's task")
+    unschedule_parser.add_argument("suite_name")
+    args = parser.parse_args(argv)
+
+    config = ConfigurationExecutor()
+    settings = config.get_scheduled_regression_settings()
+    session = Session.builder.configs(config.get_connection_params()).create()
+
+    if args.command == "schedule":
+        schedule_suite(session, args.suite_dir, args.schedule, args.warehouse)
+    elif args.command == "unschedule":
+        unschedule_suite(session, args.suite_name)
+    elif args.command == "run":
+        summary = json.loads(session.call(settings["procedure_name"], args.suite_name, args.version))
+        print(
+            f"{summary['suite_name']} v{summary['version']}: {summary['passed']} passed, "
+            f"{summary['changed']} changed, {summary['failed']} failed in {summary['elapsed_seconds']:.1f}s"
+        )
+        return 0 if summary["changed"] == 0 and summary["failed"] == 0 else 1
+    else:
+        for result in ScheduledRegressionStore(session, settings).fetch_results(args.suite, limit=settings["fetch_limit"]):
+            print(
+                f"{result['finished_at']} {result['suite_name']} v{result['suite_version']} "
+                f"{result['test_id']} {result['status']:8} {result['row_count']} rows"
+            )
+            for change in result["changes"]:
+                print(f"         - {change}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
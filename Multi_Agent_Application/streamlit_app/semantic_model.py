@@ -0,0 +1,88 @@
+import os
+from functools import lru_cache
+
+import yaml
+
+
+SEMANTIC_MODEL_FILE = "semantic_model_pc_insurance.yaml"
+DEFAULT_SEMANTIC_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data_setup", SEMANTIC_MODEL_FILE
+)
+if not os.path.exists(DEFAULT_SEMANTIC_MODEL_PATH):
+    # Deployed next to the modules, e.g. as a stored procedure import
+    DEFAULT_SEMANTIC_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), SEMANTIC_MODEL_FILE)
+
+
+class SemanticModel:
+    """
+    Tables, primary keys and foreign-key relationships of the P&C Insurance
+    semantic model. Table and column lookups are case-insensitive, matching
+    Snowflake's handling of unquoted identifiers.
+    """
+
+    def __init__(self, model_dict):
+        semantic_model = model_dict["semantic_model"]
+        self.name = semantic_model["name"]
+        self.tables = {}
+        for table in semantic_model["tables"]:
+            columns = [column["name"] for column in table["columns"]]
+            primary_keys = [column["name"] for column in table["columns"] if column.get("is_primary_key")]
+            self.tables[table["name"].upper()] = {
+                "name": table["name"],
+                "columns": columns,
+                "data_types": {column["name"]: column.get("data_type", "VARCHAR") for column in table["columns"]},
+                "primary_keys": primary_keys,
+            }
+
+        self.relationships = []
+        for relationship in semantic_model.get("relationships", []):
+            self.relationships.append((
+                relationship["from_table"], relationship["from_column"],
+                relationship["to_table"], relationship["to_column"],
+            ))
+        self._join_keys = set()
+        for from_table, from_column, to_table, to_column in self.relationships:
+            self._join_keys.add((from_table.upper(), from_column.upper(), to_table.upper(), to_column.upper()))
+            self._join_keys.add((to_table.upper(), to_column.upper(), from_table.upper(), from_column.upper()))
+
+    def get_table(self, table_name):
+        """
+        Returns the table entry for a (possibly qualified) table name, or None.
+        """
+        return self.tables.get(table_name.split(".")[-1].strip('"').upper())
+
+    def table_names(self):
+        return [table["name"] for table in self.tables.values()]
+
+    def is_key_join(self, left_table, left_column, right_table, right_column):
+        """
+        True when the column pair is a declared FK relationship, or both sides
+        are the same-named key column (e.g. two tables sharing PolicyID).
+        """
+        key = (left_table.upper(), left_column.upper(), right_table.upper(), right_column.upper())
+        if key in self._join_keys:
+            return True
+        if left_column.upper() != right_column.upper():
+            return False
+        left_keys = {column.upper() for column in self._key_columns(left_table)}
+        right_keys = {column.upper() for column in self._key_columns(right_table)}
+        return left_column.upper() in left_keys and right_column.upper() in right_keys
+
+    def _key_columns(self, table_name):
+        table = self.get_table(table_name)
+        if table is None:
+            return []
+        foreign_keys = [
+            from_column for from_table, from_column, _, _ in self.relationships
+            if from_table.upper() == table["name"].upper()
+        ]
+        return table["primary_keys"] + foreign_keys
+
+
+@lru_cache(maxsize=4)
+def load_semantic_model(path=DEFAULT_SEMANTIC_MODEL_PATH):
+    """
+    Loads and caches the semantic model YAML.
+    """
+    with open(path, encoding="utf-8") as f:
+        return SemanticModel(yaml.safe_load(f))
@@ -0,0 +1,308 @@
+"""
+Runs the whole three-agent pipeline inside Snowflake as a Snowpark Python
+stored procedure. One CALL analyzes the requirements with Cortex, generates
+and executes the SQL, and appends progress events and results to tables; the
+app only submits the CALL asynchronously and polls those tables, so prompts,
+queries and result rows never travel through the Streamlit host.
+
+From the Multi_Agent_Application directory:
+    python streamlit_app/server_pipeline.py deploy
+    python streamlit_app/server_pipeline.py run data_setup/sample_requirements_p_and_c_insurance.txt
+
+Local harness: the same pipeline code against a Snowpark local testing
+session for the result tables, the mock LLM and a fake warehouse for the
+generated queries:
+    python streamlit_app/server_pipeline.py local data_setup/sample_requirements_p_and_c_insurance.txt
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from snowflake.snowpark import Session
+from snowflake.snowpark.functions import col, current_timestamp
+from snowflake.snowpark.types import IntegerType, StringType, StructField, StructType, TimestampType
+
+from configuration import CREDENTIALS_MODULE, ConfigurationExecutor
+from run_store import document_hash
+
+
+EVENTS_SCHEMA = StructType([
+    StructField("RUN_ID", StringType()),
+    StructField("EVENT_TIME", TimestampType()),
+    StructField("AGENT", IntegerType()),
+    StructField("STATUS", StringType()),
+])
+RUNS_SCHEMA = StructType([
+    StructField("RUN_ID", StringType()),
+    StructField("DOCUMENT_HASH", StringType()),
+    StructField("STATUS", StringType()),
+    StructField("FINISHED_AT", TimestampType()),
+    StructField("USE_CASES", StringType()),
+    StructField("GENERATED_SQL", StringType()),
+    StructField("ERRORS", StringType()),
+    StructField("TIMINGS", StringType()),
+])
+QUERIES_SCHEMA = StructType([
+    StructField("RUN_ID", StringType()),
+    StructField("POSITION", IntegerType()),
+    StructField("SQL_TEXT", StringType()),
+    StructField("STATUS", StringType()),
+    StructField("RESULT", StringType()),
+])
+
+# Modules the procedure does not need (this file is uploaded as the handler itself), and the secrets
+DEPLOY_EXCLUDE = {"app.py", "load_test.py", "server_pipeline.py", "synthetic_data.py", CREDENTIALS_MODULE}
+FINAL_STATUSES = ("COMPLETE", "FAILED", "CANCELLED")
+
+
+class ServerRunStore:
+    """
+    Progress events and results of server-side runs in Snowflake tables.
+    Writes are append-only DataFrame saves (no UPDATE), which keeps concurrent
+    runs from contending and also works on a local testing session. Runs are
+    read back in the JobRunner job format so the app can display them as-is.
+    """
+
+    def __init__(self, session, settings):
+        self.session = session
+        self.events_table = settings["events_table"]
+        self.runs_table = settings["runs_table"]
+        self.queries_table = settings["queries_table"]
+
+    def _append(self, table, schema, rows):
+        self.session.create_dataframe(rows, schema=schema).write.save_as_table(table, mode="append")
+
+    def record_event(self, run_id, agent_num, status):
+        """
+        Agent 0 events carry the run status (QUEUED, RUNNING, CANCELLED).
+        EVENT_TIME is taken from CURRENT_TIMESTAMP() so events written by the
+        app and by the procedure order on the same clock.
+        """
+        event = self.session.create_dataframe(
+            [[run_id, agent_num, status]],
+            schema=StructType([field for field in EVENTS_SCHEMA.fields if field.name != "EVENT_TIME"]),
+        )
+        event.select(
+            col("RUN_ID"), current_timestamp().cast(TimestampType()).alias("EVENT_TIME"), col("AGENT"), col("STATUS")
+        ).write.save_as_table(self.events_table, mode="append")
+
+    def record_run(self, run_id, requirements_text, results, status):
+        self._append(self.runs_table, RUNS_SCHEMA, [[
+            run_id, document_hash(requirements_text), status, datetime.datetime.now(),
+            json.dumps(results.get("high_level_use_cases")), json.dumps(results.get("generated_sql_queries")),
+            json.dumps(results.get("errors", [])), json.dumps(results.get("timings", {})),
+        ]])
+        execution_results = results.get("sql_execution_results") or {}
+        if execution_results:
+            self._append(self.queries_table, QUERIES_SCHEMA, [
+                [run_id, position, sql_query, (result_data.get("regression") or {}).get("status") or result_data.get("status"),
+                 json.dumps(result_data, default=str)]
+                for position, (sql_query, result_data) in enumerate(execution_results.items())
+            ])
+
+    def get_job(self, run_id):
+        """
+        Returns the run as a job dict ({"job_id", "status", "agent_status", "results", "cancel_reason"}), or None.
+        """
+        try:
+            events = self.session.table(self.events_table).filter(col("RUN_ID") == run_id).sort(col("EVENT_TIME")).collect()
+        except Exception as e:
+            print(f"Could not read events of server run {run_id}: {e}")
+            return None
+        if not events:
+            return None
+
+        job = {
+            "job_id": run_id,
+            "status": "QUEUED",
+            "agent_status": {"1": "PENDING", "2": "PENDING", "3": "PENDING"},
+            "results": None,
+            "cancel_reason": None,
+            "server_side": True,
+        }
+        for event in events:
+            if event["AGENT"] == 0:
+                # A cancelled procedure never records its run, so a final status sticks whatever follows it
+                if job["status"] not in FINAL_STATUSES:
+                    job["status"] = event["STATUS"]
+            else:
+                job["agent_status"][str(event["AGENT"])] = event["STATUS"]
+        if job["status"] == "CANCELLED":
+            job["cancel_reason"] = "Cancelled by user"
+
+        try:
+            runs = self.session.table(self.runs_table).filter(col("RUN_ID") == run_id).collect()
+        except Exception:
+            runs = []
+        if runs:
+            run = runs[-1]
+            if job["status"] != "CANCELLED":
+                job["status"] = run["STATUS"]
+            queries = self.session.table(self.queries_table).filter(col("RUN_ID") == run_id).sort(col("POSITION")).collect()
+            job["results"] = {
+                "run_id": run_id,
+                "high_level_use_cases": json.loads(run["USE_CASES"]),
+                "generated_sql_queries": json.loads(run["GENERATED_SQL"]),
+                "sql_execution_results": {row["SQL_TEXT"]: json.loads(row["RESULT"]) for row in queries} or None,
+                "errors": json.loads(run["ERRORS"]),
+                "timings": json.loads(run["TIMINGS"]),
+            }
+        return job
+
+
+def execute_pipeline(session, requirements_text, run_id, provider_name=None, query_session=None):
+    """
+    Runs the three agents on `session` and records progress and results through
+    ServerRunStore. `query_session` executes the generated SQL instead of
+    `session` (the local harness passes a fake warehouse). Returns a summary dict.
+    """
+    from agent1_requirements_analyzer import Agent1RequirementsAnalyzer
+    from agent2_sql_generator import Agent2SQLGenerator
+    from agent3_sql_executor import Agent3SQLExecutor
+    from pipeline_orchestrator import PipelineOrchestrator
+
+    store = ServerRunStore(session, ConfigurationExecutor().get_server_pipeline_settings())
+    store.record_event(run_id, 0, "RUNNING")
+    try:
+        agent1 = Agent1RequirementsAnalyzer(session=session, provider_name=provider_name)
+        agent2 = Agent2SQLGenerator(session=session, provider_name=provider_name)
+        agent3 = Agent3SQLExecutor(spill_mode=False, session=query_session or session)
+        # A procedure cannot open sessions on other warehouses and has no lasting local run store
+        agent3.routing_enabled = False
+        agent3.run_store = None
+        results = PipelineOrchestrator(agent1, agent2, agent3).run(
+            requirements_text, run_id, spill_mode=False,
+            on_progress=lambda agent_num, status, results: store.record_event(run_id, agent_num, status)
+        )
+        status = "FAILED" if results["errors"] and not results.get("sql_execution_results") else "COMPLETE"
+    except Exception as e:
+        print(f"Server-side pipeline run {run_id} failed: {e}")
+        results = {"run_id": run_id, "errors": [f"Orchestration Error: {str(e)}"], "timings": {}}
+        status = "FAILED"
+
+    store.record_run(run_id, requirements_text, results, status)
+    return {
+        "run_id": run_id,
+        "status": status,
+        "queries": len(results.get("sql_execution_results") or {}),
+        "errors": results["errors"],
+        "timings": results.get("timings", {}),
+    }
+
+
+def run_pipeline_procedure(session, requirements_text, run_id, provider_name):
+    """
+    Stored procedure handler; returns the run summary as JSON.
+    """
+    if sys._xoptions.get("snowflake_import_directory"):
+        # Relative paths from the configuration (example index, run files) must be writable
+        os.chdir(tempfile.gettempdir())
+    return json.dumps(execute_pipeline(session, requirements_text, run_id, provider_name or None))
+
+
+def deploy(session):
+    """
+    Uploads the agent modules and the semantic model to the code stage and
+    (re)registers the permanent procedure. Returns the procedure name.
+    """
+    from semantic_model import DEFAULT_SEMANTIC_MODEL_PATH
+
+    settings = ConfigurationExecutor().get_server_pipeline_settings()
+    session.sql(f"CREATE STAGE IF NOT EXISTS {settings['stage']}").collect()
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    imports = [
+        path for path in sorted(glob.glob(os.path.join(module_dir, "*.py")))
+        if os.path.basename(path) not in DEPLOY_EXCLUDE
+    ]
+    imports.append(os.path.abspath(DEFAULT_SEMANTIC_MODEL_PATH))
+    session.sproc.register_from_file(
+        file_path=os.path.abspath(__file__),
+        func_name="run_pipeline_procedure",
+        name=settings["procedure_name"],
+        return_type=StringType(),
+        input_types=[StringType(), StringType(), StringType()],
+        is_permanent=True,
+        stage_location=f"@{settings['stage']}",
+        imports=imports,
+        packages=settings["packages"],
+        replace=True,
+        execute_as="caller",
+    )
+    print(f"Registered stored procedure {settings['procedure_name']} with {len(imports)} imports")
+    return settings["procedure_name"]
+
+
+def submit_server_run(session, requirements_text, provider_name=None):
+    """
+    Starts the procedure asynchronously and returns (run_id, query_id) without
+    waiting; progress is read back with ServerRunStore.get_job.
+    """
+    settings = ConfigurationExecutor().get_server_pipeline_settings()
+    run_id = uuid.uuid4().hex
+    ServerRunStore(session, settings).record_event(run_id, 0, "QUEUED")
+    async_job = session.sql(
+        f"CALL {settings['procedure_name']}(?, ?, ?)",
+        params=[requirements_text, run_id, provider_name or settings["provider"]],
+    ).collect_nowait()
+    print(f"Submitted server-side pipeline run {run_id} (query {async_job.query_id})")
+    return run_id, async_job.query_id
+
+
+def cancel_server_run(session, run_id, query_id):
+    settings = ConfigurationExecutor().get_server_pipeline_settings()
+    session.sql("SELECT SYSTEM$CANCEL_QUERY(?)", params=[query_id]).collect()
+    ServerRunStore(session, settings).record_event(run_id, 0, "CANCELLED")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deploy, run or locally test the server-side pipeline procedure.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("deploy", help="Upload the code and register the stored procedure")
+    run_parser = subcommands.add_parser("run", help="CALL the deployed procedure and poll until it finishes")
+    run_parser.add_argument("requirements_file")
+    run_parser.add_argument("--provider", help="LLM provider inside the procedure (default from settings)")
+    local_parser = subcommands.add_parser("local", help="Run the procedure code against Snowpark local testing")
+    local_parser.add_argument("requirements_file")
+    local_parser.add_argument("--warehouse-latency", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    config = ConfigurationExecutor()
+    if args.command == "deploy":
+        deploy(Session.builder.configs(config.get_connection_params()).create())
+        return 0
+
+    with open(args.requirements_file, encoding="utf-8") as f:
+        requirements_text = f.read().strip()
+
+    if args.command == "local":
+        from load_test import FakeWarehouseSession
+
+        session = Session.builder.config("local_testing", True).create()
+        run_id = uuid.uuid4().hex
+        execute_pipeline(session, requirements_text, run_id, "mock", query_session=FakeWarehouseSession(args.warehouse_latency))
+    else:
+        session = Session.builder.configs(config.get_connection_params()).create()
+        run_id, _ = submit_server_run(session, requirements_text, args.provider)
+
+    store = ServerRunStore(session, config.get_server_pipeline_settings())
+    while True:
+        job = store.get_job(run_id)
+        status = job["status"] if job else "QUEUED"
+        print(f"Run {run_id}: {status} (agents {job['agent_status'] if job else {}})")
+        if status in FINAL_STATUSES:
+            break
+        time.sleep(config.get_job_settings()["poll_interval_seconds"])
+
+    results = job["results"] or {}
+    print(f"{len(results.get('sql_execution_results') or {})} queries, {len(results.get('errors') or [])} errors")
+    return 0 if job["status"] == "COMPLETE" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
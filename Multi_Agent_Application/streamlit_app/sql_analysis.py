@@ -0,0 +1,246 @@
+"""
+Lightweight, dependency-free SQL inspection helpers for generated Snowflake
+queries. This is not a full parser: it understands enough structure
+(comments, literals, subqueries, FROM/JOIN lists, qualified predicates) to
+drive the cost guard and other pre-execution checks.
+"""
+import re
+
+
+SUBQUERY_PLACEHOLDER = "__SUBQUERY__"
+
+SUBQUERY_START = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+SET_OPERATOR = re.compile(r"\bUNION(?:\s+ALL)?\b|\bINTERSECT\b|\bEXCEPT\b|\bMINUS\b", re.IGNORECASE)
+FROM_CLAUSE = re.compile(
+    r"\bFROM\b(.*?)(?=\bWHERE\b|\bGROUP\s+BY\b|\bHAVING\b|\bQUALIFY\b|\bORDER\s+BY\b|\bLIMIT\b|\bFETCH\b|\bWINDOW\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+JOIN_SEPARATOR = re.compile(
+    r"(,|\b(?:NATURAL\s+)?(?:(?:LEFT|RIGHT|FULL)(?:\s+OUTER)?\s+|INNER\s+|CROSS\s+)?JOIN\b)",
+    re.IGNORECASE,
+)
+QUALIFIED_EQUALITY = re.compile(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)\b")
+AGGREGATE_CALL = re.compile(
+    r"\b(COUNT|COUNT_IF|SUM|AVG|MIN|MAX|MEDIAN|LISTAGG|ARRAY_AGG|APPROX_COUNT_DISTINCT|STDDEV|VARIANCE|ANY_VALUE)\s*\(",
+    re.IGNORECASE,
+)
+REFERENCE_STOP_WORDS = {
+    "ON", "USING", "SAMPLE", "TABLESAMPLE", "AT", "BEFORE", "CHANGES", "MATCH_RECOGNIZE",
+    "PIVOT", "UNPIVOT", "LATERAL", "WHERE", "GROUP", "ORDER", "LIMIT", "HAVING", "QUALIFY",
+    "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "NATURAL", "UNION",
+    "INTERSECT", "EXCEPT", "MINUS", "WINDOW", "FETCH",
+}
+TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w$.]*)", re.IGNORECASE)
+ALIAS_AFTER_REFERENCE = re.compile(r"\s+(?:AS\s+)?([A-Za-z_]\w*)", re.IGNORECASE)
+COMMA_REFERENCE = re.compile(r"\s*,\s*([A-Za-z_][\w$.]*)")
+
+
+def mask_sql(sql):
+    """
+    Blanks out comments and the contents of string literals so keywords inside
+    them cannot confuse the regex-based analysis. The result has the same
+    length as the input, so match offsets map back onto the original SQL.
+    """
+    def blank(match):
+        text = match.group(0)
+        if text.startswith("'"):
+            return "'" + " " * (len(text) - 2) + "'"
+        return re.sub(r"[^\n]", " ", text)
+
+    return re.sub(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", blank, sql, flags=re.DOTALL)
+
+
+def split_scopes(sql):
+    """
+    Splits masked SQL into SELECT scopes. Every parenthesized SELECT/WITH body
+    (subqueries, CTE bodies, derived tables) becomes its own scope and is
+    replaced by SUBQUERY_PLACEHOLDER in its parent. The top-level scope is last.
+    """
+    scopes = []
+    _extract_scopes(sql, scopes)
+    return scopes
+
+
+def _extract_scopes(text, scopes):
+    out = []
+    i = 0
+    while i < len(text):
+        if text[i] == "(" and SUBQUERY_START.match(text, i + 1):
+            depth = 1
+            j = i + 1
+            while j < len(text) and depth:
+                if text[j] == "(":
+                    depth += 1
+                elif text[j] == ")":
+                    depth -= 1
+                j += 1
+            _extract_scopes(text[i + 1:j - 1], scopes)
+            out.append(f" {SUBQUERY_PLACEHOLDER} ")
+            i = j
+        else:
+            out.append(text[i])
+            i += 1
+    scopes.append("".join(out))
+
+
+def split_set_operations(scope):
+    """
+    Splits a scope on UNION / INTERSECT / EXCEPT / MINUS into its SELECT branches.
+    """
+    return [branch for branch in SET_OPERATOR.split(scope) if branch.strip()]
+
+
+def flatten_parentheses(text):
+    """
+    Blanks out everything inside parentheses (function arguments, ON groups)
+    so clause keywords are only matched at depth 0.
+    """
+    out = []
+    depth = 0
+    for char in text:
+        if char == "(":
+            depth += 1
+            out.append(char)
+        elif char == ")":
+            depth = max(depth - 1, 0)
+            out.append(char)
+        else:
+            out.append(char if depth == 0 else " ")
+    return "".join(out)
+
+
+def parse_table_references(branch):
+    """
+    Returns the FROM/JOIN references of one SELECT branch as dicts:
+        {"name", "alias", "join_type", "has_condition", "uses_using"}
+    where join_type is FROM, COMMA, JOIN, CROSS or NATURAL.
+    """
+    flat = flatten_parentheses(branch)
+    match = FROM_CLAUSE.search(flat)
+    if not match:
+        return []
+
+    # Separators are found on the flattened text (so commas inside function
+    # calls are ignored) and the parts re-read from the original branch so ON
+    # conditions stay intact; flattening preserves character offsets.
+    flat_clause = flat[match.start(1):match.end(1)]
+    clause = branch[match.start(1):match.end(1)]
+    segments = []
+    join_type = "FROM"
+    position = 0
+    for separator in JOIN_SEPARATOR.finditer(flat_clause):
+        segments.append((join_type, clause[position:separator.start()]))
+        keyword = separator.group(0).upper()
+        if keyword == ",":
+            join_type = "COMMA"
+        elif keyword.startswith("CROSS"):
+            join_type = "CROSS"
+        elif keyword.startswith("NATURAL"):
+            join_type = "NATURAL"
+        else:
+            join_type = "JOIN"
+        position = separator.end()
+    segments.append((join_type, clause[position:]))
+
+    references = []
+    for join_type, part in segments:
+        tokens = part.split()
+        if not tokens:
+            continue
+        name = tokens[0].rstrip(",")
+        alias = name.split(".")[-1]
+        rest = tokens[1:]
+        if rest and rest[0].upper() == "AS":
+            rest = rest[1:]
+        if rest and rest[0].upper() not in REFERENCE_STOP_WORDS and re.fullmatch(r"\w+", rest[0]):
+            alias = rest[0]
+        references.append({
+            "name": name,
+            "alias": alias,
+            "join_type": join_type,
+            "has_condition": bool(re.search(r"\b(ON|USING)\b", part, re.IGNORECASE)),
+            "uses_using": bool(re.search(r"\bUSING\b", part, re.IGNORECASE)),
+        })
+    return references
+
+
+def find_table_reference_spans(masked_sql):
+    """
+    Locates every table named after FROM / JOIN (or later in a comma-separated
+    FROM list) in the full masked SQL, across all scopes. Returns dicts
+        {"name", "start", "end", "alias_end"}
+    with offsets into the SQL; `alias_end` is where a clause that must follow
+    the alias (such as SAMPLE) can be inserted.
+    """
+    spans = []
+    for match in TABLE_REFERENCE.finditer(masked_sql):
+        start, end = match.span(1)
+        while True:
+            alias_end = end
+            alias = ALIAS_AFTER_REFERENCE.match(masked_sql, end)
+            if alias and alias.group(1).upper() not in REFERENCE_STOP_WORDS:
+                alias_end = alias.end()
+            spans.append({"name": masked_sql[start:end], "start": start, "end": end, "alias_end": alias_end})
+
+            comma = COMMA_REFERENCE.match(masked_sql, alias_end)
+            if not comma:
+                break
+            start, end = comma.span(1)
+    return spans
+
+
+def qualified_equalities(text):
+    """
+    Returns (left_alias, left_column, right_alias, right_column) for every
+    `a.x = b.y` predicate in the text.
+    """
+    return QUALIFIED_EQUALITY.findall(text)
+
+
+def is_aggregate_branch(branch):
+    """
+    True when the branch reduces rows (GROUP BY or a non-windowed aggregate in the select list).
+    """
+    flat = flatten_parentheses(branch)
+    if re.search(r"\bGROUP\s+BY\b", flat, re.IGNORECASE):
+        return True
+    select_list = re.split(r"\bFROM\b", flat, maxsplit=1, flags=re.IGNORECASE)[0]
+    for call in AGGREGATE_CALL.finditer(select_list):
+        following = select_list[call.end():]
+        closing = following.find(")")
+        if not re.match(r"\s*OVER\b", following[closing + 1:], re.IGNORECASE):
+            return True
+    return False
+
+
+def is_select_statement(sql):
+    """
+    True when the text starts (after comments) with SELECT or WITH.
+    """
+    return bool(SUBQUERY_START.match(mask_sql(sql)))
+
+
+def has_row_limit(scope):
+    flat = flatten_parentheses(scope)
+    return bool(re.search(r"\bLIMIT\s+\d+|\bFETCH\s+(FIRST|NEXT)\b|\bSELECT\s+(DISTINCT\s+)?TOP\s+\d+", flat, re.IGNORECASE))
+
+
+def has_order_by(scope):
+    return bool(re.search(r"\bORDER\s+BY\b", flatten_parentheses(scope), re.IGNORECASE))
+
+
+def has_unordered_limit(sql):
+    """
+    True when some scope caps its rows (LIMIT, FETCH, TOP) without an ORDER BY,
+    so which rows come back can differ between runs of the same query.
+    """
+    return any(has_row_limit(scope) and not has_order_by(scope) for scope in split_scopes(mask_sql(sql)))
+
+
+def strip_statement_terminators(sql):
+    """
+    Drops trailing semicolons, whitespace and comments, so text appended to
+    the statement (a LIMIT, a statement separator) cannot end up inside a
+    `--` comment or after the end of the statement.
+    """
+    return sql[:re.search(r"[\s;]*$", mask_sql(sql)).start()]
@@ -0,0 +1,244 @@
+import re
+
+from semantic_model import load_semantic_model
+from sql_analysis import (
+    flatten_parentheses,
+    has_order_by,
+    has_row_limit,
+    is_aggregate_branch,
+    mask_sql,
+    parse_table_references,
+    qualified_equalities,
+    split_scopes,
+    split_set_operations,
+    strip_statement_terminators,
+)
+
+
+class SQLCostGuard:
+    """
+    Static pre-execution review of Agent 2 output against the semantic model.
+    Detects Cartesian products, joins without predicates or off the PK/FK keys,
+    SELECT * on wide tables and unbounded result sets. Unbounded results are
+    rewritten with a LIMIT, and an ORDER BY ALL when they have no ORDER BY so
+    the capped rows are stable; Cartesian products are flagged for regeneration.
+    With a TableStatsCache it also warns about unfiltered scans of large
+    tables and estimates the fan-out of non-key joins.
+    """
+
+    def __init__(self, guard_settings, semantic_model=None, table_stats=None):
+        self.settings = guard_settings
+        self.semantic_model = semantic_model or load_semantic_model()
+        self.table_stats = table_stats
+
+    def review(self, sql_query):
+        """
+        Returns {"sql": str, "action": "pass" | "rewritten" | "regenerate", "findings": list}.
+        Each finding is {"code", "severity", "message"}; severity "error" forces regeneration.
+        """
+        masked = mask_sql(sql_query)
+        scopes = split_scopes(masked)
+        findings = []
+
+        for scope in scopes:
+            for branch in split_set_operations(scope):
+                findings.extend(self._review_branch(branch))
+
+        top_scope = scopes[-1]
+        top_branches = split_set_operations(top_scope)
+        unbounded = not has_row_limit(top_scope) and not all(is_aggregate_branch(b) for b in top_branches)
+
+        rewritten_sql = sql_query
+        if any(finding["severity"] == "error" for finding in findings):
+            action = "regenerate"
+        elif unbounded:
+            limit = self.settings["inject_limit_rows"]
+            # Without an ORDER BY the capped rows would differ from run to run; set operations keep theirs as is
+            order_by = "" if has_order_by(top_scope) or len(top_branches) > 1 else "\nORDER BY ALL"
+            findings.append({
+                "code": "unbounded_result",
+                "severity": "warning",
+                "message": (
+                    f"Query returns unaggregated rows without a LIMIT; "
+                    f"{'ORDER BY ALL and ' if order_by else ''}LIMIT {limit} injected"
+                ),
+            })
+            rewritten_sql = f"{strip_statement_terminators(sql_query).strip()}{order_by}\nLIMIT {limit}"
+            action = "rewritten"
+        else:
+            action = "pass"
+
+        return {"sql": rewritten_sql, "action": action, "findings": findings}
+
+    def _review_branch(self, branch):
+        findings = []
+        references = parse_table_references(branch)
+        if not references:
+            return findings
+
+        alias_to_table = {}
+        for reference in references:
+            table = self.semantic_model.get_table(reference["name"])
+            alias_to_table[reference["alias"].upper()] = table["name"] if table else None
+
+            if reference["join_type"] == "CROSS" and table:
+                findings.append({
+                    "code": "cross_join",
+                    "severity": "error",
+                    "message": f"Explicit CROSS JOIN on base table {table['name']}",
+                })
+            elif reference["join_type"] == "JOIN" and not reference["has_condition"]:
+                findings.append({
+                    "code": "missing_join_predicate",
+                    "severity": "error",
+                    "message": f"JOIN to {reference['name']} has no ON/USING condition",
+                })
+
+        findings.extend(self._check_connectivity(branch, references, alias_to_table))
+        findings.extend(self._check_select_star(branch, alias_to_table))
+        findings.extend(self._check_large_scan(branch, alias_to_table))
+        return findings
+
+    def _check_connectivity(self, branch, references, alias_to_table):
+        """
+        Union-find over the branch's references using its `a.x = b.y` predicates.
+        Base tables left in separate components multiply against each other.
+        """
+        parent = {reference["alias"].upper(): reference["alias"].upper() for reference in references}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        findings = []
+        previous_alias = None
+        for reference in references:
+            alias = reference["alias"].upper()
+            is_implicit_join = reference["join_type"] == "NATURAL" or reference["uses_using"]
+            if previous_alias and is_implicit_join:
+                parent[find(alias)] = find(previous_alias)
+            previous_alias = alias
+
+        for left_alias, left_column, right_alias, right_column in qualified_equalities(branch):
+            left_alias, right_alias = left_alias.upper(), right_alias.upper()
+            if left_alias not in parent or right_alias not in parent or left_alias == right_alias:
+                continue
+            parent[find(left_alias)] = find(right_alias)
+
+            left_table = alias_to_table.get(left_alias)
+            right_table = alias_to_table.get(right_alias)
+            if left_table and right_table and not self.semantic_model.is_key_join(
+                left_table, left_column, right_table, right_column
+            ):
+                message = f"Join {left_table}.{left_column} = {right_table}.{right_column} is not a PK/FK relationship and may fan out"
+                estimate = self._join_estimate(left_table, left_column, right_table, right_column)
+                if estimate is not None:
+                    message += f" (~{estimate:,.0f} joined rows estimated from table statistics)"
+                findings.append({
+                    "code": "non_key_join",
+                    "severity": "warning",
+                    "message": message,
+                })
+
+        base_table_components = {
+            find(alias) for alias, table in alias_to_table.items() if table is not None
+        }
+        if len(base_table_components) > 1:
+            tables = sorted({table for table in alias_to_table.values() if table})
+            findings.append({
+                "code": "cartesian_product",
+                "severity": "error",
+                "message": f"No join predicate connects {', '.join(tables)}; the query forms a Cartesian product",
+            })
+        return findings
+
+    def _check_select_star(self, branch, alias_to_table):
+        flat = flatten_parentheses(branch)
+        select_list = re.split(r"\bFROM\b", flat, maxsplit=1, flags=re.IGNORECASE)[0]
+        wide_threshold = self.settings["wide_table_columns"]
+        findings = []
+
+        starred_tables = []
+        if re.search(r"\bSELECT\s+(DISTINCT\s+)?(TOP\s+\d+\s+)?\*", select_list, re.IGNORECASE):
+            starred_tables = [table for table in alias_to_table.values() if table]
+        for alias in re.findall(r"\b(\w+)\.\*", select_list):
+            table = alias_to_table.get(alias.upper())
+            if table:
+                starred_tables.append(table)
+
+        for table_name in sorted(set(starred_tables)):
+            column_count = len(self.semantic_model.get_table(table_name)["columns"])
+            if column_count >= wide_threshold:
+                findings.append({
+                    "code": "select_star_wide_table",
+                    "severity": "warning",
+                    "message": f"SELECT * on {table_name} reads all {column_count} columns; project only the needed ones",
+                })
+        return findings
+
+
+    def _column_stats(self, table_name, column_name):
+        stats = self.table_stats.get(table_name) if self.table_stats else None
+        if stats is None:
+            return None, None
+        for column, profile in stats["columns"].items():
+            if column.upper() == column_name.upper():
+                return stats, profile
+        return stats, None
+
+    def _join_estimate(self, left_table, left_column, right_table, right_column):
+        """
+        Textbook equi-join cardinality: |L| * |R| / max(distinct(L.x), distinct(R.y)).
+        """
+        left_stats, left_profile = self._column_stats(left_table, left_column)
+        right_stats, right_profile = self._column_stats(right_table, right_column)
+        if not left_profile or not right_profile:
+            return None
+        distinct = max(left_profile["distinct"], right_profile["distinct"], 1)
+        return left_stats["row_count"] * right_stats["row_count"] / distinct
+
+    def _check_large_scan(self, branch, alias_to_table):
+        if self.table_stats is None or re.search(r"\bWHERE\b", flatten_parentheses(branch), re.IGNORECASE):
+            return []
+        findings = []
+        for table_name in sorted({table for table in alias_to_table.values() if table}):
+            stats = self.table_stats.get(table_name)
+            if stats and stats["row_count"] >= self.settings["large_table_rows"]:
+                findings.append({
+                    "code": "large_unfiltered_scan",
+                    "severity": "warning",
+                    "message": f"Reads all ~{stats['row_count']:,} rows of {table_name} without a WHERE filter",
+                })
+        return findings
+
+
+def describe_findings(findings):
+    """
+    Formats blocking findings as a short bullet list for a regeneration prompt.
+    """
+    return "\n".join(f"- {finding['message']}" for finding in findings if finding["severity"] == "error")
+
+
+def enforce_cost_guard(cost_guard, sql_query, regenerate, max_attempts=1):
+    """
+    Reviews `sql_query` and, while the guard asks for regeneration, calls
+    `regenerate(feedback)` up to `max_attempts` times. Returns the accepted
+    (possibly LIMIT-rewritten) SQL, or None if every attempt was rejected.
+    """
+    for attempt in range(max_attempts + 1):
+        verdict = cost_guard.review(sql_query)
+        for finding in verdict["findings"]:
+            print(f"Cost guard [{finding['severity']}] {finding['code']}: {finding['message']}")
+        if verdict["action"] != "regenerate":
+            return verdict["sql"]
+        if attempt == max_attempts:
+            break
+        print(f"Cost guard flagged the query; regenerating (attempt {attempt + 1}/{max_attempts})")
+        sql_query = regenerate(describe_findings(verdict["findings"]))
+        if not sql_query:
+            return None
+    print("Warning: Cost guard rejected the generated SQL after regeneration attempts.")
+    return None
+
@@ -0,0 +1,271 @@
+"""
+Cheap local dedupe of generated tests. SQL is reduced to a canonical form
+(comments, formatting and keyword case removed, table aliases renamed by
+position, IN-list literals sorted) and deduped through a hash set. Use cases
+are clustered by MinHash over word shingles with LSH banding, so both stages
+stay roughly linear in the batch size.
+"""
+import hashlib
+import random
+import re
+import zlib
+
+
+SQL_TOKEN = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<literal>'(?:[^']|'')*')
+    |(?P<word>(?:[A-Za-z_][\w$]*|"(?:[^"]|"")*")(?:\s*\.\s*(?:[A-Za-z_][\w$]*|"(?:[^"]|"")*"|\*))*)
+    |(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+    |(?P<space>\s+)
+    |(?P<operator><=|>=|<>|!=|::|\|\||=>|->)
+    |(?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+IDENTIFIER_PART = re.compile(r'"(?:[^"]|"")*"|[^.\s]+')
+
+# Words that open a parenthesis without being a function call
+NON_FUNCTION_WORDS = {
+    "AS", "IN", "FROM", "JOIN", "ON", "USING", "EXISTS", "AND", "OR", "NOT", "WHERE", "SELECT",
+    "WITH", "UNION", "ALL", "INTERSECT", "EXCEPT", "MINUS", "HAVING", "QUALIFY", "ANY", "SOME",
+    "THEN", "ELSE", "WHEN", "CASE", "LATERAL", "BY", "VALUES",
+}
+# Words that can follow a table reference but are never its alias
+NON_ALIAS_WORDS = {
+    "ON", "USING", "WHERE", "GROUP", "ORDER", "LIMIT", "HAVING", "QUALIFY", "JOIN", "INNER",
+    "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "NATURAL", "UNION", "INTERSECT", "EXCEPT",
+    "MINUS", "WINDOW", "FETCH", "SAMPLE", "TABLESAMPLE", "AT", "BEFORE", "CHANGES",
+    "MATCH_RECOGNIZE", "PIVOT", "UNPIVOT", "LATERAL", "OFFSET",
+}
+FROM_LIST_END_WORDS = NON_ALIAS_WORDS - {"JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "NATURAL", "LATERAL"}
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "each", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "their", "this", "to", "with", "all", "any",
+}
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _tokenize(sql):
+    tokens = []
+    for match in SQL_TOKEN.finditer(sql):
+        kind = match.lastgroup
+        text = match.group(0)
+        if kind in ("comment", "space"):
+            continue
+        if kind == "word":
+            text = ".".join(
+                part if part.startswith('"') else part.upper()
+                for part in IDENTIFIER_PART.findall(text)
+            )
+        tokens.append((kind, text))
+    while tokens and tokens[-1][1] == ";":
+        tokens.pop()
+    return tokens
+
+
+def _rename_aliases(tokens):
+    """
+    Renames every table reference's alias (or the bare table name used as a
+    qualifier) to T1, T2, ... in order of appearance, and rewrites qualified
+    column references to match.
+    """
+    alias_map = {}
+    out = []
+    depth = 0
+    in_from_list = {0: False}
+    opened_by_function = {0: False}
+    expect_table = False
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        previous = out[-1] if out else ("", "")
+
+        if text == "(":
+            depth += 1
+            in_from_list[depth] = False
+            opened_by_function[depth] = previous[0] == "word" and previous[1] not in NON_FUNCTION_WORDS
+            expect_table = False
+        elif text == ")":
+            in_from_list.pop(depth, None)
+            opened_by_function.pop(depth, None)
+            depth = max(depth - 1, 0)
+        elif kind == "word" and text in ("FROM", "JOIN") and not opened_by_function.get(depth):
+            in_from_list[depth] = True
+            expect_table = True
+            out.append((kind, text))
+            i += 1
+            continue
+        elif text == "," and in_from_list.get(depth):
+            expect_table = True
+            out.append((kind, text))
+            i += 1
+            continue
+        elif kind == "word" and text in FROM_LIST_END_WORDS:
+            in_from_list[depth] = False
+
+        if expect_table and kind == "word":
+            expect_table = False
+            alias_index = i + 1
+            if alias_index < len(tokens) and tokens[alias_index][1] == "AS":
+                alias_index += 1
+            has_alias = (
+                alias_index < len(tokens)
+                and tokens[alias_index][0] == "word"
+                and "." not in tokens[alias_index][1]
+                and tokens[alias_index][1] not in NON_ALIAS_WORDS
+            )
+            alias = tokens[alias_index][1] if has_alias else text.split(".")[-1]
+            canonical_alias = alias_map.setdefault(alias, f"T{len(alias_map) + 1}")
+            out.append((kind, text))
+            out.append(("word", canonical_alias))
+            i = alias_index + 1 if has_alias else i + 1
+            continue
+        expect_table = False
+
+        out.append((kind, text))
+        i += 1
+
+    renamed = []
+    for kind, text in out:
+        if kind == "word" and "." in text:
+            qualifier, column = text.rsplit(".", 1)
+            if qualifier in alias_map:
+                text = f"{alias_map[qualifier]}.{column}"
+        renamed.append((kind, text))
+    return renamed
+
+
+def _sort_in_lists(tokens):
+    """
+    Sorts the items of IN (...) lists made only of literals.
+    """
+    out = []
+    i = 0
+    while i < len(tokens):
+        out.append(tokens[i])
+        if tokens[i][1] == "IN" and i + 1 < len(tokens) and tokens[i + 1][1] == "(":
+            end = i + 2
+            items = []
+            while end < len(tokens) and tokens[end][0] in ("literal", "number"):
+                items.append(tokens[end])
+                if end + 1 < len(tokens) and tokens[end + 1][1] == ",":
+                    end += 2
+                else:
+                    end += 1
+                    break
+            if items and end < len(tokens) and tokens[end][1] == ")":
+                items.sort(key=lambda token: token[1])
+                out.append(tokens[i + 1])
+                for position, item in enumerate(items):
+                    if position:
+                        out.append(("other", ","))
+                    out.append(item)
+                out.append(tokens[end])
+                i = end + 1
+                continue
+        i += 1
+    return out
+
+
+def canonicalize_sql(sql):
+    """
+    Returns a canonical form of the SQL that is identical for queries that
+    differ only in comments, whitespace, keyword/identifier case, table alias
+    names or the order of literals in IN lists.
+    """
+    tokens = _sort_in_lists(_rename_aliases(_tokenize(sql)))
+    return " ".join(text for _, text in tokens)
+
+
+def normalize_sql(sql):
+    """
+    Returns the SQL without comments or formatting and with keywords and
+    unquoted identifiers upper-cased; unlike canonicalize_sql it keeps aliases.
+    """
+    return " ".join(text for _, text in _tokenize(sql))
+
+
+def sql_signature(sql):
+    return hashlib.sha256(canonicalize_sql(sql).encode("utf-8")).hexdigest()
+
+
+class SQLDeduper:
+    """
+    Set-based dedupe of SQL by canonical signature.
+    """
+
+    def __init__(self):
+        self.signatures = set()
+
+    def add(self, sql):
+        """
+        Records the query and returns True if no equivalent query was seen before.
+        """
+        signature = sql_signature(sql)
+        if signature in self.signatures:
+            return False
+        self.signatures.add(signature)
+        return True
+
+
+def _shingles(text):
+    words = [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOP_WORDS]
+    shingles = set(words)
+    shingles.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return shingles
+
+
+def _minhash(shingles, permutations):
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles] or [0]
+    return [min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in permutations]
+
+
+def cluster_use_cases(use_cases, threshold=0.8, num_perm=64, bands=16):
+    """
+    Groups near-duplicate use cases. Candidate pairs come from MinHash LSH
+    buckets and are confirmed by the exact Jaccard similarity of their word
+    shingles. Returns clusters as lists of indices, each in input order.
+    """
+    rng = random.Random(42)
+    permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+    rows_per_band = num_perm // bands
+    shingle_sets = [_shingles(use_case) for use_case in use_cases]
+
+    parent = list(range(len(use_cases)))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    buckets = {}
+    for index, shingles in enumerate(shingle_sets):
+        signature = _minhash(shingles, permutations)
+        for band in range(bands):
+            key = (band, tuple(signature[band * rows_per_band:(band + 1) * rows_per_band]))
+            for other in buckets.setdefault(key, []):
+                if find(other) == find(index):
+                    continue
+                union = shingle_sets[index] | shingle_sets[other]
+                if union and len(shingle_sets[index] & shingle_sets[other]) / len(union) >= threshold:
+                    parent[find(index)] = find(other)
+            buckets[key].append(index)
+
+    clusters = {}
+    for index in range(len(use_cases)):
+        clusters.setdefault(find(index), []).append(index)
+    return sorted(clusters.values(), key=lambda cluster: cluster[0])
+
+
+def dedupe_use_cases(use_cases, threshold=0.8, num_perm=64, bands=16):
+    """
+    Keeps the first use case of every near-duplicate cluster, preserving order.
+    """
+    clusters = cluster_use_cases(use_cases, threshold, num_perm, bands)
+    for cluster in clusters:
+        if len(cluster) > 1:
+            print(f"Merged {len(cluster) - 1} near-duplicate use case(s) into: {use_cases[cluster[0]]}")
+    return [use_cases[cluster[0]] for cluster in clusters]
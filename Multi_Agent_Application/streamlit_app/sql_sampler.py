@@ -0,0 +1,45 @@
+import re
+
+from semantic_model import load_semantic_model
+from sql_analysis import find_table_reference_spans, mask_sql
+
+
+ALREADY_SAMPLED = re.compile(r"\s*(SAMPLE|TABLESAMPLE)\b", re.IGNORECASE)
+
+
+def sampling_clause(sample_settings):
+    """
+    Builds the Snowflake SAMPLE clause for {"mode": "rows" | "percent", "value": n, "seed": optional}.
+    Row-count sampling cannot be seeded in Snowflake, so the seed only applies to percentages.
+    """
+    value = sample_settings["value"]
+    if sample_settings["mode"] == "rows":
+        return f"SAMPLE ({int(value)} ROWS)"
+    if sample_settings["mode"] == "percent":
+        seed = sample_settings.get("seed")
+        return f"SAMPLE ({float(value):g})" + (f" SEED ({int(seed)})" if seed is not None else "")
+    raise ValueError(f"Unsupported sample mode: {sample_settings['mode']}")
+
+
+def apply_sampling(sql_query, sample_settings, semantic_model=None):
+    """
+    Rewrites every semantic-model base table reference in `sql_query` to read a
+    SAMPLE of the table. CTE names, derived tables and references that are
+    already sampled are left untouched.
+    Returns (sampled_sql, sampled_table_names).
+    """
+    semantic_model = semantic_model or load_semantic_model()
+    clause = sampling_clause(sample_settings)
+    masked = mask_sql(sql_query)
+
+    sampled_tables = []
+    sampled_sql = sql_query
+    # Insert from the end so earlier offsets stay valid
+    for span in reversed(find_table_reference_spans(masked)):
+        table = semantic_model.get_table(span["name"])
+        if table is None or ALREADY_SAMPLED.match(masked, span["alias_end"]):
+            continue
+        sampled_sql = f"{sampled_sql[:span['alias_end']]} {clause}{sampled_sql[span['alias_end']:]}"
+        sampled_tables.append(table["name"])
+
+    return sampled_sql, sorted(set(sampled_tables))
@@ -0,0 +1,181 @@
+"""
+Exports a finished run as a versioned, self-contained test-suite bundle and
+replays bundles through Agent 3 without any LLM calls.
+
+Bundle layout:
+    <suites_dir>/<suite_name>/v<N>/
+        suite.json          manifest with expected headers and fingerprints
+        queries/t001.sql    one file per test
+
+Replay from the Multi_Agent_Application directory:
+    python streamlit_app/suite_bundle.py suites/<suite_name>/v1 --workers 4
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from configuration import ConfigurationExecutor
+from result_fingerprint import diff_fingerprints
+
+
+SUITE_FORMAT_VERSION = 1
+MANIFEST_FILE = "suite.json"
+
+
+def _slugify(name):
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "suite"
+
+
+def _next_version_dir(suite_root):
+    versions = []
+    if os.path.isdir(suite_root):
+        versions = [int(entry[1:]) for entry in os.listdir(suite_root) if re.fullmatch(r"v\d+", entry)]
+    return os.path.join(suite_root, f"v{max(versions, default=0) + 1}")
+
+
+def export_test_suite(results, suites_dir, suite_name):
+    """
+    Writes the run's generated SQL and expected outcomes as a new version of
+    the named suite. A query's expectation is its result fingerprint when one
+    was recorded, otherwise only that it executes with the same columns.
+    Returns the bundle directory.
+    """
+    execution_results = results.get("sql_execution_results") or {}
+    suite_dir = _next_version_dir(os.path.join(suites_dir, _slugify(suite_name)))
+    os.makedirs(os.path.join(suite_dir, "queries"))
+
+    tests = []
+    for sql_query in results.get("generated_sql_queries") or []:
+        result_data = execution_results.get(sql_query, {})
+        if result_data.get("headers") == ["Error"]:
+            print(f"Skipping failed query from suite export:\n{sql_query}")
+            continue
+        test_id = f"t{len(tests) + 1:03d}"
+        sql_file = os.path.join("queries", f"{test_id}.sql")
+        with open(os.path.join(suite_dir, sql_file), "w", encoding="utf-8") as f:
+            f.write(sql_query.strip() + "\n")
+        # Sampled results are not representative of the full tables
+        fingerprint = None if result_data.get("sampled") else result_data.get("fingerprint")
+        tests.append({
+            "id": test_id,
+            "sql_file": sql_file,
+            "expected": {
+                "headers": result_data.get("headers"),
+                "fingerprint": fingerprint,
+            },
+        })
+
+    manifest = {
+        "format_version": SUITE_FORMAT_VERSION,
+        "suite_name": suite_name,
+        "version": int(os.path.basename(suite_dir)[1:]),
+        "created_at": time.time(),
+        "source_run_id": results.get("run_id"),
+        "use_cases": results.get("high_level_use_cases") or [],
+        "tests": tests,
+    }
+    with open(os.path.join(suite_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    print(f"Exported {len(tests)} tests to {suite_dir}")
+    return suite_dir
+
+
+def load_test_suite(suite_dir):
+    """
+    Reads a bundle's manifest and inlines each test's SQL as `sql`.
+    """
+    with open(os.path.join(suite_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SUITE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported suite format version: {manifest.get('format_version')}")
+    for test in manifest["tests"]:
+        with open(os.path.join(suite_dir, test["sql_file"]), encoding="utf-8") as f:
+            test["sql"] = f.read().strip()
+    return manifest
+
+
+def compare_to_expected(expected, result_data):
+    """
+    Checks a query result ({"headers", "data", "fingerprint"}) against a test's
+    expectation. Returns (status, changes) with status PASS, CHANGED or FAIL.
+    """
+    if result_data.get("headers") == ["Error"]:
+        return "FAIL", [str(result_data["data"][0][0])]
+    if expected.get("headers") and result_data["headers"] != expected["headers"]:
+        return "CHANGED", [f"Columns {expected['headers']} -> {result_data['headers']}"]
+    if expected.get("fingerprint") and result_data.get("fingerprint"):
+        diff = diff_fingerprints({"run_id": "expected", "fingerprint": expected["fingerprint"]}, result_data["fingerprint"])
+        return diff["status"], diff["changes"]
+    return "PASS", []
+
+
+def _run_test(executor, test, run_id):
+    start_time = time.time()
+    result_data = executor.execute_sql_queries([test["sql"]], run_id=run_id, spill_mode=False)[test["sql"]]
+    outcome = {"id": test["id"], "sql_file": test["sql_file"], "elapsed_seconds": 0.0}
+    outcome["status"], outcome["changes"] = compare_to_expected(test["expected"], result_data)
+    outcome["elapsed_seconds"] = round(time.time() - start_time, 3)
+    return outcome
+
+
+def run_test_suite(suite_dir, executor, max_workers=4):
+    """
+    Replays every test in the bundle through `executor` (an Agent3SQLExecutor)
+    on a thread pool and returns the report:
+        {"suite_name", "version", "run_id", "passed", "changed", "failed", "elapsed_seconds", "tests"}
+    Concurrency against Snowflake is still bounded by the shared scheduler.
+    """
+    manifest = load_test_suite(suite_dir)
+    run_id = f"suite-{uuid.uuid4().hex}"
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="suite-test") as pool:
+        outcomes = list(pool.map(lambda test: _run_test(executor, test, run_id), manifest["tests"]))
+
+    statuses = [outcome["status"] for outcome in outcomes]
+    return {
+        "suite_name": manifest["suite_name"],
+        "version": manifest["version"],
+        "run_id": run_id,
+        "passed": statuses.count("PASS"),
+        "changed": statuses.count("CHANGED"),
+        "failed": statuses.count("FAIL"),
+        "elapsed_seconds": round(time.time() - start_time, 3),
+        "tests": outcomes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay an exported SQL test suite against Snowflake.")
+    parser.add_argument("suite_dir", help="Bundle directory containing suite.json")
+    parser.add_argument(
+        "--workers", type=int, default=ConfigurationExecutor().get_test_suite_settings()["max_workers"],
+        help="Tests replayed in parallel"
+    )
+    args = parser.parse_args(argv)
+
+    from agent3_sql_executor import Agent3SQLExecutor
+
+    report = run_test_suite(args.suite_dir, Agent3SQLExecutor(spill_mode=False), max_workers=args.workers)
+    for outcome in report["tests"]:
+        print(f"{outcome['status']:8} {outcome['id']} ({outcome['elapsed_seconds']:.2f}s)")
+        for change in outcome["changes"]:
+            print(f"         - {change}")
+    print(
+        f"\n{report['suite_name']} v{report['version']}: {report['passed']} passed, "
+        f"{report['changed']} changed, {report['failed']} failed in {report['elapsed_seconds']:.1f}s"
+    )
+
+    reports_dir = os.path.join(args.suite_dir, "reports")
+    os.makedirs(reports_dir, exist_ok=True)
+    with open(os.path.join(reports_dir, f"{report['run_id']}.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return 0 if report["changed"] == 0 and report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
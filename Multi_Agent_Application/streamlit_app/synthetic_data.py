@@ -0,0 +1,613 @@
+"""
+Deterministic synthetic P&C data for scale testing Agent 3 at production volume.
+
+Tables, columns and the FK graph come from the semantic model. Every value is
+a pure function of (seed, table, column, row index), so chunks can be written
+in any order by parallel workers and the same seed and scale factor always
+produce byte-identical files. Child rows are spread evenly over their parents
+by index arithmetic, which keeps multi-hop references consistent (a claim's
+policy is the policy of its insured asset, a payment's coverage belongs to
+the claim's policy) without holding any parent table in memory.
+
+Generate from the Multi_Agent_Application directory:
+    python streamlit_app/synthetic_data.py --scale-factor 10 --format parquet --workers 8
+
+The output directory gets one folder of part files per table, a
+manifest.json and load_snowflake.sql (PUT + COPY INTO in FK order). Pass
+--local-testing to load the files into a Snowpark local testing session instead.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from configuration import ConfigurationExecutor
+from semantic_model import load_semantic_model
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for Parquet output
+    pa = None
+
+
+# Rows per table at scale factor 1 (about 2.9 million rows in total).
+SF1_ROW_COUNTS = {
+    "Users": 500,
+    "Customers": 100000,
+    "Policies": 150000,
+    "PolicyCoverages": 450000,
+    "InsuredAssets": 200000,
+    "PolicyTransactions": 300000,
+    "BillingSchedules": 600000,
+    "Claims": 50000,
+    "Claimants": 75000,
+    "ClaimCoverages": 60000,
+    "ClaimReserves": 60000,
+    "ClaimPayments": 120000,
+    "ClaimSubrogations": 5000,
+    "ClaimNotes": 150000,
+}
+DEFAULT_ROW_COUNT = 10000
+
+ID_PREFIXES = {
+    "Users": "U",
+    "Customers": "C",
+    "Policies": "P",
+    "PolicyCoverages": "PC",
+    "InsuredAssets": "IA",
+    "PolicyTransactions": "PT",
+    "BillingSchedules": "BS",
+    "Claims": "CL",
+    "Claimants": "CM",
+    "ClaimCoverages": "CC",
+    "ClaimReserves": "CR",
+    "ClaimPayments": "CP",
+    "ClaimSubrogations": "CS",
+    "ClaimNotes": "CN",
+}
+
+START_DATE = datetime.date(2019, 1, 1)
+AS_OF_DATE = datetime.date(2025, 6, 30)
+DATE_SPAN_DAYS = (AS_OF_DATE - START_DATE).days
+MASK64 = (1 << 64) - 1
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Priya"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Patel", "Nguyen"]
+COMPANY_SUFFIXES = ["LLC", "Inc", "Holdings", "Logistics", "Properties", "Manufacturing"]
+STREETS = ["Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Park"]
+CITIES = [("Austin", "TX"), ("Dallas", "TX"), ("Denver", "CO"), ("Phoenix", "AZ"), ("Chicago", "IL"),
+          ("Columbus", "OH"), ("Atlanta", "GA"), ("Miami", "FL"), ("Seattle", "WA"), ("Boston", "MA"),
+          ("Charlotte", "NC"), ("Nashville", "TN"), ("Portland", "OR"), ("Sacramento", "CA"), ("Albany", "NY")]
+
+POLICY_ASSET_TYPES = {
+    "Auto": "Vehicle",
+    "Homeowners": "Dwelling",
+    "Renters": "Personal Property",
+    "Commercial Property": "Commercial Building",
+    "Umbrella": "Personal Property",
+}
+ASSET_VALUE_RANGES = {
+    "Vehicle": (5000, 80000),
+    "Dwelling": (150000, 1500000),
+    "Personal Property": (5000, 100000),
+    "Commercial Building": (250000, 5000000),
+}
+NOTE_TEMPLATES = [
+    "Initial contact made with insured for claim {claim_id}.",
+    "Inspection scheduled for claim {claim_id}.",
+    "Estimate received and under review for claim {claim_id}.",
+    "Requested additional documentation for claim {claim_id}.",
+    "Payment issued on claim {claim_id}.",
+]
+
+PARQUET_TYPES = {
+    "DATE": "date32",
+    "TIMESTAMP_NTZ": "timestamp",
+    "DECIMAL": "float64",
+    "NUMBER": "float64",
+    "INTEGER": "int64",
+    "BOOLEAN": "bool",
+}
+
+
+def _mix64(value):
+    """
+    SplitMix64 finalizer: a cheap, well-distributed 64-bit hash.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet output requires pyarrow. Install it with `pip install pyarrow` or use --format csv.")
+
+
+class SyntheticDataGenerator:
+    """
+    Generates referentially consistent rows for every semantic model table.
+    Row counts are SF1_ROW_COUNTS multiplied by the scale factor.
+    """
+
+    def __init__(self, scale_factor=1, seed=42, semantic_model=None):
+        self.scale_factor = scale_factor
+        self.seed = seed
+        self.semantic_model = semantic_model or load_semantic_model()
+        self.row_counts = {
+            name: max(1, int(round(SF1_ROW_COUNTS.get(name, DEFAULT_ROW_COUNT) * scale_factor)))
+            for name in self.semantic_model.table_names()
+        }
+        self.foreign_keys = {
+            (from_table, from_column): to_table
+            for from_table, from_column, to_table, _ in self.semantic_model.relationships
+        }
+        self._streams = {}
+        self._created_from = {}
+        for from_table, from_column, to_table, _ in self.semantic_model.relationships:
+            if to_table != "Users" and from_table not in self._created_from:
+                self._created_from[from_table] = from_column
+        self._rules = {
+            ("Users", "UserName"): self._user_name,
+            ("Users", "Role"): lambda i: self._choice("Users", "Role", i, ["Underwriter", "Adjuster", "Agent", "Admin"], [3, 4, 2, 1]),
+            ("Customers", "CustomerType"): lambda i: self._choice("Customers", "CustomerType", i, ["Individual", "Commercial"], [85, 15]),
+            ("Customers", "FirstName"): lambda i: self._choice("Customers", "FirstName", i, FIRST_NAMES),
+            ("Customers", "LastName"): lambda i: self._choice("Customers", "LastName", i, LAST_NAMES),
+            ("Customers", "CompanyName"): self._company_name,
+            ("Customers", "DateOfBirth"): self._date_of_birth,
+            ("Customers", "AddressLine1"): lambda i: f"{self._between('Customers', 'AddressLine1', i, 1, 9999)} {self._choice('Customers', 'Street', i, STREETS)} St",
+            ("Customers", "City"): lambda i: self._choice("Customers", "Location", i, CITIES)[0],
+            ("Customers", "State"): lambda i: self._choice("Customers", "Location", i, CITIES)[1],
+            ("Customers", "ZipCode"): lambda i: f"{self._between('Customers', 'ZipCode', i, 10000, 99999):05d}",
+            ("Customers", "PhoneNumber"): lambda i: f"555-{self._between('Customers', 'PhoneNumber', i, 100, 999)}-{i % 10000:04d}",
+            ("Customers", "EmailAddress"): self._email_address,
+            ("Policies", "PolicyType"): lambda i: self._choice("Policies", "PolicyType", i, list(POLICY_ASSET_TYPES), [40, 30, 10, 12, 8]),
+            ("Policies", "EffectiveDate"): lambda i: START_DATE + datetime.timedelta(days=self._between("Policies", "EffectiveDate", i, 0, DATE_SPAN_DAYS)),
+            ("Policies", "ExpirationDate"): lambda i: self.value("Policies", "EffectiveDate", i) + datetime.timedelta(days=365),
+            ("Policies", "IssueDate"): lambda i: self.value("Policies", "EffectiveDate", i) - datetime.timedelta(days=self._between("Policies", "IssueDate", i, 1, 30)),
+            ("Policies", "Status"): self._policy_status,
+            ("Policies", "TotalPremium"): self._total_premium,
+            ("Policies", "CreatedDate"): lambda i: self._timestamp_on("Policies", "CreatedDate", i, self.value("Policies", "IssueDate", i)),
+            ("PolicyCoverages", "CoverageType"): self._coverage_type,
+            ("PolicyCoverages", "CoverageLimit"): lambda i: float(self._choice("PolicyCoverages", "CoverageLimit", i, [25000, 50000, 100000, 250000, 500000, 1000000])),
+            ("PolicyCoverages", "Deductible"): lambda i: float(self._choice("PolicyCoverages", "Deductible", i, [250, 500, 1000, 2500])),
+            ("PolicyCoverages", "PremiumForCoverage"): lambda i: self._amount("PolicyCoverages", "PremiumForCoverage", i, 100, 2500),
+            ("PolicyCoverages", "CreatedDate"): lambda i: self._parent_value("PolicyCoverages", "PolicyID", i, "CreatedDate"),
+            ("InsuredAssets", "AssetType"): lambda i: POLICY_ASSET_TYPES[self._parent_value("InsuredAssets", "PolicyID", i, "PolicyType")],
+            ("InsuredAssets", "Description"): lambda i: f"{self.value('InsuredAssets', 'AssetType', i)} #{i + 1}",
+            ("InsuredAssets", "InsuredValue"): lambda i: self._amount("InsuredAssets", "InsuredValue", i, *ASSET_VALUE_RANGES[self.value("InsuredAssets", "AssetType", i)]),
+            ("InsuredAssets", "CreatedDate"): lambda i: self._parent_value("InsuredAssets", "PolicyID", i, "CreatedDate"),
+            ("PolicyTransactions", "TransactionType"): self._transaction_type,
+            ("PolicyTransactions", "TransactionDate"): self._transaction_date,
+            ("PolicyTransactions", "EffectiveDate"): lambda i: self.value("PolicyTransactions", "TransactionDate", i),
+            ("PolicyTransactions", "PremiumChangeAmount"): self._premium_change,
+            ("PolicyTransactions", "CreatedDate"): lambda i: self._timestamp_on("PolicyTransactions", "CreatedDate", i, self.value("PolicyTransactions", "TransactionDate", i)),
+            ("BillingSchedules", "DueDate"): self._due_date,
+            ("BillingSchedules", "AmountDue"): self._amount_due,
+            ("BillingSchedules", "Status"): self._billing_status,
+            ("Claims", "PolicyID"): lambda i: self._id("Policies", self._claim_policy(i)),
+            ("Claims", "DateOfLoss"): self._date_of_loss,
+            ("Claims", "DateReported"): lambda i: self.value("Claims", "DateOfLoss", i) + datetime.timedelta(hours=self._between("Claims", "DateReported", i, 1, 14 * 24)),
+            ("Claims", "CauseOfLoss"): lambda i: self._choice("Claims", "CauseOfLoss", i, ["Collision", "Water Damage", "Fire", "Theft", "Wind", "Hail", "Vandalism"], [30, 20, 8, 12, 12, 10, 8]),
+            ("Claims", "LossDescription"): lambda i: f"{self.value('Claims', 'CauseOfLoss', i)} loss to insured {self._parent_value('Claims', 'InsuredAssetID', i, 'AssetType').lower()}",
+            ("Claims", "Status"): lambda i: self._choice("Claims", "Status", i, ["Open", "Closed", "Under Review", "Denied"], [30, 55, 10, 5]),
+            ("Claims", "CreatedDate"): lambda i: self.value("Claims", "DateReported", i),
+            ("Claimants", "CustomerID"): self._claimant_customer,
+            ("Claimants", "ClaimantType"): lambda i: "Insured" if self._is_first_child("Claimants", "ClaimID", i) else "Third Party",
+            ("ClaimCoverages", "PolicyCoverageID"): lambda i: self._claim_coverage("ClaimCoverages", i),
+            ("ClaimCoverages", "Status"): lambda i: self._choice("ClaimCoverages", "Status", i, ["Accepted", "Pending", "Denied"], [70, 20, 10]),
+            ("ClaimReserves", "PolicyCoverageID"): lambda i: self._claim_coverage("ClaimReserves", i),
+            ("ClaimReserves", "ReserveType"): lambda i: self._choice("ClaimReserves", "ReserveType", i, ["Indemnity", "Expense"], [75, 25]),
+            ("ClaimReserves", "CurrentReserveAmount"): lambda i: self._amount("ClaimReserves", "CurrentReserveAmount", i, 500, 50000),
+            ("ClaimPayments", "PolicyCoverageID"): lambda i: self._claim_coverage("ClaimPayments", i),
+            ("ClaimPayments", "ClaimantID"): self._payment_claimant,
+            ("ClaimPayments", "PaymentAmount"): lambda i: self._amount("ClaimPayments", "PaymentAmount", i, 100, 25000),
+            ("ClaimPayments", "PaymentDate"): lambda i: self._parent_value("ClaimPayments", "ClaimID", i, "DateReported").date() + datetime.timedelta(days=self._between("ClaimPayments", "PaymentDate", i, 5, 180)),
+            ("ClaimSubrogations", "Status"): lambda i: self._choice("ClaimSubrogations", "Status", i, ["Open", "Recovered", "Closed"], [40, 40, 20]),
+            ("ClaimSubrogations", "AmountRecovered"): lambda i: self._amount("ClaimSubrogations", "AmountRecovered", i, 500, 20000) if self.value("ClaimSubrogations", "Status", i) == "Recovered" else 0.0,
+            ("ClaimNotes", "NoteText"): lambda i: self._choice("ClaimNotes", "NoteText", i, NOTE_TEMPLATES).format(claim_id=self.value("ClaimNotes", "ClaimID", i)),
+            ("ClaimNotes", "CreatedDate"): lambda i: self._parent_value("ClaimNotes", "ClaimID", i, "DateReported") + datetime.timedelta(hours=self._between("ClaimNotes", "CreatedDate", i, 1, 90 * 24)),
+        }
+
+    def table_order(self):
+        """
+        Tables in FK order (parents before children), keeping model order for ties.
+        """
+        names = self.semantic_model.table_names()
+        parents = {name: set() for name in names}
+        for from_table, _, to_table, _ in self.semantic_model.relationships:
+            if from_table in parents and to_table in parents and from_table != to_table:
+                parents[from_table].add(to_table)
+        ordered = []
+        while len(ordered) < len(names):
+            ready = [name for name in names if name not in ordered and parents[name] <= set(ordered)]
+            if not ready:
+                raise ValueError("The semantic model relationships contain a cycle")
+            ordered.extend(ready)
+        return ordered
+
+    # --- deterministic primitives ---
+
+    def _hash(self, table, column, index):
+        key = (table, column)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = _mix64((self.seed * 0x100000001B3) ^ zlib.crc32(f"{table}.{column}".encode("utf-8")))
+            self._streams[key] = stream
+        return _mix64((stream + index) & MASK64)
+
+    def _between(self, table, column, index, low, high):
+        return low + self._hash(table, column, index) % (high - low + 1)
+
+    def _amount(self, table, column, index, low, high):
+        return round(low + (self._hash(table, column, index) / MASK64) * (high - low), 2)
+
+    def _choice(self, table, column, index, options, weights=None):
+        if weights is None:
+            return options[self._hash(table, column, index) % len(options)]
+        point = self._hash(table, column, index) % sum(weights)
+        for option, weight in zip(options, weights):
+            if point < weight:
+                return option
+            point -= weight
+        return options[-1]
+
+    def _id(self, table, index):
+        return f"{ID_PREFIXES.get(table, table[:2].upper())}{index + 1:09d}"
+
+    def _timestamp_on(self, table, column, index, day):
+        seconds = self._between(table, column, index, 8 * 3600, 18 * 3600)
+        return datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(seconds=seconds)
+
+    # --- FK arithmetic ---
+
+    def parent_index(self, child_table, index, parent_table):
+        """
+        Spreads child rows evenly over parent rows: child i belongs to parent floor(i * P / C).
+        """
+        return index * self.row_counts[parent_table] // self.row_counts[child_table]
+
+    def child_range(self, parent_table, index, child_table):
+        """
+        Inverse of parent_index: the child row indexes that belong to a parent row.
+        """
+        parents = self.row_counts[parent_table]
+        children = self.row_counts[child_table]
+        return range(-(-index * children // parents), -(-(index + 1) * children // parents))
+
+    def _fk_parent(self, table, column, index):
+        parent_table = self.foreign_keys[(table, column)]
+        return parent_table, self.parent_index(table, index, parent_table)
+
+    def _parent_value(self, table, column, index, parent_column):
+        parent_table, parent = self._fk_parent(table, column, index)
+        return self.value(parent_table, parent_column, parent)
+
+    def _is_first_child(self, table, column, index):
+        parent_table, parent = self._fk_parent(table, column, index)
+        return index == self.child_range(parent_table, parent, table).start
+
+    def _pick_child(self, parent_table, parent, child_table, table, column, index):
+        children = self.child_range(parent_table, parent, child_table)
+        if not children:
+            return self._id(child_table, self.parent_index(parent_table, parent, child_table))
+        return self._id(child_table, children[self._hash(table, column, index) % len(children)])
+
+    def _claim_policy(self, claim):
+        asset = self.parent_index("Claims", claim, "InsuredAssets")
+        return self.parent_index("InsuredAssets", asset, "Policies")
+
+    # --- column rules ---
+
+    def _user_name(self, index):
+        first = self._choice("Users", "FirstName", index, FIRST_NAMES)
+        last = self._choice("Users", "LastName", index, LAST_NAMES)
+        return f"{first[0].lower()}{last.lower()}{index + 1}"
+
+    def _company_name(self, index):
+        if self.value("Customers", "CustomerType", index) != "Commercial":
+            return None
+        return f"{self.value('Customers', 'LastName', index)} {self._choice('Customers', 'CompanyName', index, COMPANY_SUFFIXES)}"
+
+    def _date_of_birth(self, index):
+        if self.value("Customers", "CustomerType", index) != "Individual":
+            return None
+        return datetime.date(1945, 1, 1) + datetime.timedelta(days=self._between("Customers", "DateOfBirth", index, 0, 60 * 365))
+
+    def _email_address(self, index):
+        first = self.value("Customers", "FirstName", index)
+        last = self.value("Customers", "LastName", index)
+        return f"{first}.{last}{index + 1}@example.com".lower()
+
+    def _policy_status(self, index):
+        if self.value("Policies", "ExpirationDate", index) < AS_OF_DATE:
+            return self._choice("Policies", "Status", index, ["Expired", "Cancelled"], [90, 10])
+        return self._choice("Policies", "Status", index, ["Active", "Cancelled", "Pending"], [85, 10, 5])
+
+    def _total_premium(self, index):
+        coverages = self.child_range("Policies", index, "PolicyCoverages")
+        return round(sum(self.value("PolicyCoverages", "PremiumForCoverage", coverage) for coverage in coverages), 2)
+
+    def _coverage_type(self, index):
+        policy_type = self._parent_value("PolicyCoverages", "PolicyID", index, "PolicyType")
+        if policy_type == "Auto":
+            options = ["Liability", "Collision", "Comprehensive", "Medical Payments"]
+        elif policy_type == "Commercial Property":
+            options = ["Building", "Business Personal Property", "Business Interruption", "Liability"]
+        else:
+            options = ["Dwelling", "Personal Property", "Liability", "Loss of Use"]
+        return self._choice("PolicyCoverages", "CoverageType", index, options)
+
+    def _transaction_type(self, index):
+        if self._is_first_child("PolicyTransactions", "PolicyID", index):
+            return "New Business"
+        return self._choice("PolicyTransactions", "TransactionType", index, ["Endorsement", "Renewal", "Cancellation"], [70, 25, 5])
+
+    def _transaction_date(self, index):
+        effective = self._parent_value("PolicyTransactions", "PolicyID", index, "EffectiveDate")
+        if self._is_first_child("PolicyTransactions", "PolicyID", index):
+            return effective
+        return effective + datetime.timedelta(days=self._between("PolicyTransactions", "TransactionDate", index, 1, 364))
+
+    def _premium_change(self, index):
+        if self.value("PolicyTransactions", "TransactionType", index) == "New Business":
+            return self._parent_value("PolicyTransactions", "PolicyID", index, "TotalPremium")
+        return self._amount("PolicyTransactions", "PremiumChangeAmount", index, -500, 500)
+
+    def _installment(self, index):
+        _, policy = self._fk_parent("BillingSchedules", "PolicyID", index)
+        installments = self.child_range("Policies", policy, "BillingSchedules")
+        return policy, index - installments.start, len(installments)
+
+    def _due_date(self, index):
+        policy, number, count = self._installment(index)
+        return self.value("Policies", "EffectiveDate", policy) + datetime.timedelta(days=number * (365 // count))
+
+    def _amount_due(self, index):
+        policy, _, count = self._installment(index)
+        return round(self.value("Policies", "TotalPremium", policy) / count, 2)
+
+    def _billing_status(self, index):
+        if self.value("BillingSchedules", "DueDate", index) > AS_OF_DATE:
+            return "Scheduled"
+        return self._choice("BillingSchedules", "Status", index, ["Paid", "Overdue"], [92, 8])
+
+    def _date_of_loss(self, index):
+        effective = self.value("Policies", "EffectiveDate", self._claim_policy(index))
+        day = min(effective + datetime.timedelta(days=self._between("Claims", "DateOfLoss", index, 0, 364)), AS_OF_DATE)
+        return datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(seconds=self._between("Claims", "TimeOfLoss", index, 0, 86399))
+
+    def _claimant_customer(self, index):
+        _, claim = self._fk_parent("Claimants", "ClaimID", index)
+        if self._is_first_child("Claimants", "ClaimID", index):
+            return self.value("Policies", "CustomerID", self._claim_policy(claim))
+        return self._id("Customers", self._hash("Claimants", "CustomerID", index) % self.row_counts["Customers"])
+
+    def _claim_coverage(self, table, index):
+        _, claim = self._fk_parent(table, "ClaimID", index)
+        return self._pick_child("Policies", self._claim_policy(claim), "PolicyCoverages", table, "PolicyCoverageID", index)
+
+    def _payment_claimant(self, index):
+        _, claim = self._fk_parent("ClaimPayments", "ClaimID", index)
+        return self._pick_child("Claims", claim, "Claimants", "ClaimPayments", "ClaimantID", index)
+
+    # --- rows ---
+
+    def value(self, table, column, index):
+        """
+        Value of one cell; a pure function of the seed, scale factor, table, column and row index.
+        """
+        rule = self._rules.get((table, column))
+        if rule is not None:
+            return rule(index)
+        table_entry = self.semantic_model.get_table(table)
+        if column in table_entry["primary_keys"]:
+            return self._id(table, index)
+        parent_table = self.foreign_keys.get((table, column))
+        if parent_table == "Users":
+            return self._id("Users", self._hash(table, column, index) % self.row_counts["Users"])
+        if parent_table is not None:
+            return self._id(parent_table, self.parent_index(table, index, parent_table))
+        if column == "CreatedDate" and table in self._created_from:
+            parent_created = self._parent_value(table, self._created_from[table], index, "CreatedDate")
+            return parent_created + datetime.timedelta(minutes=self._between(table, column, index, 0, 30 * 24 * 60))
+        if column == "CreatedDate":
+            return self._timestamp_on(table, column, index, START_DATE + datetime.timedelta(days=self._between(table, column, index, 0, DATE_SPAN_DAYS)))
+        if column == "LastUpdatedDate":
+            return self.value(table, "CreatedDate", index) + datetime.timedelta(minutes=self._between(table, column, index, 0, 90 * 24 * 60))
+        data_type = table_entry["data_types"].get(column, "VARCHAR").upper()
+        if data_type == "DATE":
+            return START_DATE + datetime.timedelta(days=self._between(table, column, index, 0, DATE_SPAN_DAYS))
+        if data_type.startswith("TIMESTAMP"):
+            return self._timestamp_on(table, column, index, START_DATE + datetime.timedelta(days=self._between(table, column, index, 0, DATE_SPAN_DAYS)))
+        if data_type in ("DECIMAL", "NUMBER"):
+            return self._amount(table, column, index, 0, 10000)
+        if data_type == "INTEGER":
+            return self._between(table, column, index, 0, 1000)
+        if data_type == "BOOLEAN":
+            return self._hash(table, column, index) % 2 == 0
+        return f"{column} {index + 1}"
+
+    def row(self, table, index):
+        return [self.value(table, column, index) for column in self.semantic_model.get_table(table)["columns"]]
+
+    def write_chunk(self, table, start, stop, path, file_format):
+        """
+        Writes rows [start, stop) of a table to one CSV or Parquet part file.
+        """
+        table_entry = self.semantic_model.get_table(table)
+        columns = table_entry["columns"]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if file_format == "parquet":
+            _require_pyarrow()
+            rows = [self.row(table, index) for index in range(start, stop)]
+            fields = [pa.field(column, _parquet_type(table_entry["data_types"][column])) for column in columns]
+            arrays = [pa.array([row[position] for row in rows], type=field.type) for position, field in enumerate(fields)]
+            pq.write_table(pa.Table.from_arrays(arrays, schema=pa.schema(fields)), path, compression="snappy")
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for index in range(start, stop):
+                    writer.writerow(self.row(table, index))
+        return path
+
+    def generate(self, output_dir, file_format="parquet", chunk_rows=100000, workers=4, tables=None):
+        """
+        Writes every table (or only `tables`) as part files under `output_dir/<Table>/`
+        using a process pool, then writes manifest.json and load_snowflake.sql.
+        Returns the manifest.
+        """
+        if file_format == "parquet":
+            _require_pyarrow()
+        started = time.time()
+        selected = [table for table in self.table_order() if not tables or table in tables]
+        extension = "parquet" if file_format == "parquet" else "csv"
+        tasks = []
+        manifest_tables = {}
+        for table in selected:
+            files = []
+            for chunk, start in enumerate(range(0, self.row_counts[table], chunk_rows)):
+                stop = min(start + chunk_rows, self.row_counts[table])
+                path = os.path.join(output_dir, table, f"part-{chunk:05d}.{extension}")
+                tasks.append((self.scale_factor, self.seed, table, start, stop, path, file_format))
+                files.append(os.path.relpath(path, output_dir))
+            manifest_tables[table] = {"rows": self.row_counts[table], "files": files}
+
+        print(f"Generating {sum(self.row_counts[t] for t in selected):,} rows in {len(tasks)} chunks "
+              f"(SF{self.scale_factor}, seed {self.seed}, {file_format})")
+        if workers <= 1:
+            for task in tasks:
+                _write_chunk_task(*task)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for path in pool.map(_write_chunk_task, *zip(*tasks)):
+                    print(f"Wrote {path}")
+
+        manifest = {
+            "scale_factor": self.scale_factor,
+            "seed": self.seed,
+            "format": file_format,
+            "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "elapsed_seconds": round(time.time() - started, 2),
+            "table_order": selected,
+            "tables": manifest_tables,
+        }
+        with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        with open(os.path.join(output_dir, "load_snowflake.sql"), "w", encoding="utf-8") as f:
+            f.write(self.load_script(output_dir, file_format, selected))
+        return manifest
+
+    def load_script(self, output_dir, file_format, tables):
+        """
+        SnowSQL script that stages the part files and bulk loads them with COPY INTO, parents first.
+        """
+        stage = "SYNTHETIC_PC_STAGE"
+        lines = [
+            f"-- Synthetic P&C data: scale factor {self.scale_factor}, seed {self.seed}. Run with SnowSQL in the target schema.",
+            f"CREATE STAGE IF NOT EXISTS {stage};",
+        ]
+        for table in tables:
+            local_path = os.path.abspath(os.path.join(output_dir, table)).replace("\\", "/")
+            lines.append(f"PUT file://{local_path}/* @{stage}/{table}/ PARALLEL = 8 AUTO_COMPRESS = FALSE OVERWRITE = TRUE;")
+            if file_format == "parquet":
+                lines.append(
+                    f"COPY INTO {table} FROM @{stage}/{table}/ FILE_FORMAT = (TYPE = PARQUET) "
+                    f"MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE;"
+                )
+            else:
+                columns = ", ".join(self.semantic_model.get_table(table)["columns"])
+                lines.append(
+                    f"COPY INTO {table} ({columns}) FROM @{stage}/{table}/ FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 "
+                    f"FIELD_OPTIONALLY_ENCLOSED_BY = '\"' EMPTY_FIELD_AS_NULL = TRUE) PURGE = TRUE;"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _parquet_type(data_type):
+    name = PARQUET_TYPES.get(data_type.upper(), "string")
+    if name == "timestamp":
+        return pa.timestamp("us")
+    return getattr(pa, name)()
+
+
+_WORKER_GENERATORS = {}
+
+
+def _write_chunk_task(scale_factor, seed, table, start, stop, path, file_format):
+    """
+    Process pool entry point; each worker builds its generator once per (scale factor, seed).
+    """
+    key = (scale_factor, seed)
+    if key not in _WORKER_GENERATORS:
+        _WORKER_GENERATORS[key] = SyntheticDataGenerator(scale_factor=scale_factor, seed=seed)
+    return _WORKER_GENERATORS[key].write_chunk(table, start, stop, path, file_format)
+
+
+def load_into_session(session, output_dir):
+    """
+    Loads generated part files into a Snowpark session table by table (for
+    example a local testing session). Returns {table: rows loaded}.
+    """
+    import pandas as pd
+
+    with open(os.path.join(output_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    loaded = {}
+    for table in manifest["table_order"]:
+        mode = "overwrite"
+        loaded[table] = 0
+        for relative_path in manifest["tables"][table]["files"]:
+            path = os.path.join(output_dir, relative_path)
+            if manifest["format"] == "parquet":
+                _require_pyarrow()
+                frame = pq.read_table(path).to_pandas()
+            else:
+                frame = pd.read_csv(path)
+            session.create_dataframe(frame).write.save_as_table(table, mode=mode)
+            mode = "append"
+            loaded[table] += len(frame)
+        print(f"Loaded {loaded[table]:,} rows into {table}")
+    return loaded
+
+
+def main(argv=None):
+    settings = ConfigurationExecutor().get_synthetic_data_settings()
+    parser = argparse.ArgumentParser(description="Generate synthetic P&C insurance data for scale testing.")
+    parser.add_argument("--scale-factor", type=float, default=settings["scale_factor"], help="1 = SF1 (~2.9M rows), 10 = SF10")
+    parser.add_argument("--seed", type=int, default=settings["seed"])
+    parser.add_argument("--format", choices=["parquet", "csv"], default=settings["format"])
+    parser.add_argument("--chunk-rows", type=int, default=settings["chunk_rows"], help="Rows per part file")
+    parser.add_argument("--workers", type=int, default=settings["workers"], help="Parallel writer processes")
+    parser.add_argument("--tables", nargs="*", help="Only generate these tables")
+    parser.add_argument("--output-dir", help="Defaults to <output_dir>/sf<scale factor>")
+    parser.add_argument("--local-testing", action="store_true", help="Load the files into a Snowpark local testing session")
+    args = parser.parse_args(argv)
+
+    scale_factor = int(args.scale_factor) if args.scale_factor == int(args.scale_factor) else args.scale_factor
+    output_dir = args.output_dir or os.path.join(settings["output_dir"], f"sf{scale_factor}")
+    generator = SyntheticDataGenerator(scale_factor=scale_factor, seed=args.seed)
+    manifest = generator.generate(output_dir, args.format, args.chunk_rows, args.workers, args.tables)
+    for table in manifest["table_order"]:
+        print(f"{table:20} {manifest['tables'][table]['rows']:>12,} rows")
+    print(f"Done in {manifest['elapsed_seconds']:.1f}s; load with {os.path.join(output_dir, 'load_snowflake.sql')}")
+
+    if args.local_testing:
+        from snowflake.snowpark import Session
+
+        load_into_session(Session.builder.config("local_testing", True).create(), output_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+On-disk cache of table statistics and column profiles for the semantic model
+tables: row count, bytes and LAST_ALTERED from INFORMATION_SCHEMA, and per
+column the non-null fraction, approximate distinct count, value range and
+most common values from one approximate-aggregate query per table. Agent 2
+adds a summary to its prompts and the cost guard uses it to flag expensive
+scans and fan-out joins before anything runs.
+
+A refresh re-profiles only tables whose LAST_ALTERED changed or whose
+profile is older than `ttl_seconds`. Refresh out of band (e.g. daily from
+cron) from the Multi_Agent_Application directory:
+    python streamlit_app/table_stats.py
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from snowflake.snowpark import Session
+
+from configuration import ConfigurationExecutor
+from semantic_model import load_semantic_model
+
+
+NUMERIC_OR_TEMPORAL_TYPES = ("NUMBER", "DECIMAL", "INT", "FLOAT", "DOUBLE", "DATE", "TIMESTAMP")
+TEXT_TYPES = ("VARCHAR", "STRING", "TEXT", "CHAR")
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class TableStatsCache:
+    """
+    Table statistics keyed by upper-case table name, persisted as JSON at
+    `path` so every worker and restart reuses the last collection.
+    """
+
+    def __init__(self, path, settings, semantic_model=None):
+        self.path = path
+        self.settings = settings
+        self.semantic_model = semantic_model or load_semantic_model()
+        # _refresh_lock serializes refreshes; _lock only guards short reads and writes of `tables`
+        self._refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.tables = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.tables = json.load(f)["tables"]
+
+    def get(self, table_name):
+        """
+        Returns the statistics of a (possibly qualified) table name, or None.
+        """
+        with self._lock:
+            return self.tables.get(table_name.split(".")[-1].strip('"').upper())
+
+    def refresh(self, session, force=False):
+        """
+        Reads table metadata from INFORMATION_SCHEMA (no warehouse needed) and
+        re-profiles the tables that changed or expired. Returns the names of
+        the re-profiled tables; failures leave the cached statistics in place.
+        """
+        with self._refresh_lock:
+            try:
+                metadata = self._read_metadata(session)
+            except Exception as e:
+                print(f"Could not read table metadata: {e}")
+                return []
+
+            refreshed = []
+            now = time.time()
+            for key, table_metadata in metadata.items():
+                cached = self.get(key)
+                is_current = (
+                    cached is not None
+                    and cached["last_altered"] == table_metadata["last_altered"]
+                    and now - cached["profiled_at"] < self.settings["ttl_seconds"]
+                )
+                if is_current and not force:
+                    continue
+                try:
+                    stats = dict(table_metadata, **self._profile(session, table_metadata))
+                    with self._lock:
+                        self.tables[key] = stats
+                    refreshed.append(table_metadata["name"])
+                except Exception as e:
+                    print(f"Could not profile table {table_metadata['name']}: {e}")
+            if refreshed:
+                self._save()
+                print(f"Refreshed statistics of {len(refreshed)} table(s): {', '.join(refreshed)}")
+            return refreshed
+
+    def _read_metadata(self, session):
+        names = [name.upper() for name in self.semantic_model.table_names()]
+        rows = session.sql(
+            "SELECT TABLE_NAME, ROW_COUNT, BYTES, TO_VARCHAR(LAST_ALTERED) AS LAST_ALTERED "
+            "FROM INFORMATION_SCHEMA.TABLES "
+            f"WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND UPPER(TABLE_NAME) IN ({', '.join('?' for _ in names)})",
+            params=names,
+        ).collect()
+        metadata = {}
+        for row in rows:
+            table = self.semantic_model.get_table(row["TABLE_NAME"])
+            metadata[table["name"].upper()] = {
+                "name": table["name"],
+                "row_count": int(row["ROW_COUNT"] or 0),
+                "bytes": int(row["BYTES"] or 0),
+                "last_altered": row["LAST_ALTERED"],
+            }
+        return metadata
+
+    def _profile(self, session, table_metadata):
+        """
+        One pass of approximate aggregates over the table, read through block
+        sampling when it has more than `profile_sample_rows` rows. Distinct
+        counts of a sample understate the table's (and overstate join fan-out),
+        so a sampled table gets a second, full pass of APPROX_COUNT_DISTINCT.
+        """
+        table = self.semantic_model.get_table(table_metadata["name"])
+        select_list = ["COUNT(*)"]
+        layout = []
+        for column in table["columns"]:
+            data_type = table["data_types"][column].upper()
+            select_list += [f"COUNT({column})", f"APPROX_COUNT_DISTINCT({column})"]
+            if data_type.startswith(NUMERIC_OR_TEMPORAL_TYPES):
+                select_list += [f"TO_VARCHAR(MIN({column}))", f"TO_VARCHAR(MAX({column}))"]
+                layout.append((column, "range"))
+            elif data_type.startswith(TEXT_TYPES) and column not in table["primary_keys"]:
+                select_list.append(f"APPROX_TOP_K({column}, {self.settings['top_k']})")
+                layout.append((column, "top_values"))
+            else:
+                layout.append((column, None))
+
+        sample_percent = None
+        sample_clause = ""
+        if table_metadata["row_count"] > self.settings["profile_sample_rows"]:
+            sample_percent = round(100.0 * self.settings["profile_sample_rows"] / table_metadata["row_count"], 4)
+            sample_clause = f" SAMPLE SYSTEM ({sample_percent})"
+        row = session.sql(f"SELECT {', '.join(select_list)} FROM {table['name']}{sample_clause}").collect()[0]
+        full_distinct = None
+        if sample_percent is not None:
+            full_distinct = session.sql(
+                f"SELECT {', '.join(f'APPROX_COUNT_DISTINCT({column})' for column, _ in layout)} FROM {table['name']}"
+            ).collect()[0]
+
+        profiled_rows = int(row[0])
+        columns = {}
+        position = 1
+        for index, (column, extra) in enumerate(layout):
+            non_null, distinct = int(row[position]), int(row[position + 1])
+            if full_distinct is not None:
+                distinct = int(full_distinct[index])
+            position += 2
+            profile = {
+                "non_null_fraction": round(non_null / profiled_rows, 4) if profiled_rows else None,
+                "distinct": distinct,
+            }
+            if extra == "range":
+                profile["min"], profile["max"] = row[position], row[position + 1]
+                position += 2
+            elif extra == "top_values":
+                top_values = json.loads(row[position]) if row[position] else []
+                position += 1
+                if distinct <= self.settings["top_values_max_distinct"]:
+                    profile["top_values"] = [[value, count] for value, count in top_values]
+            columns[column] = profile
+        # sample_percent applies to non-null fractions, ranges and top values only
+        return {"profiled_at": time.time(), "sample_percent": sample_percent, "columns": columns}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            tables = dict(self.tables)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"tables": tables}, f, indent=2, default=str)
+        os.replace(temp_path, self.path)
+
+    def prompt_context(self):
+        """
+        Returns a compact statistics section for SQL generation prompts, or ""
+        when nothing has been collected yet.
+        """
+        with self._lock:
+            tables = list(self.tables.values())
+        lines = []
+        for stats in sorted(tables, key=lambda stats: stats["name"]):
+            details = [f"~{stats['row_count']:,} rows", _format_bytes(stats["bytes"])]
+            for column, profile in stats["columns"].items():
+                if profile.get("top_values"):
+                    details.append(f"{column} in ({', '.join(str(value) for value, _ in profile['top_values'])})")
+                elif profile.get("min") is not None and profile["distinct"] > 1:
+                    details.append(f"{column} {profile['min']}..{profile['max']}")
+            lines.append(f"- {stats['name']}: " + "; ".join(details))
+        if not lines:
+            return ""
+        return (
+            "\n\nTable statistics (approximate; use them to pick selective filters and realistic literal values):\n"
+            + "\n".join(lines)
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect or refresh statistics of the semantic model tables.")
+    parser.add_argument("--force", action="store_true", help="Re-profile every table, changed or not")
+    args = parser.parse_args(argv)
+
+    config = ConfigurationExecutor()
+    settings = config.get_table_stats_settings()
+    cache = TableStatsCache(settings["path"], settings)
+    cache.refresh(Session.builder.configs(config.get_connection_params()).create(), force=args.force)
+    print(cache.prompt_context().strip() or "No table statistics collected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
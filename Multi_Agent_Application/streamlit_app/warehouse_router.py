@@ -0,0 +1,87 @@
+import json
+import re
+import threading
+
+from snowflake.snowpark import Session
+
+from sql_analysis import strip_statement_terminators
+
+
+JOIN_PATTERN = re.compile(r"\bJOIN\b", re.IGNORECASE)
+
+
+class WarehouseRouter:
+    """
+    Estimates the cost of a query from its EXPLAIN plan (bytes and partitions
+    assigned, join count) and routes it to the smallest warehouse tier whose
+    thresholds it fits. Each warehouse gets its own Snowpark session so that
+    concurrent jobs never switch warehouses under each other.
+    """
+
+    def __init__(self, default_session, connection_params, routing_settings):
+        self.default_session = default_session
+        self.default_warehouse = connection_params["warehouse"]
+        self.connection_params = connection_params
+        self.tiers = routing_settings["tiers"]
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def estimate_cost(self, sql_query):
+        """
+        Returns {"bytes_assigned", "partitions_assigned", "partitions_total", "join_count"}
+        from EXPLAIN USING JSON, or None if the query cannot be compiled.
+        """
+        try:
+            plan_rows = self.default_session.sql(f"EXPLAIN USING JSON {strip_statement_terminators(sql_query).strip()}").collect()
+            plan = json.loads(plan_rows[0][0])
+        except Exception as e:
+            print(f"Could not estimate query cost: {e}")
+            return None
+
+        global_stats = plan.get("GlobalStats", {})
+        operations = [op for step in plan.get("Operations", []) for op in step]
+        join_count = sum(1 for op in operations if "Join" in op.get("operation", ""))
+        return {
+            "bytes_assigned": global_stats.get("bytesAssigned", 0),
+            "partitions_assigned": global_stats.get("partitionsAssigned", 0),
+            "partitions_total": global_stats.get("partitionsTotal", 0),
+            "join_count": join_count or len(JOIN_PATTERN.findall(sql_query)),
+        }
+
+    def choose_warehouse(self, estimate):
+        """
+        Picks the first tier whose byte and join thresholds cover the estimate.
+        A threshold of None means unbounded.
+        """
+        if estimate is None:
+            return self.default_warehouse
+        for tier in self.tiers:
+            max_bytes = tier.get("max_bytes_scanned")
+            max_joins = tier.get("max_joins")
+            if max_bytes is not None and estimate["bytes_assigned"] > max_bytes:
+                continue
+            if max_joins is not None and estimate["join_count"] > max_joins:
+                continue
+            return tier["warehouse"]
+        return self.tiers[-1]["warehouse"]
+
+    def route(self, sql_query, adaptive=True):
+        """
+        Returns (session, cost_report) for the query.
+        With `adaptive=False` the query is only estimated and stays on the default warehouse.
+        """
+        estimate = self.estimate_cost(sql_query)
+        warehouse = self.choose_warehouse(estimate) if adaptive else self.default_warehouse
+        cost_report = dict(estimate or {})
+        cost_report["warehouse"] = warehouse
+        return self.get_session(warehouse), cost_report
+
+    def get_session(self, warehouse):
+        if warehouse.lower() == self.default_warehouse.lower():
+            return self.default_session
+        with self._lock:
+            if warehouse not in self._sessions:
+                print(f"Opening Snowpark session on warehouse {warehouse}")
+                params = dict(self.connection_params, warehouse=warehouse)
+                self._sessions[warehouse] = Session.builder.configs(params).create()
+            return self._sessions[warehouse]
@@ -0,0 +1,151 @@
+import re
+import statistics
+import threading
+import time
+
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][\w$]*$")
+
+
+def _completed_durations(runs):
+    return [run["total_seconds"] for run in runs if run["total_seconds"] and run["status"] == "COMPLETE"]
+
+
+class WarehouseWarmer:
+    """
+    Resumes Agent 3's warehouse(s) as soon as a document is uploaded and keeps
+    them from auto-suspending for the expected pipeline duration with cheap
+    heartbeat queries, so the first validation query does not pay a cold
+    resume after minutes of LLM work. Sessions come from the WarehouseRouter,
+    so warming a routing tier also opens its pooled session.
+    """
+
+    def __init__(self, warehouse_router, settings):
+        self.warehouse_router = warehouse_router
+        self.settings = settings
+        self._warehouses = {}
+        self._keep_alive_until = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def target_warehouses(self):
+        warehouses = [self.warehouse_router.default_warehouse]
+        if self.settings["warm_routing_tiers"]:
+            for tier in self.warehouse_router.tiers:
+                if tier["warehouse"].lower() not in {w.lower() for w in warehouses}:
+                    warehouses.append(tier["warehouse"])
+        return warehouses
+
+    def expected_duration(self, run_store=None, requirements_text=None):
+        """
+        Keep-alive window in seconds: the median duration of earlier runs of
+        this document (or of recent runs), capped at `max_keep_alive_seconds`.
+        """
+        durations = []
+        if run_store is not None:
+            if requirements_text:
+                durations = _completed_durations(run_store.find_runs(requirements_text=requirements_text, limit=20))
+            if not durations:
+                durations = _completed_durations(run_store.find_runs(limit=20))
+        if not durations:
+            return self.settings["default_keep_alive_seconds"]
+        expected = statistics.median(durations) + self.settings["keep_alive_margin_seconds"]
+        return min(expected, self.settings["max_keep_alive_seconds"])
+
+    def warm(self, keep_alive_seconds):
+        """
+        Starts warming in the background and returns immediately. Calling it
+        again while the warehouses are warm only extends the keep-alive window.
+        """
+        with self._lock:
+            self._keep_alive_until = max(self._keep_alive_until, time.time() + keep_alive_seconds)
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="warehouse-warmer", daemon=True)
+            self._thread.start()
+        print(f"Warming warehouses {', '.join(self.target_warehouses())} for {keep_alive_seconds:.0f}s")
+
+    def _run(self):
+        for warehouse in self.target_warehouses():
+            self._resume(warehouse)
+        next_heartbeat = time.time() + self.settings["heartbeat_interval_seconds"]
+        while True:
+            with self._lock:
+                now = time.time()
+                if now >= self._keep_alive_until:
+                    self._thread = None
+                    break
+                wait = min(next_heartbeat, self._keep_alive_until) - now
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            for warehouse in self.target_warehouses():
+                self._heartbeat(warehouse)
+            next_heartbeat = time.time() + self.settings["heartbeat_interval_seconds"]
+        print("Warehouse keep-alive window ended; warehouses may auto-suspend")
+
+    def _warehouse_state(self, session, warehouse):
+        try:
+            rows = session.sql(f"SHOW WAREHOUSES LIKE '{warehouse}'").collect()
+            return str(rows[0].as_dict().get("state", "UNKNOWN")).upper() if rows else "UNKNOWN"
+        except Exception as e:
+            print(f"Could not read the state of warehouse {warehouse}: {e}")
+            return "UNKNOWN"
+
+    def _resume(self, warehouse):
+        """
+        Resumes the warehouse if it is suspended and runs one heartbeat on it.
+        The time this takes is the cold resume the pipeline no longer pays.
+        """
+        entry = {
+            "state_before": "UNKNOWN",
+            "resume_seconds": 0.0,
+            "warmed_at": None,
+            "heartbeats": 0,
+            "last_heartbeat_at": None,
+            "error": None,
+        }
+        with self._lock:
+            self._warehouses[warehouse] = entry
+        try:
+            session = self.warehouse_router.get_session(warehouse)
+            entry["state_before"] = self._warehouse_state(session, warehouse)
+            started = time.time()
+            if entry["state_before"] != "STARTED" and IDENTIFIER.match(warehouse):
+                try:
+                    session.sql(f"ALTER WAREHOUSE {warehouse} RESUME IF SUSPENDED").collect()
+                except Exception as e:
+                    # Without OPERATE privilege the heartbeat below auto-resumes it instead
+                    print(f"Could not resume warehouse {warehouse} explicitly: {e}")
+            session.sql(self.settings["heartbeat_sql"]).collect()
+            if entry["state_before"] != "STARTED":
+                entry["resume_seconds"] = round(time.time() - started, 3)
+            entry["warmed_at"] = time.time()
+            entry["last_heartbeat_at"] = entry["warmed_at"]
+            print(f"Warehouse {warehouse} warm (was {entry['state_before']}, {entry['resume_seconds']:.2f}s)")
+        except Exception as e:
+            entry["error"] = str(e)
+            print(f"Could not warm warehouse {warehouse}: {e}")
+
+    def _heartbeat(self, warehouse):
+        entry = self._warehouses.get(warehouse)
+        try:
+            self.warehouse_router.get_session(warehouse).sql(self.settings["heartbeat_sql"]).collect()
+            if entry is not None:
+                entry["heartbeats"] += 1
+                entry["last_heartbeat_at"] = time.time()
+        except Exception as e:
+            print(f"Heartbeat on warehouse {warehouse} failed: {e}")
+
+    def stats(self):
+        """
+        Returns {"keep_alive_until", "resume_seconds_avoided", "warehouses": {name: entry}}.
+        """
+        with self._lock:
+            warehouses = {name: dict(entry) for name, entry in self._warehouses.items()}
+            keep_alive_until = self._keep_alive_until
+        return {
+            "keep_alive_until": keep_alive_until,
+            "resume_seconds_avoided": round(sum(entry["resume_seconds"] for entry in warehouses.values()), 3),
+            "warehouses": warehouses,
+        }
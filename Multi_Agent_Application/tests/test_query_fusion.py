@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+from query_fusion import parse_scalar_aggregate, plan_fusion
+
+
+OTHER_POLICY_CHECKS = [
+    "SELECT COUNT(*) AS n FROM Policies WHERE Status = 'Cancelled'",
+    "SELECT SUM(TotalPremium) AS total FROM Policies WHERE PolicyType = 'Auto'",
+]
+
+
+def _fused_queries(plan):
+    return {member["sql"] for group in plan for member in group["members"]}
+
+
+def test_fuses_rewritable_aggregates_over_the_same_table():
+    plan = plan_fusion(OTHER_POLICY_CHECKS)
+
+    assert len(plan) == 1
+    assert _fused_queries(plan) == set(OTHER_POLICY_CHECKS)
+    assert "COUNT_IF((Status = 'Cancelled'))" in plan[0]["sql"]
+
+
+def test_does_not_fuse_queries_with_other_aggregates():
+    for aggregate in ("STDDEV_POP(TotalPremium)", "BOOLAND_AGG(IsRenewal)", "MAX_BY(PolicyID, TotalPremium)"):
+        sql = f"SELECT COUNT(*) AS n, {aggregate} AS x FROM Policies WHERE Status = 'Active'"
+
+        assert parse_scalar_aggregate(sql) is None
+        assert sql not in _fused_queries(plan_fusion([sql] + OTHER_POLICY_CHECKS))
+
+
+def test_fuses_known_scalar_functions_around_aggregates():
+    sql = (
+        "SELECT AVG(COALESCE(TotalPremium, 0)) AS avg_premium, SUM(TotalPremium) / NULLIF(COUNT(*), 0) AS mean_premium "
+        "FROM Policies WHERE Status = 'Active'"
+    )
+
+    assert parse_scalar_aggregate(sql) is not None
+    assert sql in _fused_queries(plan_fusion([sql] + OTHER_POLICY_CHECKS))